@@ -1,13 +1,27 @@
 import re
-import PyPDF2
-import io
 import sys
 import os
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from contextlib import contextmanager, nullcontext
+from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-import tempfile
+from results import AnalysisResult, score_bounds, screening_decision
+from document import ResumeDocument, normalize_text
+from cache import LRUCache, content_hash
+from skills import canonicalize_skills
+from sections import build_chunks, resume_chunks, rerank_by_section
+from vector_index import IndexFactory, stored_vectors
+from pipeline import build_index
+from prescore import SimilarityScorer
+from cancellation import AnalysisCancelled
+from skill_vocab import VocabularyEmbeddings
+from routing import ModelRouter, SKILL_SCORING, DIRECT_SCORING, JD_EXTRACTION, WEAKNESS
+from cassette import async_openai_client, http_client
+import ast
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import json
+import threading
+import time
+import uuid
 import warnings
 import httpx
 
@@ -35,30 +49,124 @@ os.environ['LANG'] = 'en_US.UTF-8'
 # Configure httpx to use UTF-8
 httpx.Client.encoding = 'utf-8'
 
+# Bump whenever a prompt or response parser changes, so saved analyses are not reused
+PROMPT_VERSION = "1"
+
+# Reasoning of a result scored without the resume index, after indexing failed
+DIRECT_ANALYSIS_REASONING = "Direct analysis without vector store"
+
+
+def parse_score(response_text):
+    '''Return the 0-10 score in an LLM scoring response, or None if there is none.'''
+    match = re.search(r'(\d{1,2})', response_text)
+    if not match or int(match.group(1)) > 10:
+        return None
+    return int(match.group(1))
+
+
+def parse_skill_list(skills_text):
+    '''Parse an LLM-produced list of skills (Python list literal or bullet lines).'''
+    match = re.search(r'\[.*\]', skills_text, re.DOTALL)
+    if match:
+        try:
+            skills_list = ast.literal_eval(match.group(0))
+            if isinstance(skills_list, list):
+                return [str(skill) for skill in skills_list]
+        except (ValueError, SyntaxError):
+            pass
+
+    skills = []
+    for line in skills_text.split('\n'):
+        line = line.strip()
+        if line.startswith('- ') or line.startswith('* '):
+            skill = line[2:].strip()
+            if skill:
+                skills.append(skill)
+
+        elif line.startswith('"') and line.endswith('"'):
+            skill = line.strip('"').strip()
+            if skill:
+                skills.append(skill)
+
+    return skills
+
+
+def parse_weakness(weakness_content):
+    '''Parse a weakness JSON response, returning None when it is not usable.'''
+    try:
+        weakness_data = json.loads(weakness_content)
+    except json.JSONDecodeError:
+        return None
+    return weakness_data if isinstance(weakness_data, dict) else None
+
 class ResumeAnalysisAgent:
-    def __init__(self,api_key,cutoff_score=75):
+    """Stateless resume analysis agent.
+
+    An agent holds only configuration and API clients, so a single instance can
+    be shared by every session in the process. Per-analysis data (resume text,
+    extracted skills, results) is passed between methods and returned to the
+    caller instead of being stored on the agent.
+    """
+
+    def __init__(self,api_key,cutoff_score=75,skill_similarity_threshold=0.95,text_store=None,router=None,
+                 scoring_workers=4,index_factory=None,prescorer=None,analysis_store=None,skill_vocabulary=None,
+                 embed_batch_size=16,weakness_prefetch=2,near_duplicates=None):
         self.api_key = api_key
         # Keep API key as-is (don't sanitize it as it needs to be exact)
         self.cutoff_score = cutoff_score
-        self.resume_text=None
-        self.rag_vectorstore=None
-        self.analysis_results=None
-        self.jd_text=None
-        self.extracted_skills=None
-        self.resume_weaknesses=[]
-        self.resume_strengths=[]
-        self.improvement_suggestions=[]
-        # Initialize embeddings with UTF-8 HTTP client
+        self.skill_similarity_threshold = skill_similarity_threshold
+        # Optional ExtractedTextStore; documents already in it are never re-parsed
+        self.text_store = text_store
+        # Picks a model tier per call type (scoring, JD extraction, weaknesses)
+        self.router = router or ModelRouter(api_key)
+        # Concurrent LLM scoring calls per analysis
+        self.scoring_workers = scoring_workers
+        # Builds per-resume indexes (flat or quantized) and loads offline-built ones
+        self.index_factory = index_factory or IndexFactory()
+        # Chunks per embedding request while a resume is parsed and indexed
+        self.embed_batch_size = embed_batch_size
+        # Embedding-similarity estimates used by the "similarity" and "hybrid" scoring modes
+        self.prescorer = prescorer or SimilarityScorer()
+        # Optional AnalysisStore; identical analyses are answered from it without any API calls
+        self.analysis_store = analysis_store
+        # Optional NearDuplicateIndex; near copies of analyzed resumes reuse their saved analyses
+        self.near_duplicates = near_duplicates if analysis_store is not None else None
+        # Initialize embeddings with UTF-8 HTTP client (recording or replaying when a cassette is configured);
+        # a cassette that cannot be opened fails here instead of falling back to the live API
+        http = http_client()
         try:
-            http_client = httpx.Client(encoding='utf-8')
-            self.embeddings = OpenAIEmbeddings(openai_api_key=self.api_key, http_client=http_client)
+            self.embeddings = OpenAIEmbeddings(openai_api_key=self.api_key, http_client=http,
+                                               async_client=async_openai_client(self.api_key).embeddings)
         except:
             # Fallback to default initialization
             self.embeddings = OpenAIEmbeddings(openai_api_key=self.api_key)
+        # Skill names are embedded through the precomputed vocabulary table when one is given
+        self.skill_embeddings = self.embeddings
+        if skill_vocabulary is not None:
+            model = getattr(self.embeddings, "model", None)
+            if skill_vocabulary.model not in (None, model):
+                print(f"Skill vocabulary {skill_vocabulary.version} was built with {skill_vocabulary.model}, "
+                      f"not {model}; embedding skills live")
+            else:
+                self.skill_embeddings = VocabularyEmbeddings(self.embeddings, skill_vocabulary)
         # Set up FAISS index directory
         self.faiss_index_dir = 'faiss_indexes'
         if not os.path.exists(self.faiss_index_dir):
             os.makedirs(self.faiss_index_dir)
+        # Results keyed by content identity, so re-running an analysis only pays
+        # for skills, resumes or job descriptions that have not been seen before
+        self.score_cache = LRUCache(maxsize=4096)        # (resume hash, method, skill) -> (score, reasoning)
+        self.weakness_cache = LRUCache(maxsize=1024)     # (resume hash, skill) -> weakness detail
+        self.jd_skills_cache = LRUCache(maxsize=256)     # JD hash -> extracted skills
+        self.canonical_cache = LRUCache(maxsize=256)     # skill list hash -> (canonical skills, skill map)
+        self.vectorstore_cache = LRUCache(maxsize=8)     # resume hash -> FAISS vectorstore
+        self.skill_vector_cache = LRUCache(maxsize=4096) # skill -> embedding
+        self.resume_text_cache = LRUCache(maxsize=64)    # document hash -> resume text (repeat analyses, deferred weaknesses)
+        # Deferred weakness suggestions for the lowest-scoring skills are generated ahead of time
+        self.weakness_prefetch = weakness_prefetch
+        self._weakness_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="weakness-prefetch")
+        self._weakness_futures = {}                      # (resume hash, skill) -> Future
+        self._weakness_lock = threading.Lock()
     
     def _ensure_utf8(self, text):
         """Ensure text is properly encoded as UTF-8 string"""
@@ -94,25 +202,11 @@ class ResumeAnalysisAgent:
                     safe_text += " "
         return safe_text
 
-    def extract_text_from_pdf(self, pdf_bytes):
+    def extract_text_from_pdf(self, pdf_file):
         '''Extract text from PDF File.'''
         try:
-            if hasattr(pdf_bytes, 'getvalue'):
-                pdf_data = pdf_bytes.getvalue()
-                pdf_file_like = io.BytesIO(pdf_data)
-                reader = PyPDF2.PdfReader(pdf_file_like)
-            else:
-                reader = PyPDF2.PdfReader(pdf_bytes)
-
-            text = ""
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    # Ensure proper encoding handling
-                    if isinstance(page_text, bytes):
-                        page_text = page_text.decode('utf-8', errors='replace')
-                    text += page_text + "\n"
-            return text
+            with self._open_document(pdf_file) as doc:
+                return doc.read_pdf_text()
         except Exception as e:
             print(f"Error extracting text from PDF: {str(e)}")
             return ""
@@ -120,27 +214,105 @@ class ResumeAnalysisAgent:
     def extract_text_from_txt(self, txt_file):
         '''Extract text from TXT File.'''
         try:        
-            if hasattr(txt_file, 'getvalue'):
-                txt_data = txt_file.getvalue()
-                if isinstance(txt_data, bytes):
-                    return txt_data.decode('utf-8', errors='replace')
-                return txt_data
-            else:
-                with open(txt_file, 'r', encoding='utf-8') as f:
-                    return f.read()             
+            with self._open_document(txt_file) as doc:
+                return doc.read_txt_text()
         except Exception as e:
             print(f"Error extracting text from TXT: {str(e)}")
             return ""  
 
     def extract_text_from_file(self, file):
         '''Extract text from file (PDF or text).'''
-        if file.name.lower().endswith('.pdf'):
-            return self.extract_text_from_pdf(file)
-        elif file.name.lower().endswith('.txt'):
-            return self.extract_text_from_txt(file)
-        else:
-            print("Unsupported file format. Please upload a PDF or TXT file.")
+        with self._open_document(file) as doc:
+            if doc.kind == "pdf":
+                return self.extract_text_from_pdf(doc)
+            elif doc.kind == "txt":
+                return self.extract_text_from_txt(doc)
+            else:
+                print("Unsupported file format. Please upload a PDF or TXT file.")
+                return ""
+
+    def _known_resume_text(self, doc_hash):
+        """Text of a document already extracted in this process or held in the text store, else None"""
+        text = self.resume_text_cache.get(doc_hash)
+        if text is None and self.text_store is not None:
+            try:
+                text = self.text_store.get_text(doc_hash)
+            except Exception as e:
+                print(f"Could not read from text store: {str(e)}")
+            if text is not None:
+                self.resume_text_cache.set(doc_hash, text)
+        return text
+
+    def extract_resume_text(self, resume_doc, cancel_token=None):
+        '''Extract normalized resume text, reusing the text store for known documents.'''
+        try:
+            doc_hash = resume_doc.content_hash
+            known_text = self._known_resume_text(doc_hash)
+            if known_text is not None:
+                return known_text
+
+            text, page_count, extract_seconds = resume_doc.extract(cancel_token)
+            if text:
+                self.resume_text_cache.set(doc_hash, text)
+
+            if self.text_store is not None and text:
+                try:
+                    self.text_store.put(doc_hash, text, page_count, extract_seconds,
+                                        source=resume_doc.name, kind=resume_doc.kind)
+                except Exception as e:
+                    print(f"Could not write to text store: {str(e)}")
+            return text
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            print(f"Error extracting text from resume: {str(e)}")
+            return ""
+
+    def extract_and_index_resume(self, resume_doc, cancel_token=None):
+        '''Extract normalized resume text, indexing it for retrieval in the same streaming pass.
+
+        Chunks are embedded while later pages are still being parsed, and the
+        index is cached for the analysis that follows. Documents seen before (in
+        this process or the text store) are neither parsed nor embedded again:
+        their text is looked up by document hash, and their index is loaded from
+        the cache or built only if some skill still needs retrieval.
+        '''
+        known_text = self._known_resume_text(resume_doc.content_hash)
+        if known_text is not None:
+            return known_text
+        try:
+            start = time.perf_counter()
+            vectorstore, pages = build_index(resume_doc.iter_pages(cancel_token), self.embeddings,
+                                             self.index_factory, self.embed_batch_size)
+            text = normalize_text("".join(pages))
+            extract_seconds = time.perf_counter() - start
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            print(f"Error extracting text from resume: {str(e)}")
             return ""
+
+        if self.text_store is not None and text:
+            try:
+                self.text_store.put(resume_doc.content_hash, text, len(pages), extract_seconds,
+                                    source=resume_doc.name, kind=resume_doc.kind)
+            except Exception as e:
+                print(f"Could not write to text store: {str(e)}")
+        if text:
+            self.resume_text_cache.set(resume_doc.content_hash, text)
+        if vectorstore is not None and text:
+            self._save_index(vectorstore)
+            self.vectorstore_cache.set(content_hash(text), vectorstore)
+        return text
+
+    @contextmanager
+    def _open_document(self, source):
+        """Yield a ResumeDocument for source, closing it only if opened here"""
+        if isinstance(source, ResumeDocument):
+            yield source
+            return
+        with ResumeDocument(source) as doc:
+            yield doc
             
     def create_rag_vector_store(self, text):
         '''Create RAG Vector Store from text.'''
@@ -152,29 +324,15 @@ class ResumeAnalysisAgent:
             # Sanitize text to remove problematic characters
             text = self._sanitize_text(text)
             
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                length_function=len,  
-            )
-            chunks = text_splitter.split_text(text)
-            
-            # Sanitize each chunk as well and remove empty chunks
-            chunks = [self._sanitize_text(chunk).strip() for chunk in chunks if chunk.strip()]
-            
-            if not chunks:
-                print("No chunks to process after sanitization")
-                return None
-            
-            # Remove any chunks that are too short or contain only whitespace
-            chunks = [chunk for chunk in chunks if len(chunk.strip()) > 10]
+            # Chunk along section and role boundaries; chunks of 10 chars or less are dropped
+            chunks, metadatas = build_chunks(text, max_chars=1000)
             
             if not chunks:
                 # If no valid chunks, create a dummy chunk from sanitized text
                 chunks = [text[:1000] if text else "Resume content"]
+                metadatas = [{"section": "other", "heading": "", "entry": None}]
             
-            embeddings = OpenAIEmbeddings(openai_api_key=self.api_key)
-            vectorstore = FAISS.from_texts(chunks, embeddings)
+            vectorstore = FAISS.from_texts(chunks, self.embeddings, metadatas=metadatas)
             return vectorstore
         except Exception as e:
             print(f"Error creating RAG vector store: {str(e)}")
@@ -196,8 +354,7 @@ class ResumeAnalysisAgent:
             if not text or len(text.strip()) == 0:
                 text = "Resume content"
             
-            embeddings = OpenAIEmbeddings(openai_api_key=self.api_key)
-            vectorstore = FAISS.from_texts([text[:2000]], embeddings)
+            vectorstore = FAISS.from_texts([text[:2000]], self.embeddings)
             return vectorstore
         except Exception as e:
             print(f"Error creating vector store: {str(e)}")
@@ -205,238 +362,404 @@ class ResumeAnalysisAgent:
             traceback.print_exc()
             return None
     
-    def analyze_resume_weaknesses(self):
-        '''Analyze resume weaknesses based on extracted skills.'''
-        if not self.resume_text or not self.extracted_skills or not self.analysis_results:
+    def analyze_resume_weaknesses(self, resume_text, analysis_results, cancel_token=None):
+        '''Analyze resume weaknesses for the missing skills of an analysis result.
+
+        Stops at the first skill reached after cancel_token fires; the caller
+        can tell which skills were skipped from the returned entries.
+        '''
+        if not resume_text or not analysis_results:
             return []
         weaknesses = []
+        resume_key = content_hash(resume_text)
+        missing_skills = analysis_results.get("missing_skills", [])
 
-        for skill in self.analysis_results.get("missing_skills", []):
-            weakness_detail = {
-                "skill": skill,
-                "score": self.analysis_results.get("skill_scores", {}).get(skill, 0),
-                "detail": "Skill needs improvement - consider adding relevant projects or certifications",
-                "suggestions": [
-                    "Add a project showcasing this skill to your experience section",
-                    "Include relevant certifications or training courses",
-                    "Highlight specific accomplishments using this skill"
-                ],
-                "example": f"Led implementation of {skill} solution resulting in 30% efficiency improvement"
-            }
-            
+        for position, skill in enumerate(missing_skills):
+            if cancel_token is not None:
+                cancel_token.report("weaknesses", position, len(missing_skills))
+                if cancel_token.cancelled:
+                    break
             try:
-                # Create custom HTTP client with UTF-8 encoding
-                try:
-                    http_client = httpx.Client(encoding='utf-8')
-                    llm = ChatOpenAI(
-                        model="gpt-4o", 
-                        openai_api_key=self.api_key, 
-                        temperature=0.5,
-                        http_client=http_client
-                    )
-                except:
-                    # Fallback without custom HTTP client
-                    llm = ChatOpenAI(model="gpt-4o", openai_api_key=self.api_key, temperature=0.5)
-                
-                # Sanitize all inputs
-                sanitized_skill = self._sanitize_text(skill)
-                sanitized_resume = self._sanitize_text(self.resume_text[:3000])
-                
-                prompt = (f"The resume lacks the skill: {sanitized_skill}. Suggest ways to improve the resume to better demonstrate this skill. "
-                          "For your analysis, consider: "
-                          "1. Whats missing in the resume regarding this skill? "
-                          "2. How it can be improved with specific examples? "
-                          "3. Provide actionable suggestions. "
-                          f"Resume Content: {sanitized_resume} "
-                          "Provide your response in JSON format with keys: "
-                          '{"weakness":"A concise description of what\'s missing or problematic (1-2 sentences)",'
-                          '"improvement_suggestions":["Specific suggestion 1","Specific suggestion 2","Specific suggestion 3"],'
-                          '"example_addition":"A specific bullet point that could be added to showcase this skill"} '
-                          "Return only the JSON object without any additional text.")
-
-                response = llm.invoke(prompt)
-                weakness_content = response.content.strip()
-                
-                try:
-                    weakness_data = json.loads(weakness_content)
-                    weakness_detail = {
-                        "skill": skill,
-                        "score": self.analysis_results.get("skill_scores", {}).get(skill, 0),
-                        "detail": weakness_data.get("weakness", "No Specific details provided."),
-                        "suggestions": weakness_data.get("improvement_suggestions", []),
-                        "example": weakness_data.get("example_addition", "")
-                    }
-
-                    self.improvement_suggestions[skill] = {
-                        "suggestions": weakness_data.get("improvement_suggestions", []),
-                        "example": weakness_data.get("example_addition", "")
-                    }           
-                except json.JSONDecodeError:
-                    pass
-                    
-            except UnicodeEncodeError as ue:
-                print(f"Encoding error analyzing weakness for skill {skill}: {str(ue)}")
-                weakness_detail["detail"] = "Skill needs improvement - consider adding relevant experience"
-            except Exception as e:
-                print(f"Error analyzing weakness for skill {skill}: {str(e)}")
-                weakness_detail["detail"] = "Skill needs improvement - add more relevant experience"
-            
-            weaknesses.append(weakness_detail)
+                weakness = self._weakness_detail(resume_text, resume_key, skill, cancel_token)
+            except AnalysisCancelled:
+                break
+            weaknesses.append(dict(weakness, score=analysis_results.score_of(skill)))
 
-        self.resume_weaknesses = weaknesses
         return weaknesses
+
+    def _weakness_detail(self, resume_text, resume_key, skill, cancel_token=None):
+        """Improvement suggestions for one skill, cached once the LLM gave a usable answer"""
+        cached = self.weakness_cache.get((resume_key, skill))
+        if cached is not None:
+            return cached
+
+        weakness_detail = {
+            "skill": skill,
+            "detail": "Skill needs improvement - consider adding relevant projects or certifications",
+            "suggestions": [
+                "Add a project showcasing this skill to your experience section",
+                "Include relevant certifications or training courses",
+                "Highlight specific accomplishments using this skill"
+            ],
+            "example": f"Led implementation of {skill} solution resulting in 30% efficiency improvement"
+        }
+        
+        try:
+            # Sanitize all inputs
+            sanitized_skill = self._sanitize_text(skill)
+            sanitized_resume = self._sanitize_text(resume_text[:3000])
+            
+            prompt = (f"The resume lacks the skill: {sanitized_skill}. Suggest ways to improve the resume to better demonstrate this skill. "
+                      "For your analysis, consider: "
+                      "1. Whats missing in the resume regarding this skill? "
+                      "2. How it can be improved with specific examples? "
+                      "3. Provide actionable suggestions. "
+                      f"Resume Content: {sanitized_resume} "
+                      "Provide your response in JSON format with keys: "
+                      '{"weakness":"A concise description of what\'s missing or problematic (1-2 sentences)",'
+                      '"improvement_suggestions":["Specific suggestion 1","Specific suggestion 2","Specific suggestion 3"],'
+                      '"example_addition":"A specific bullet point that could be added to showcase this skill"} '
+                      "Return only the JSON object without any additional text.")
+
+            weakness_content = self.router.invoke(WEAKNESS, prompt, temperature=0.5,
+                                                  validator=lambda text: parse_weakness(text) is not None,
+                                                  cancel_token=cancel_token)
+            
+            weakness_data = parse_weakness(weakness_content)
+            if weakness_data is not None:
+                weakness_detail = {
+                    "skill": skill,
+                    "detail": weakness_data.get("weakness", "No Specific details provided."),
+                    "suggestions": weakness_data.get("improvement_suggestions", []),
+                    "example": weakness_data.get("example_addition", "")
+                }
+                self.weakness_cache.set((resume_key, skill), weakness_detail)
+                
+        except AnalysisCancelled:
+            raise
+        except UnicodeEncodeError as ue:
+            print(f"Encoding error analyzing weakness for skill {skill}: {str(ue)}")
+            weakness_detail["detail"] = "Skill needs improvement - consider adding relevant experience"
+        except Exception as e:
+            print(f"Error analyzing weakness for skill {skill}: {str(e)}")
+            weakness_detail["detail"] = "Skill needs improvement - add more relevant experience"
+        
+        return weakness_detail
+
+    def pending_weaknesses(self, analysis_results):
+        """Missing skills of a deferred-weakness result that have no suggestions yet, lowest score first"""
+        if not analysis_results.get("weaknesses_deferred"):
+            return []
+        covered = {weakness["skill"] for weakness in analysis_results.get("resume_weaknesses", [])}
+        pending = [skill for skill in analysis_results.get("missing_skills", []) if skill not in covered]
+        return sorted(pending, key=analysis_results.score_of)
+
+    def _deferred_resume_text(self, analysis_results):
+        """Resume text behind a deferred-weakness result, or None if it is no longer available"""
+        document_hash = analysis_results.get("resume_hash")
+        if not document_hash:
+            return None
+        return self._known_resume_text(document_hash)
+
+    def prefetch_weaknesses(self, analysis_results, count=None):
+        """Generate suggestions for the lowest-scoring pending skills in the background"""
+        count = self.weakness_prefetch if count is None else count
+        resume_text = self._deferred_resume_text(analysis_results)
+        if not resume_text or count <= 0:
+            return
+        resume_key = content_hash(resume_text)
+        for skill in self.pending_weaknesses(analysis_results)[:count]:
+            key = (resume_key, skill)
+            with self._weakness_lock:
+                if key in self.weakness_cache or key in self._weakness_futures:
+                    continue
+                future = self._weakness_pool.submit(self._weakness_detail, resume_text, resume_key, skill)
+                self._weakness_futures[key] = future
+            future.add_done_callback(lambda _future, key=key: self._forget_weakness_future(key))
+
+    def _forget_weakness_future(self, key):
+        with self._weakness_lock:
+            self._weakness_futures.pop(key, None)
+
+    def weakness_for_skill(self, analysis_results, skill, wait=True):
+        '''Suggestions for one missing skill of a deferred-weakness result.
+
+        Returns a cached or prefetched entry at once. Otherwise, with wait=True,
+        the suggestions are generated (or an in-flight prefetch is awaited); with
+        wait=False, None is returned. None also means the resume text is gone.
+        '''
+        resume_text = self._deferred_resume_text(analysis_results)
+        if not resume_text:
+            return None
+        resume_key = content_hash(resume_text)
+        score = analysis_results.score_of(skill)
+        cached = self.weakness_cache.get((resume_key, skill))
+        if cached is not None:
+            return dict(cached, score=score)
+        with self._weakness_lock:
+            future = self._weakness_futures.get((resume_key, skill))
+        if not wait and (future is None or not future.done()):
+            return None
+        if future is not None:
+            try:
+                return dict(future.result(), score=score)
+            except Exception as e:
+                print(f"Prefetching weakness for {skill} failed: {str(e)}")
+        return dict(self._weakness_detail(resume_text, resume_key, skill), score=score)
     
-    def extract_skills_from_jd(self, jd_text):
+    def extract_skills_from_jd(self, jd_text, cancel_token=None):
         '''Extract skills from Job Description text.'''
+        jd_key = content_hash(jd_text)
+        cached = self.jd_skills_cache.get(jd_key)
+        if cached is not None:
+            return list(cached)
+        skills = self._extract_skills_from_jd(jd_text, cancel_token)
+        if skills:
+            self.jd_skills_cache.set(jd_key, tuple(skills))
+        return skills
+
+    def _extract_skills_from_jd(self, jd_text, cancel_token=None):
+        '''Ask the LLM for the skills listed in a Job Description.'''
         try:
-            llm = ChatOpenAI(model="gpt-4o", api_key=self.api_key, temperature=0.5)
             prompt = (f"Extract and list the key skills required for the job from the following job description:\n\n{jd_text}\n\n"
                       "Format the output as a Python list of strings. Only provide the list without any additional text.")
-            response = llm.invoke(prompt)
-            skills_text = response.content.strip()
-
-            match = re.search(r'\[.*\]', skills_text, re.DOTALL)
-            if match:
-                skills_text = match.group(0)
-
-            try:
-                skills_list = eval(skills_text)
-                if isinstance(skills_list, list):
-                    return skills_list
-            except:
-                pass
-
-            skills = []
-            for line in skills_text.split('\n'):
-                line = line.strip()
-                if line.startswith('- ') or line.startswith('* '):
-                    skill = line[2:].strip()
-                    if skill:
-                        skills.append(skill)
-
-                elif line.startswith('"') and line.endswith('"'):
-                    skill = line.strip('"').strip()
-                    if skill:
-                        skills.append(skill)
-
-            return skills
+            skills_text = self.router.invoke(JD_EXTRACTION, prompt, temperature=0.5,
+                                             validator=lambda text: bool(parse_skill_list(text)),
+                                             cancel_token=cancel_token)
+            return parse_skill_list(skills_text)
+        except AnalysisCancelled:
+            raise
         except Exception as e:
             print(f"Error extracting skills from JD: {e}")
             return []
         
-    def semantic_skill_analysis(self, resume_text, skills):
-        '''Perform semantic skill analysis of resume against extracted skills.'''
+    def canonicalize_skills(self, skills):
+        '''Collapse duplicate and aliased skills so each is scored once.
+
+        Returns (canonical_skills, skill_map) with skill_map mapping every
+        original skill string to its canonical skill.
+        '''
+        skills_key = content_hash("\n".join(str(skill) for skill in skills))
+        cached = self.canonical_cache.get(skills_key)
+        if cached is not None:
+            return list(cached[0]), dict(cached[1])
+        canonical, skill_map = canonicalize_skills(skills, self.skill_embeddings, self.skill_similarity_threshold)
+        if len(canonical) < len(skills):
+            print(f"Canonicalized {len(skills)} skills to {len(canonical)}")
+        self.canonical_cache.set(skills_key, (tuple(canonical), skill_map))
+        return canonical, dict(skill_map)
+
+    def semantic_skill_analysis(self, resume_text, skills, cutoff_score=None, screening=False, scoring="llm",
+                                cancel_token=None):
+        '''Perform semantic skill analysis of resume against extracted skills.
+
+        With screening=True, scoring stops once the selection outcome is certain
+        and the result is marked partial. scoring="similarity" scores every skill
+        from embedding similarity alone; scoring="hybrid" sends only skills with
+        an ambiguous estimate to the LLM. If cancel_token fires during scoring,
+        the result is partial and lists the cancelled skills.
+        '''
+        cutoff_score = self.cutoff_score if cutoff_score is None else cutoff_score
         try:
             # Try to use vector store first, fall back to direct analysis if it fails
-            return self._vector_store_analysis(resume_text, skills)
+            return self._vector_store_analysis(resume_text, skills, cutoff_score, screening, scoring, cancel_token)
+        except AnalysisCancelled:
+            raise
         except Exception as e:
             print(f"Error in vector store analysis: {str(e)}, falling back to direct analysis")
             try:
-                return self._direct_skill_analysis(resume_text, skills)
+                return self._direct_skill_analysis(resume_text, skills, cutoff_score, screening, cancel_token)
+            except AnalysisCancelled:
+                raise
             except Exception as e2:
                 print(f"Error in fallback direct analysis: {str(e2)}")
                 import traceback
                 traceback.print_exc()
                 return None
     
-    def _vector_store_analysis(self, resume_text, skills):
+    def _vector_store_analysis(self, resume_text, skills, cutoff_score, screening=False, scoring="llm",
+                               cancel_token=None):
         """Vector store based semantic skill analysis using FAISS"""
         try:
-            # Create or load FAISS vectorstore from resume
-            vectorstore = self._get_or_create_vectorstore(resume_text)
+            resume_key = content_hash(resume_text)
+            scored = self._cached_scores(resume_key, "vector", skills)
+            pending = [skill for skill in dict.fromkeys(skills) if skill not in scored]
             
-            skill_scores = {}
-            skill_reasonings = {}
-            missing_skills = []
-            total_score = 0
+            if pending and cancel_token is not None:
+                cancel_token.check("embedding")
             
-            # Create custom HTTP client with UTF-8 encoding for LLM
-            try:
-                http_client = httpx.Client(encoding='utf-8')
-                llm = ChatOpenAI(
-                    model="gpt-4o", 
-                    openai_api_key=self.api_key, 
-                    temperature=0,
-                    http_client=http_client
-                )
-            except:
-                llm = ChatOpenAI(model="gpt-4o", openai_api_key=self.api_key, temperature=0)
+            estimated = []
+            if pending and scoring in ("similarity", "hybrid"):
+                estimates = self._estimate_skill_scores(resume_text, resume_key, pending)
+                # Hybrid mode keeps confident estimates and leaves ambiguous ones to the LLM
+                estimated = [skill for skill, (score, _reasoning) in estimates.items()
+                             if scoring == "similarity" or not self.prescorer.is_ambiguous(score)]
+                scored.update((skill, estimates[skill]) for skill in estimated)
+                pending = [skill for skill in pending if skill not in scored]
+                print(f"Similarity estimates used for {len(estimated)} skill(s), {len(pending)} left for the LLM")
             
-            for skill in skills:
-                try:
-                    sanitized_skill = self._sanitize_text(skill)
-                    
-                    # Query vectorstore for skill relevance
-                    results = vectorstore.similarity_search(sanitized_skill, k=3)
-                    context = "\n".join([doc.page_content for doc in results]) if results else ""
-                    
-                    prompt = f"On a scale of 0 to 10, how well does this resume demonstrate proficiency in {sanitized_skill}?\n\nRelevant resume content:\n{context}"
-                    response = llm.invoke(prompt)
-                    response_text = response.content.strip()
-                    
-                    match = re.search(r'(\d{1,2})', response_text)
-                    score = int(match.group(1)) if match else 5
-                    score = min(score, 10)
-                    reasoning = response_text
-                    
-                except UnicodeEncodeError as ue:
-                    print(f"Encoding error in vector store analysis for {skill}: {str(ue)}")
-                    score = 5
-                    reasoning = "Analysis skipped due to encoding issues"
-                except Exception as e:
-                    print(f"Error analyzing {skill} with vector store: {str(e)}")
-                    score = 5
-                    reasoning = f"Error: {str(e)[:50]}"
-                
-                skill_scores[skill] = score
-                skill_reasonings[skill] = reasoning
-                total_score += score
-                
-                if score <= 5:
-                    missing_skills.append(skill)
+            is_decided = None
+            if screening:
+                # Stop as soon as the remaining skills can no longer change the outcome
+                is_decided = lambda new_scores: screening_decision(
+                    skills, {**scored, **new_scores}, cutoff_score) is not None
             
-            overall_score = int((total_score / (len(skills) * 10)) * 100) if skills else 0
-            selected = overall_score >= self.cutoff_score
-            self.resume_strengths = [skill for skill, score in skill_scores.items() if score >= 7]
+            if pending and not (is_decided and is_decided({})):
+                print(f"Scoring {len(pending)} new skill(s), {len(scored)} reused from cache")
+                scored.update(self._score_skills_with_vectorstore(resume_text, resume_key, pending, is_decided,
+                                                                  cancel_token))
             
-            return {
-                "overall_score": overall_score,
-                "skill_scores": skill_scores,
-                "skill_reasonings": skill_reasonings,
-                "selected": selected,
-                "reasoning": "Vector store based semantic analysis",
-                "missing_skills": missing_skills,
-                "strengths": self.resume_strengths,
-                "improvement_areas": missing_skills if not selected else []
-            }
+            reasoning = ("Embedding similarity estimate" if scoring == "similarity"
+                         else "Vector store based semantic analysis")
+            result = self._build_result(skills, scored, cutoff_score, reasoning, cancel_token, screening)
+            if estimated:
+                result = result.with_extras(estimated_skills=[skill for skill in skills if skill in estimated])
+            return result
+        except AnalysisCancelled:
+            raise
         except Exception as e:
             print(f"Error in vector store analysis: {str(e)}")
             raise
     
-    def _get_or_create_vectorstore(self, text):
-        """Get or create FAISS vectorstore from text - creates fresh index each time"""
-        import uuid
-        import shutil
-        
-        # Use a unique index name for each analysis to avoid stale data
-        unique_id = str(uuid.uuid4())[:8]
-        index_name = f'resume_index_{unique_id}'
-        index_path = os.path.join(self.faiss_index_dir, index_name)
-        
-        # Create new vectorstore for each analysis (fresh start)
-        print("Creating new FAISS vectorstore for fresh analysis...")
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-        chunks = text_splitter.split_text(text[:5000])  # Limit text for embedding
+    def _skill_vectors(self, skills):
+        """Embeddings of skills; ones not cached or in the vocabulary table are embedded in one request"""
+        missing = [skill for skill in dict.fromkeys(skills) if self.skill_vector_cache.get(skill) is None]
+        if missing:
+            for skill, vector in zip(missing, self.skill_embeddings.embed_documents(missing)):
+                self.skill_vector_cache.set(skill, vector)
+        return [self.skill_vector_cache.get(skill) for skill in skills]
+    
+    def _estimate_skill_scores(self, resume_text, resume_key, skills):
+        """0-10 similarity estimates for skills. Returns skill -> (score, reasoning)."""
+        estimates = self._cached_scores(resume_key, "estimate", skills)
+        missing = [skill for skill in skills if skill not in estimates]
+        if missing:
+            # Chunk vectors come from the resume's index, so chunks are embedded only once
+            vectorstore = self._get_or_create_vectorstore(resume_text, resume_key)
+            scores, similarities = self.prescorer.estimate(self._skill_vectors(missing), stored_vectors(vectorstore))
+            for skill, score, similarity in zip(missing, scores, similarities):
+                reasoning = f"Similarity estimate: {score}/10 (closest resume section similarity {similarity:.2f})"
+                estimates[skill] = (score, reasoning)
+                self.score_cache.set((resume_key, "estimate", skill), (score, reasoning))
+        return estimates
+    
+    def _build_result(self, skills, scored, cutoff_score, reasoning, cancel_token=None, screening=False):
+        """Assemble an AnalysisResult, marking it partial if some skills were not scored.
+
+        Only a screening result carries a decision reached from the score bounds;
+        any other partial result (e.g. one cut off by its deadline) leaves the
+        selection undetermined.
+        """
+        completed = [skill for skill in skills if skill in scored]
+        result = AnalysisResult(completed,
+                                [scored[skill][0] for skill in completed],
+                                [scored[skill][1] for skill in completed],
+                                cutoff_score,
+                                reasoning=reasoning,
+                                extras={"analyzed_at": time.time()})
+        unscored = [skill for skill in skills if skill not in scored]
+        if unscored:
+            lower, upper = score_bounds([scored[skill][0] for skill in completed], len(skills))
+            result = result.with_extras(
+                partial=True,
+                unscored_skills=unscored,
+                score_bounds=[lower, upper],
+                screening_decision=screening_decision(skills, scored, cutoff_score) if screening else None
+            )
+            if cancel_token is not None and cancel_token.cancelled:
+                result = result.with_extras(cancelled=True, cancel_reason=cancel_token.reason,
+                                            cancelled_skills=unscored, completed_skills=completed)
+        return result
+    
+    def _cached_scores(self, resume_key, method, skills):
+        """Previously computed (score, reasoning) pairs for skills of this resume"""
+        scored = {}
+        for skill in skills:
+            cached = self.score_cache.get((resume_key, method, skill))
+            if cached is not None:
+                scored[skill] = cached
+        return scored
+    
+    def _score_skills_with_vectorstore(self, resume_text, resume_key, skills, is_decided=None, cancel_token=None):
+        """Score skills concurrently with the LLM using retrieved resume context.
+
+        When is_decided(scores_so_far) returns True, or cancel_token fires, calls
+        that have not started are cancelled and the skills scored so far are returned.
+        """
+        # Create or load FAISS vectorstore from resume
+        vectorstore = self._get_or_create_vectorstore(resume_text, resume_key)
         
+        scored = {}
+        pool = ThreadPoolExecutor(max_workers=max(1, min(self.scoring_workers, len(skills))))
         try:
-            http_client = httpx.Client(encoding='utf-8')
-            embeddings = OpenAIEmbeddings(openai_api_key=self.api_key, http_client=http_client)
-        except:
-            embeddings = OpenAIEmbeddings(openai_api_key=self.api_key)
+            futures = {
+                pool.submit(self._score_skill_with_context, vectorstore, resume_key, skill, cancel_token): skill
+                for skill in skills
+            }
+            outstanding = set(futures)
+            while outstanding:
+                # Wake up regularly so cancellation is noticed while calls are in flight
+                done, outstanding = wait(outstanding, timeout=0.25, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        scored[futures[future]] = future.result()
+                    except AnalysisCancelled:
+                        pass
+                if is_decided is not None and is_decided(scored):
+                    print(f"Screening decided after {len(scored)} of {len(skills)} skill(s)")
+                    break
+                if cancel_token is not None:
+                    cancel_token.report("scoring", len(scored), len(skills))
+                    if cancel_token.cancelled:
+                        print(f"Scoring {cancel_token.reason} after {len(scored)} of {len(skills)} skill(s)")
+                        break
+        finally:
+            # Drop queued calls; results of calls already running still land in the score cache
+            pool.shutdown(wait=False, cancel_futures=True)
+        return scored
+    
+    def _score_skill_with_context(self, vectorstore, resume_key, skill, cancel_token=None):
+        """Score one skill against retrieved resume context. Returns (score, reasoning)."""
+        try:
+            sanitized_skill = self._sanitize_text(skill)
+            
+            # Query vectorstore for skill relevance, favouring skills and experience sections
+            query_vector = self._skill_vectors([sanitized_skill])[0]
+            hits = vectorstore.similarity_search_with_score_by_vector(query_vector, k=6)
+            results = rerank_by_section(hits, k=3)
+            context = "\n".join([doc.page_content for doc in results]) if results else ""
+            
+            prompt = f"On a scale of 0 to 10, how well does this resume demonstrate proficiency in {sanitized_skill}?\n\nRelevant resume content:\n{context}"
+            response_text = self.router.invoke(SKILL_SCORING, prompt,
+                                               validator=lambda text: parse_score(text) is not None,
+                                               cancel_token=cancel_token)
+            
+            score = parse_score(response_text)
+            score = 5 if score is None else score
+            reasoning = response_text
+            # Only successful scores are reused; failures are retried next time
+            self.score_cache.set((resume_key, "vector", skill), (score, reasoning))
+            
+        except AnalysisCancelled:
+            raise
+        except UnicodeEncodeError as ue:
+            print(f"Encoding error in vector store analysis for {skill}: {str(ue)}")
+            score = 5
+            reasoning = "Analysis skipped due to encoding issues"
+        except Exception as e:
+            print(f"Error analyzing {skill} with vector store: {str(e)}")
+            score = 5
+            reasoning = f"Error: {str(e)[:50]}"
         
-        vectorstore = FAISS.from_texts(chunks, embeddings)
+        return score, reasoning
+    
+    def _save_index(self, vectorstore):
+        """Save a fresh index under a unique name, keeping only the newest three"""
+        import glob
+        import shutil
         
-        # Save to disk with unique name
+        # Use a unique index name for each analysis to avoid stale data
+        index_path = os.path.join(self.faiss_index_dir, f'resume_index_{str(uuid.uuid4())[:8]}')
         try:
             vectorstore.save_local(index_path)
             print(f"Saved FAISS index to {index_path}")
@@ -445,7 +768,6 @@ class ResumeAnalysisAgent:
         
         # Clean up old indexes (keep only last 3)
         try:
-            import glob
             all_indexes = glob.glob(os.path.join(self.faiss_index_dir, 'resume_index_*'))
             if len(all_indexes) > 3:
                 all_indexes.sort(key=os.path.getctime)
@@ -457,48 +779,70 @@ class ResumeAnalysisAgent:
                         pass
         except Exception as e:
             print(f"Could not clean up old indexes: {e}")
+    
+    def _get_or_create_vectorstore(self, text, resume_key=None):
+        """Get the FAISS vectorstore for a resume, building a fresh index on first use"""
+        resume_key = resume_key or content_hash(text)
+        vectorstore = self.vectorstore_cache.get(resume_key)
+        if vectorstore is not None:
+            return vectorstore
+        
+        # Index built offline for this resume (python vector_index.py build)
+        prebuilt_path = self.index_factory.prebuilt_path(self.faiss_index_dir, resume_key)
+        if os.path.exists(prebuilt_path):
+            try:
+                vectorstore = self.index_factory.load(prebuilt_path, self.embeddings)
+                self.vectorstore_cache.set(resume_key, vectorstore)
+                return vectorstore
+            except Exception as e:
+                print(f"Could not load prebuilt index {prebuilt_path}: {e}")
+        
+        print(f"Creating new {self.index_factory.index_type} FAISS vectorstore for fresh analysis...")
+        # One chunk per resume section or role, tagged with its section; embedded in batches as chunks complete
+        vectorstore, _pages = build_index([text], self.embeddings, self.index_factory, self.embed_batch_size)
+        if vectorstore is None:
+            chunks, metadatas = resume_chunks(text)
+            vectorstore = self.index_factory.from_texts(chunks, self.embeddings, metadatas)
+        self._save_index(vectorstore)
         
+        self.vectorstore_cache.set(resume_key, vectorstore)
         return vectorstore
     
-    def _direct_skill_analysis(self, resume_text, skills):
+    def _direct_skill_analysis(self, resume_text, skills, cutoff_score, screening=False, cancel_token=None):
         """Fallback method for direct skill analysis without vector store"""
         try:
-            skill_scores = {}
-            skill_reasonings = {}
-            missing_skills = []
-            total_score = 0
+            resume_key = content_hash(resume_text)
+            scored = self._cached_scores(resume_key, "direct", skills)
 
-            for skill in skills:
+            for skill in dict.fromkeys(skills):
+                if skill in scored:
+                    continue
+                if screening and screening_decision(skills, scored, cutoff_score) is not None:
+                    break
+                if cancel_token is not None:
+                    cancel_token.report("scoring", len(scored), len(skills))
+                    if cancel_token.cancelled:
+                        break
                 score = 0
                 reasoning = ""
                 try:
-                    # Create custom HTTP client with UTF-8 encoding
-                    try:
-                        http_client = httpx.Client(encoding='utf-8')
-                        llm = ChatOpenAI(
-                            model="gpt-4o", 
-                            openai_api_key=self.api_key, 
-                            temperature=0,
-                            http_client=http_client
-                        )
-                    except:
-                        # Fallback without custom HTTP client
-                        llm = ChatOpenAI(model="gpt-4o", openai_api_key=self.api_key, temperature=0)
-                    
                     # Sanitize skill name
-                    skill = self._sanitize_text(skill)
+                    sanitized_skill = self._sanitize_text(skill)
                     # Sanitize resume text for this analysis
                     sanitized_resume = self._sanitize_text(resume_text[:2000])
                     
-                    question = f"On a scale of 0 to 10, how well does this resume demonstrate proficiency in {skill}?\n\nResume:\n{sanitized_resume}"
-                    response = llm.invoke(question)
-                    response_text = response.content.strip()
+                    question = f"On a scale of 0 to 10, how well does this resume demonstrate proficiency in {sanitized_skill}?\n\nResume:\n{sanitized_resume}"
+                    response_text = self.router.invoke(DIRECT_SCORING, question,
+                                                       validator=lambda text: parse_score(text) is not None,
+                                                       cancel_token=cancel_token)
                     
-                    match = re.search(r'(\d{1,2})', response_text)
-                    score = int(match.group(1)) if match else 5
-                    score = min(score, 10)
+                    score = parse_score(response_text)
+                    score = 5 if score is None else score
                     reasoning = response_text
+                    self.score_cache.set((resume_key, "direct", skill), (score, reasoning))
                     
+                except AnalysisCancelled:
+                    break
                 except UnicodeEncodeError as ue:
                     print(f"Encoding error in direct analysis for {skill}: {str(ue)}")
                     # Use default score of 5 for encoding errors
@@ -510,28 +854,10 @@ class ResumeAnalysisAgent:
                     score = 5
                     reasoning = f"Analysis skipped: {str(e)[:50]}"
                 
-                skill_scores[skill] = score
-                skill_reasonings[skill] = reasoning
-                total_score += score
-                
-                if score <= 5:
-                    missing_skills.append(skill)
-
-            overall_score = int((total_score / (len(skills) * 10)) * 100) if skills else 0
-            selected = overall_score >= self.cutoff_score
-
-            self.resume_strengths = [skill for skill, score in skill_scores.items() if score >= 7]
-
-            return {
-                "overall_score": overall_score,
-                "skill_scores": skill_scores,
-                "skill_reasonings": skill_reasonings,
-                "selected": selected,
-                "reasoning": "Direct analysis without vector store",
-                "missing_skills": missing_skills,
-                "strengths": self.resume_strengths,
-                "improvement_areas": missing_skills if not selected else []
-            }
+                scored[skill] = (score, reasoning)
+
+            return self._build_result(skills, scored, cutoff_score, DIRECT_ANALYSIS_REASONING,
+                                      cancel_token, screening)
         except Exception as e:
             print(f"Error in direct skill analysis: {str(e)}")
             import traceback
@@ -539,50 +865,356 @@ class ResumeAnalysisAgent:
             return None
 
 
-    def analyze_resume(self, resume_file, role_requirements=None, custom_jd=None):
-        '''Main method to analyze resume against job description or role requirements.'''
+    def model_fingerprint(self, scoring="llm"):
+        """Everything about the model setup that can change an analysis result"""
+        fingerprint = {
+            "tiers": self.router.tiers,
+            "routes": self.router.routes,
+            "embeddings": getattr(self.embeddings, "model", None),
+            "index": self.index_factory.index_type,
+        }
+        if scoring != "llm":
+            fingerprint["prescore"] = [self.prescorer.low, self.prescorer.high, self.prescorer.top_k,
+                                       list(self.prescorer.ambiguous_band)]
+        return json.dumps(fingerprint, sort_keys=True)
+
+    def _analysis_memo(self, resume_doc, jd_doc, role_requirements, cutoff_score, mode, scoring, weaknesses):
+        """Analysis store key and history fields for one analysis request"""
+        if jd_doc is not None:
+            requirements_hash = jd_doc.content_hash
+            posting = jd_doc.name or "Job description"
+        else:
+            skills = [str(skill) for skill in role_requirements or []]
+            requirements_hash = content_hash(json.dumps(skills))
+            posting = "Skills: " + ", ".join(skills)
+        model = self.model_fingerprint(scoring)
+        resume_hash = resume_doc.content_hash
+        analysis_key = content_hash(json.dumps(
+            [resume_hash, requirements_hash, model, PROMPT_VERSION, cutoff_score, mode, scoring, weaknesses]
+        ))
+        return {
+            "analysis_key": analysis_key,
+            "resume_hash": resume_hash,
+            "requirements_hash": requirements_hash,
+            "model": model,
+            "prompt_version": PROMPT_VERSION,
+            "mode": mode if scoring == "llm" else f"{mode}/{scoring}",
+            "candidate": resume_doc.name or "Resume",
+            "posting": posting[:500],
+        }
+
+    def _near_duplicate_result(self, resume_text, document_hash, memo, cutoff_score, weaknesses):
+        """Saved analysis of a near-identical resume against the same requirements, or None.
+
+        A result saved at another cutoff is re-derived for this one (unless it is
+        a partial screening result). The reused result carries a "near_duplicate"
+        audit entry naming the original resume and the estimated similarity, and
+        is saved under this request's key.
+        """
+        try:
+            matches = self.near_duplicates.query(resume_text, exclude=document_hash)
+            for match in matches:
+                for analysis_key, saved_cutoff in self.analysis_store.lookup(
+                        match["resume_hash"], memo["requirements_hash"], memo["model"], memo["prompt_version"],
+                        memo["mode"], cutoff_score):
+                    saved = self.analysis_store.get(analysis_key)
+                    if saved is None or (weaknesses == "eager" and saved.get("weaknesses_deferred")):
+                        continue
+                    if saved_cutoff != cutoff_score:
+                        if saved.get("partial"):
+                            continue
+                        saved = saved.with_cutoff(cutoff_score)
+                    result = saved.with_extras(near_duplicate={
+                        "of": match["source"],
+                        "resume_hash": match["resume_hash"],
+                        "similarity": round(match["similarity"], 3),
+                        "analysis_key": analysis_key,
+                    })
+                    if result.get("weaknesses_deferred"):
+                        # Suggestions still to come are written for this resume, not the original
+                        self.resume_text_cache.set(document_hash, resume_text)
+                        result = result.with_extras(resume_hash=document_hash)
+                    result.analysis_id = uuid.uuid4().hex
+                    print(f"Reusing analysis of {match['source']} for near-duplicate {memo['candidate']} "
+                          f"({match['similarity']:.0%} similar)")
+                    self.analysis_store.put(result=result, **memo)
+                    self.near_duplicates.add(document_hash, resume_text, memo["candidate"])
+                    if result.get("weaknesses_deferred"):
+                        self.prefetch_weaknesses(result)
+                    return result
+        except Exception as e:
+            print(f"Could not check for near-duplicate resumes: {str(e)}")
+        return None
+
+    def analyze_resume(self, resume_file, role_requirements=None, custom_jd=None, cutoff_score=None, mode="full",
+                       scoring="llm", cancel_token=None, weaknesses="lazy"):
+        '''Main method to analyze resume against job description or role requirements.
+
+        mode="screen" only decides selected / not selected: scoring stops early
+        and weakness analysis is skipped. scoring picks "llm", "similarity" (no
+        LLM scoring calls, no weakness analysis) or "hybrid". Returns an
+        AnalysisResult; nothing about the analysis is kept on the agent.
+
+        With weaknesses="lazy", the result is returned right after scoring and
+        marked "weaknesses_deferred". Suggestions are then generated per skill
+        with weakness_for_skill(); the lowest-scoring skills are prefetched in
+        the background. weaknesses="eager" generates them all before returning.
+
+        With a near-duplicate index, a resume nearly identical to one already
+        analyzed against the same requirements reuses that analysis (see
+        _near_duplicate_result).
+
+        cancel_token (a CancellationToken) bounds the analysis: if it fires before
+        scoring, AnalysisCancelled is raised; if it fires later, the result is
+        partial and its "cancelled_skills" / "cancelled_weaknesses" say what was
+        not done.
+        '''
+        screening = mode == "screen"
+        cutoff_score = self.cutoff_score if cutoff_score is None else cutoff_score
         try:
-            self.resume_text = self.extract_text_from_file(resume_file)
-            self.resume_text = self._ensure_utf8(self.resume_text)
+            # The documents (and their views of the upload buffers) live only for this analysis
+            with self._open_document(resume_file) as resume_doc, \
+                    (self._open_document(custom_jd) if custom_jd else nullcontext()) as jd_doc:
+                memo = None
+                if self.analysis_store is not None:
+                    # Identical inputs and configuration: return the saved analysis, no extraction or API calls
+                    memo = self._analysis_memo(resume_doc, jd_doc, role_requirements, cutoff_score, mode, scoring,
+                                               weaknesses)
+                    try:
+                        saved = self.analysis_store.get(memo["analysis_key"])
+                    except Exception as e:
+                        print(f"Could not read from analysis store: {str(e)}")
+                        saved = None
+                    if saved is not None:
+                        print(f"Returning saved analysis for {memo['candidate']}")
+                        return saved
+                if cancel_token is not None:
+                    cancel_token.check("extracting")
+                # Streaming parse + embed; the near-duplicate check below reads the text this produces
+                resume_text = self.extract_and_index_resume(resume_doc, cancel_token)
+                document_hash = resume_doc.content_hash
+                jd_text = self.extract_text_from_file(jd_doc) if jd_doc is not None else None
+            resume_text = self._ensure_utf8(resume_text)
             
-            if not self.resume_text:
+            if not resume_text:
                 print("Failed to extract text from resume.")
                 return None
-            
-            # Write to temp file with proper encoding
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.txt', mode='w', encoding='utf-8', errors='replace') as tmp:
-                tmp.write(self.resume_text)
-                self.resume_file_path = tmp.name
-
-            if custom_jd:
-                self.jd_text = self.extract_text_from_file(custom_jd)
-                self.jd_text = self._ensure_utf8(self.jd_text)
-                self.extracted_skills = self.extract_skills_from_jd(self.jd_text)
-                self.analysis_results = self.semantic_skill_analysis(self.resume_text, self.extracted_skills)
+
+            if self.near_duplicates is not None and memo is not None:
+                reused = self._near_duplicate_result(resume_text, document_hash, memo, cutoff_score, weaknesses)
+                if reused is not None:
+                    return reused
+
+            skills = None
+            if jd_text is not None:
+                jd_text = self._ensure_utf8(jd_text)
+                skills = self.extract_skills_from_jd(jd_text, cancel_token)
             elif role_requirements:
-                self.extracted_skills = role_requirements
-                self.analysis_results = self.semantic_skill_analysis(self.resume_text, role_requirements)
+                skills = role_requirements
+
+            if not skills:
+                return None
+
+            # Score each canonical skill once; original wording maps back through skill_aliases
+            canonical_skills, skill_map = self.canonicalize_skills(skills)
+            analysis_results = self.semantic_skill_analysis(resume_text, canonical_skills, cutoff_score, screening,
+                                                            scoring, cancel_token)
+
+            if not analysis_results:
+                return None
+
+            skill_aliases = {original: canonical for original, canonical in skill_map.items() if original != canonical}
+            if skill_aliases:
+                analysis_results = analysis_results.with_extras(skill_aliases=skill_aliases)
 
-            if self.analysis_results and "missing_skills" in self.analysis_results and self.analysis_results["missing_skills"]:
-                self.analyze_resume_weaknesses()
-                self.analysis_results["resume_weaknesses"] = self.resume_weaknesses
+            wants_weaknesses = analysis_results.missing_skills and not screening and scoring != "similarity"
+            deferred = wants_weaknesses and weaknesses == "lazy" and not analysis_results.get("cancelled")
+            if deferred:
+                # Suggestions are generated on demand; the text is kept to generate them from
+                self.resume_text_cache.set(document_hash, resume_text)
+                analysis_results = analysis_results.with_extras(weaknesses_deferred=True, resume_hash=document_hash)
+                wants_weaknesses = False
+            elif wants_weaknesses and not analysis_results.get("cancelled"):
+                analysis_results = analysis_results.with_weaknesses(
+                    self.analyze_resume_weaknesses(resume_text, analysis_results, cancel_token))
 
-            return self.analysis_results
+            if wants_weaknesses and cancel_token is not None and cancel_token.cancelled:
+                covered = {weakness["skill"] for weakness in analysis_results.weaknesses}
+                analysis_results = analysis_results.with_extras(
+                    cancelled=True,
+                    cancel_reason=cancel_token.reason,
+                    cancelled_weaknesses=[skill for skill in analysis_results.missing_skills if skill not in covered]
+                )
+            # Stable identifier used by the UI to memoize rendered views and exports
+            analysis_results.analysis_id = uuid.uuid4().hex
+
+            # Saved for identical future requests from any session
+            if memo is not None and not analysis_results.get("cancelled"):
+                try:
+                    self.analysis_store.put(result=analysis_results, **memo)
+                    if self.near_duplicates is not None:
+                        self.near_duplicates.add(document_hash, resume_text, memo["candidate"])
+                except Exception as e:
+                    print(f"Could not write to analysis store: {str(e)}")
+
+            if deferred:
+                self.prefetch_weaknesses(analysis_results)
+            return analysis_results
+        except AnalysisCancelled:
+            raise
         except Exception as e:
             error_msg = f"Error in analyze_resume: {str(e)}"
             print(error_msg)
             raise Exception(error_msg) from e
-            
-        
-                    
 
+    def analyze_resume_multi(self, resume_file, job_descriptions, cutoff_score=None, mode="full", scoring="llm",
+                             cancel_token=None, weaknesses="lazy"):
+        '''Analyze one resume against several job descriptions in a single pass.
 
+        The resume is extracted and indexed once. The skills of all postings are
+        pooled and canonicalized together, each distinct skill is scored once,
+        and every posting's overall score, selection and improvement areas are
+        derived from the shared scores. Each posting's result names its skills as
+        a single analysis of that posting would. Improvement suggestions are
+        shared too: a skill missing for several postings is written up once.
 
-                    
+        Returns a list of AnalysisResults, one per posting that listed any
+        skills, best fit first. Each carries "posting" (the job description's
+        name) and "fit_rank". Postings whose analysis is already saved are
+        answered from the analysis store. mode="screen" skips weakness analysis
+        but scores every skill, as a skill may decide one posting and not another.
+        '''
+        screening = mode == "screen"
+        cutoff_score = self.cutoff_score if cutoff_score is None else cutoff_score
+        try:
+            results = []
+            postings = []  # (name, JD text, analysis store memo)
+            with self._open_document(resume_file) as resume_doc:
+                for jd_file in job_descriptions:
+                    with self._open_document(jd_file) as jd_doc:
+                        name = jd_doc.name or "Job description"
+                        memo = None
+                        if self.analysis_store is not None:
+                            memo = self._analysis_memo(resume_doc, jd_doc, None, cutoff_score, mode, scoring,
+                                                       weaknesses)
+                            try:
+                                saved = self.analysis_store.get(memo["analysis_key"])
+                            except Exception as e:
+                                print(f"Could not read from analysis store: {str(e)}")
+                                saved = None
+                            if saved is not None:
+                                print(f"Returning saved analysis of {memo['candidate']} for {name}")
+                                results.append(saved.with_extras(posting=name))
+                                continue
+                        jd_text = self._ensure_utf8(self.extract_text_from_file(jd_doc))
+                        if jd_text:
+                            postings.append((name, jd_text, memo))
+                        else:
+                            print(f"Failed to extract text from {name}.")
+                if not postings:
+                    return self._rank_postings(results)
+                if cancel_token is not None:
+                    cancel_token.check("extracting")
+                # Extracted and indexed once for all postings
+                resume_text = self.extract_and_index_resume(resume_doc, cancel_token)
+                document_hash = resume_doc.content_hash
+            resume_text = self._ensure_utf8(resume_text)
 
-                
-                  
+            if not resume_text:
+                print("Failed to extract text from resume.")
+                return self._rank_postings(results)
+
+            pool = ThreadPoolExecutor(max_workers=max(1, min(self.scoring_workers, len(postings))))
+            try:
+                posting_skills = list(pool.map(lambda posting: self.extract_skills_from_jd(posting[1], cancel_token),
+                                               postings))
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+            # Every distinct skill across the postings is scored once
+            pooled = list(dict.fromkeys(skill for skills in posting_skills for skill in skills))
+            if not pooled:
+                return self._rank_postings(results)
+            canonical_skills, skill_map = self.canonicalize_skills(pooled)
+            combined = self.semantic_skill_analysis(resume_text, canonical_skills, cutoff_score, False, scoring,
+                                                    cancel_token)
+            if not combined:
+                return self._rank_postings(results)
+            print(f"Scored {len(canonical_skills)} distinct skill(s) for {len(postings)} posting(s)")
+            scored = dict(zip(combined.skills, zip(combined.scores, combined.reasonings)))
+            estimated = set(combined.get("estimated_skills", []))
+
+            wants_weaknesses = combined.missing_skills and not screening and scoring != "similarity"
+            deferred = wants_weaknesses and weaknesses == "lazy" and not combined.get("cancelled")
+            shared_weaknesses = {}
+            if deferred:
+                self.resume_text_cache.set(document_hash, resume_text)
+            elif wants_weaknesses and not combined.get("cancelled"):
+                shared_weaknesses = {weakness["skill"]: weakness for weakness in
+                                     self.analyze_resume_weaknesses(resume_text, combined, cancel_token)}
+
+            for (name, _jd_text, memo), skills in zip(postings, posting_skills):
+                if not skills:
+                    print(f"No skills found in {name}.")
+                    continue
+                # Skills are named as a single analysis of this posting names them, since the result is
+                # saved under that analysis's key; their scores come from the pooled skill they belong to
+                posting_canonical, posting_map = self.canonicalize_skills(skills)
+                pooled_skill = {}
+                for skill in skills:
+                    if skill in posting_map:
+                        pooled_skill.setdefault(posting_map[skill], skill_map.get(skill, skill))
+                posting_scored = {skill: scored[pooled] for skill, pooled in pooled_skill.items() if pooled in scored}
+                result = self._build_result(posting_canonical, posting_scored, cutoff_score, combined.reasoning,
+                                            cancel_token)
+                result = result.with_extras(posting=name)
+                skill_aliases = {original: canonical for original, canonical in posting_map.items()
+                                 if original != canonical}
+                if skill_aliases:
+                    result = result.with_extras(skill_aliases=skill_aliases)
+                posting_estimated = [skill for skill in posting_canonical if pooled_skill.get(skill) in estimated]
+                if posting_estimated:
+                    result = result.with_extras(estimated_skills=posting_estimated)
+                if deferred and result.missing_skills:
+                    result = result.with_extras(weaknesses_deferred=True, resume_hash=document_hash)
+                elif shared_weaknesses:
+                    result = result.with_weaknesses([dict(shared_weaknesses[pooled_skill[skill]], skill=skill)
+                                                     for skill in result.missing_skills
+                                                     if pooled_skill.get(skill) in shared_weaknesses])
+                if (wants_weaknesses and not deferred and cancel_token is not None and cancel_token.cancelled
+                        and not result.get("cancelled")):
+                    result = result.with_extras(
+                        cancelled=True,
+                        cancel_reason=cancel_token.reason,
+                        cancelled_weaknesses=[skill for skill in result.missing_skills
+                                              if pooled_skill.get(skill) not in shared_weaknesses]
+                    )
+                result.analysis_id = uuid.uuid4().hex
 
+                # Saved like a single-posting analysis, so repeating either one is instant
+                if memo is not None and not result.get("cancelled"):
+                    try:
+                        self.analysis_store.put(result=result, **memo)
+                        if self.near_duplicates is not None:
+                            self.near_duplicates.add(document_hash, resume_text, memo["candidate"])
+                    except Exception as e:
+                        print(f"Could not write to analysis store: {str(e)}")
+                results.append(result)
 
+            ranked = self._rank_postings(results)
+            if deferred and ranked:
+                # The best fit is the posting most likely to be opened first
+                self.prefetch_weaknesses(ranked[0])
+            return ranked
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            error_msg = f"Error in analyze_resume_multi: {str(e)}"
+            print(error_msg)
+            raise Exception(error_msg) from e
 
-                
\ No newline at end of file
+    @staticmethod
+    def _rank_postings(results):
+        """Per-posting results ordered best fit first (overall score, then selection), tagged with fit_rank"""
+        ranked = sorted(results, key=lambda result: (result.overall_score, bool(result.selected)), reverse=True)
+        return [result.with_extras(fit_rank=rank) for rank, result in enumerate(ranked, 1)]
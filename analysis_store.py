@@ -0,0 +1,164 @@
+"""
+Persistent store of completed analyses.
+
+Each result is saved under a key built from everything that determines it:
+- resume content hash
+- job description or skill-list hash
+- model configuration
+- prompt version
+- cutoff and mode
+
+Re-running an analysis with identical inputs, even days later or in another
+session, returns the saved result without any extraction, embedding or LLM
+work. Saved analyses can also be browsed by candidate (resume file name) or
+posting (job description file name or skill list). Retention is size-based:
+once stored results exceed max_bytes, the least recently opened ones are
+deleted.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+
+from results import AnalysisResult
+
+
+class AnalysisStore:
+    """SQLite-backed map of analysis key -> AnalysisResult with history queries"""
+
+    def __init__(self, path="analysis_store/analyses.db", max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS analyses (
+                    analysis_key TEXT PRIMARY KEY,
+                    resume_hash TEXT NOT NULL,
+                    requirements_hash TEXT NOT NULL,
+                    model TEXT,
+                    prompt_version TEXT,
+                    cutoff_score INTEGER,
+                    mode TEXT,
+                    candidate TEXT,
+                    posting TEXT,
+                    overall_score INTEGER,
+                    selected INTEGER,
+                    payload BLOB NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS analyses_candidate ON analyses (candidate)")
+            conn.execute("CREATE INDEX IF NOT EXISTS analyses_posting ON analyses (posting)")
+            conn.execute("CREATE INDEX IF NOT EXISTS analyses_accessed ON analyses (last_accessed)")
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps the store safe to use from
+        # Streamlit's script threads and from several processes at once
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, analysis_key):
+        """Saved result for an analysis key, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload FROM analyses WHERE analysis_key = ?", (analysis_key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE analyses SET last_accessed = ? WHERE analysis_key = ?", (time.time(), analysis_key))
+        return AnalysisResult.from_state(json.loads(zlib.decompress(row[0]).decode("utf-8")))
+
+    def put(self, analysis_key, result, resume_hash, requirements_hash, model=None, prompt_version=None,
+            mode=None, candidate=None, posting=None):
+        """Save a result, replacing any earlier one under the same key, then apply retention"""
+        payload = zlib.compress(json.dumps(result.to_state()).encode("utf-8"), 6)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (analysis_key, resume_hash, requirements_hash, model, "
+                "prompt_version, cutoff_score, mode, candidate, posting, overall_score, selected, payload, "
+                "size_bytes, created_at, last_accessed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (analysis_key, resume_hash, requirements_hash, model, prompt_version, result.cutoff_score, mode,
+                 candidate, posting, result.overall_score,
+                 None if result.selected is None else int(result.selected), payload, len(payload),
+                 now, now),
+            )
+        self._enforce_retention()
+
+    def lookup(self, resume_hash, requirements_hash, model, prompt_version, mode, cutoff_score=None):
+        """Keys and cutoffs of saved analyses of one resume against one set of requirements.
+
+        Analyses at cutoff_score come first, then the newest.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT analysis_key, cutoff_score FROM analyses WHERE resume_hash = ? AND requirements_hash = ? "
+                "AND model = ? AND prompt_version = ? AND mode = ? "
+                "ORDER BY cutoff_score = ? DESC, created_at DESC",
+                (resume_hash, requirements_hash, model, prompt_version, mode, cutoff_score),
+            ).fetchall()
+        return [(analysis_key, cutoff) for analysis_key, cutoff in rows]
+
+    def iter_results(self):
+        """(resume_hash, AnalysisResult) of every saved analysis, newest first"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT resume_hash, payload FROM analyses ORDER BY created_at DESC").fetchall()
+        for resume_hash, payload in rows:
+            yield resume_hash, AnalysisResult.from_state(json.loads(zlib.decompress(payload).decode("utf-8")))
+
+    def _enforce_retention(self):
+        """Delete least recently opened analyses until the store fits in max_bytes"""
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM analyses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            doomed = []
+            for analysis_key, size in conn.execute(
+                    "SELECT analysis_key, size_bytes FROM analyses ORDER BY last_accessed"):
+                if total <= self.max_bytes:
+                    break
+                doomed.append((analysis_key,))
+                total -= size
+            conn.executemany("DELETE FROM analyses WHERE analysis_key = ?", doomed)
+
+    def search(self, candidate=None, posting=None, limit=50):
+        """Summaries of saved analyses, newest first, filtered by candidate and/or posting substring"""
+        clauses, params = [], []
+        if candidate:
+            clauses.append("candidate LIKE ?")
+            params.append(f"%{candidate}%")
+        if posting:
+            clauses.append("posting LIKE ?")
+            params.append(f"%{posting}%")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT analysis_key, candidate, posting, overall_score, selected, cutoff_score, mode, created_at "
+                f"FROM analyses {where} ORDER BY created_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [
+            {"analysis_key": key, "candidate": candidate, "posting": posting, "overall_score": score,
+             "selected": None if selected is None else bool(selected), "cutoff_score": cutoff, "mode": mode, "created_at": created_at}
+            for key, candidate, posting, score, selected, cutoff, mode, created_at in rows
+        ]
+
+    def stats(self):
+        """Analysis count and stored size"""
+        with self._connect() as conn:
+            count, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM analyses"
+            ).fetchone()
+        return {"analyses": count, "stored_bytes": size, "max_bytes": self.max_bytes}
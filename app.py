@@ -1,8 +1,21 @@
 import streamlit as st
 from agent import ResumeAnalysisAgent
 from ui import ResumeAnalysisUI
+from session_store import SessionStore, process_memory
+from text_store import ExtractedTextStore
+from analysis_store import AnalysisStore
+from near_duplicates import NearDuplicateIndex
+from skill_vocab import SkillVocabulary
+from vector_index import IndexFactory
+from prescore import SimilarityScorer
+from routing import ModelRouter
+from hedging import Hedger
+from profiling import AnalysisProfiler
+from cancellation import AnalysisCancelled, CancellationToken
+from contextlib import nullcontext
 import os
 import sys
+import uuid
 import config  # Import configuration
 
 # Ensure UTF-8 encoding for Streamlit
@@ -18,22 +31,69 @@ if sys.stderr.encoding != 'utf-8':
         pass
 
 
+def build_agent(api_key):
+    """Agent configured from config.py (also used by screening workers outside Streamlit)"""
+    text_store = ExtractedTextStore(config.TEXT_STORE_PATH) if config.TEXT_STORE_PATH else None
+    analysis_store = (AnalysisStore(config.ANALYSIS_STORE_PATH, max_bytes=config.ANALYSIS_STORE_MAX_MB * 1024 * 1024)
+                      if config.ANALYSIS_STORE_PATH else None)
+    return ResumeAnalysisAgent(
+        api_key=api_key,
+        router=ModelRouter(
+            api_key, tiers=config.MODEL_TIERS, routes=config.MODEL_ROUTES,
+            hedger=Hedger(percentile=config.LLM_HEDGING_PERCENTILE, min_samples=config.LLM_HEDGING_MIN_SAMPLES,
+                          max_ratio=config.LLM_HEDGING_MAX_RATIO, max_in_flight=config.LLM_HEDGING_MAX_IN_FLIGHT)
+            if config.LLM_HEDGING else None
+        ),
+        skill_similarity_threshold=config.SKILL_SIMILARITY_THRESHOLD,
+        text_store=text_store,
+        scoring_workers=config.SKILL_SCORING_WORKERS,
+        embed_batch_size=config.EMBED_BATCH_SIZE,
+        weakness_prefetch=config.WEAKNESS_PREFETCH,
+        near_duplicates=(NearDuplicateIndex(config.NEAR_DUPLICATE_INDEX_PATH, threshold=config.NEAR_DUPLICATE_THRESHOLD)
+                         if config.NEAR_DUPLICATE_INDEX_PATH and analysis_store is not None else None),
+        index_factory=IndexFactory(config.FAISS_INDEX_TYPE, codec_path=config.FAISS_CODEC_PATH,
+                                   refine_factor=config.FAISS_REFINE_FACTOR),
+        prescorer=SimilarityScorer(config.PRESCORE_SIMILARITY_LOW, config.PRESCORE_SIMILARITY_HIGH,
+                                   top_k=config.PRESCORE_TOP_K),
+        analysis_store=analysis_store,
+        skill_vocabulary=SkillVocabulary.load(config.SKILL_VOCAB_DIR) if config.SKILL_VOCAB_DIR else None
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_agent(api_key):
+    """One stateless agent (and one set of API clients) shared by all sessions"""
+    return build_agent(api_key)
+
+
+@st.cache_resource(show_spinner=False)
+def get_session_store():
+    """Process-wide store for per-session analysis results"""
+    return SessionStore(idle_timeout=config.SESSION_IDLE_TIMEOUT_SECONDS)
+
+
+@st.cache_resource(show_spinner=False)
+def get_profiler():
+    """Process-wide profiler for opt-in per-analysis profiles"""
+    return AnalysisProfiler(config.PROFILE_DIR, keep=config.PROFILE_KEEP)
+
+
 class ResumeAnalysisApp:
     """Main application class that orchestrates UI and Agent logic"""
     
     def __init__(self):
         """Initialize the application"""
         self.agent = None
-        self.analysis_results = None
+        self.session_store = get_session_store()
         self.initialize_session_state()
+        self.session_id = st.session_state.session_id
+        self.session_store.touch(self.session_id)
     
     def initialize_session_state(self):
         """Initialize Streamlit session state variables"""
-        if "agent" not in st.session_state:
-            st.session_state.agent = None
-        
-        if "analysis_results" not in st.session_state:
-            st.session_state.analysis_results = None
+        # Only small values live in session_state; results are kept in the session store
+        if "session_id" not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
         
         if "analysis_complete" not in st.session_state:
             st.session_state.analysis_complete = False
@@ -47,8 +107,8 @@ class ResumeAnalysisApp:
         if "jd_file_key" not in st.session_state:
             st.session_state.jd_file_key = 0
 
-    def initialize_agent(self, cutoff_score=75):
-        """Initialize the Resume Analysis Agent with API key from environment"""
+    def initialize_agent(self):
+        """Get the shared Resume Analysis Agent using the API key from environment"""
         try:
             # Get API key from environment variable
             api_key = os.getenv('OPENAI_API_KEY')
@@ -58,23 +118,21 @@ class ResumeAnalysisApp:
                     "You can also add it directly in the code by modifying config.py"
                 )
             
-            agent = ResumeAnalysisAgent(api_key=api_key, cutoff_score=cutoff_score)
-            st.session_state.agent = agent
-            self.agent = agent
+            self.agent = get_shared_agent(api_key)
             return True
         except Exception as e:
             st.session_state.error_message = f"Failed to initialize agent: {str(e)}"
             return False
 
-    def validate_inputs(self, resume_file, jd_file, role_requirements_text):
+    def validate_inputs(self, resume_file, jd_files, role_requirements_text):
         """Validate user inputs"""
         if not resume_file:
             return False, "Please upload a resume file"
         
-        if not jd_file and not role_requirements_text:
+        if not jd_files and not role_requirements_text:
             return False, "Please either upload a job description or specify role requirements"
         
-        if jd_file:
+        for jd_file in jd_files:
             # Validate file type
             if not jd_file.name.lower().endswith(('.pdf', '.txt')):
                 return False, "Job description must be PDF or TXT format"
@@ -90,29 +148,76 @@ class ResumeAnalysisApp:
         skills = [s for s in skills if s]  # Remove empty strings
         return skills
 
-    def analyze_resume(self, resume_file, jd_file=None, role_requirements=None):
-        """Execute resume analysis"""
+    def get_analysis_results(self):
+        """Results of this session's last analysis, if still held in memory"""
+        return self.session_store.get(self.session_id, "analysis_results")
+
+    def analyze_resume(self, resume_file, jd_file=None, role_requirements=None, cutoff_score=75, mode="full",
+                       scoring="llm", profile=False, jd_files=None):
+        """Execute resume analysis, optionally under the CPU/memory profiler.
+
+        With several jd_files, the resume is analyzed once against all of them;
+        the ranked per-posting results are kept as "posting_results" and the
+        best fit is shown first.
+
+        The analysis is bounded by ANALYSIS_TIMEOUT_SECONDS. Its progress updates
+        the page, so when Streamlit stops this run (another button was clicked or
+        the page was left) the analysis' outstanding LLM calls are cancelled.
+        """
+        progress = st.empty()
+        cancel_token = CancellationToken(
+            timeout=config.ANALYSIS_TIMEOUT_SECONDS,
+            on_progress=lambda stage, done, total: ResumeAnalysisUI.render_progress(progress, stage, done, total)
+        )
+        finished = False
         try:
-            # Get agent from session state if not available in self
-            agent = self.agent if self.agent else st.session_state.agent
-            if not agent:
+            if not self.agent:
                 return False, "Agent not initialized. Please enter your OpenAI API Key."
             
-            # Create a custom file object if we have a jd_file
-            analysis_results = agent.analyze_resume(
-                resume_file=resume_file,
-                custom_jd=jd_file,
-                role_requirements=role_requirements
-            )
+            profiling = get_profiler().profile(getattr(resume_file, "name", "resume")) if profile else nullcontext()
+            with profiling:
+                posting_results = None
+                if jd_files and len(jd_files) > 1:
+                    posting_results = self.agent.analyze_resume_multi(
+                        resume_file=resume_file,
+                        job_descriptions=jd_files,
+                        cutoff_score=cutoff_score,
+                        mode=mode,
+                        scoring=scoring,
+                        cancel_token=cancel_token
+                    )
+                    analysis_results = posting_results[0] if posting_results else None
+                else:
+                    # Create a custom file object if we have a jd_file
+                    analysis_results = self.agent.analyze_resume(
+                        resume_file=resume_file,
+                        custom_jd=jd_file,
+                        role_requirements=role_requirements,
+                        cutoff_score=cutoff_score,
+                        mode=mode,
+                        scoring=scoring,
+                        cancel_token=cancel_token
+                    )
+            finished = True
             
             if analysis_results:
-                st.session_state.analysis_results = analysis_results
+                if posting_results:
+                    self.session_store.set(self.session_id, "posting_results", posting_results)
+                else:
+                    self.session_store.pop(self.session_id, "posting_results")
+                self.session_store.set(self.session_id, "analysis_results", analysis_results)
                 st.session_state.analysis_complete = True
                 return True, analysis_results
             else:
                 return False, "Analysis failed to produce results"
         
+        except AnalysisCancelled:
+            finished = True
+            error_msg = f"Analysis stopped before any skill was scored ({cancel_token.reason})"
+            st.session_state.error_message = error_msg
+            return False, error_msg
         except Exception as e:
+            finished = True
             error_msg = str(e)
             # Encode error message safely as UTF-8
             if isinstance(error_msg, bytes):
@@ -122,15 +227,50 @@ class ResumeAnalysisApp:
             error_msg = f"Error during analysis: {error_msg}"
             st.session_state.error_message = error_msg
             return False, error_msg
+        finally:
+            # Interrupted by Streamlit: stop the calls this analysis still has queued or in flight
+            if not finished:
+                cancel_token.cancel("interrupted")
+            progress.empty()
     
+    def fetch_weakness(self, skill, wait):
+        """Deferred suggestions for one skill of this session's result, added to the result once available"""
+        results = self.get_analysis_results()
+        if results is None or not self.agent:
+            return None
+        weakness = self.agent.weakness_for_skill(results, skill, wait=wait)
+        if weakness is not None and skill not in {w["skill"] for w in results.weaknesses}:
+            results = results.with_weaknesses(list(results.weaknesses) + [weakness])
+            self.session_store.set(self.session_id, "analysis_results", results)
+            self._update_posting_result(results)
+        return weakness
+
+    def generate_pending_weaknesses(self):
+        """Write every deferred suggestion of this session's result (e.g. before exporting)"""
+        results = self.get_analysis_results()
+        if results is None or not self.agent:
+            return
+        for skill in self.agent.pending_weaknesses(results):
+            self.fetch_weakness(skill, True)
+
+    def _update_posting_result(self, results):
+        """Replace the matching entry of a multi-posting run with an updated result"""
+        posting_results = self.session_store.get(self.session_id, "posting_results")
+        if posting_results:
+            self.session_store.set(self.session_id, "posting_results", [
+                results if posting.analysis_id == results.analysis_id else posting for posting in posting_results
+            ])
+
     def clear_faiss_cache(self):
-        """Clear FAISS index cache to ensure fresh analysis"""
+        """Clear per-analysis FAISS indexes to ensure fresh analysis"""
         try:
+            import glob
             import shutil
             faiss_dir = 'faiss_indexes'
-            if os.path.exists(faiss_dir):
-                shutil.rmtree(faiss_dir)
-                print(f"Cleared FAISS cache directory: {faiss_dir}")
+            # Trained codecs and offline-built indexes are kept
+            for index_path in glob.glob(os.path.join(faiss_dir, 'resume_index_*')):
+                shutil.rmtree(index_path)
+            print(f"Cleared FAISS cache directory: {faiss_dir}")
         except Exception as e:
             print(f"Error clearing FAISS cache: {e}")
 
@@ -141,14 +281,38 @@ class ResumeAnalysisApp:
         
         # Render sidebar and get configuration
         cutoff_score = ResumeAnalysisUI.render_sidebar()
+        analysis_mode = ResumeAnalysisUI.render_analysis_mode()
+        scoring_mode = ResumeAnalysisUI.render_scoring_mode()
+        profiling_enabled = ResumeAnalysisUI.render_profiling_toggle(config.PROFILING_ENABLED)
+        
+        # Get the shared agent with API key from environment
+        if self.agent is None:
+            self.initialize_agent()
+        
+        # Report per-session and process memory
+        ResumeAnalysisUI.render_memory_usage(
+            self.session_store.session_memory(self.session_id),
+            self.session_store.stats(),
+            process_memory()
+        )
+        
+        if self.agent:
+            ResumeAnalysisUI.render_model_usage(self.agent.router.stats(), self.agent.router.hedge_stats())
         
-        # Initialize agent with API key from environment
-        if st.session_state.agent is None:
-            self.initialize_agent(cutoff_score)
+        if profiling_enabled:
+            ResumeAnalysisUI.render_profiles(get_profiler().list())
         
-        self.agent = st.session_state.agent
+        # Past analyses saved by any session can be reopened without re-running them
+        if self.agent and self.agent.analysis_store is not None:
+            history_key = ResumeAnalysisUI.render_analysis_history(self.agent.analysis_store.search)
+            if history_key:
+                saved = self.agent.analysis_store.get(history_key)
+                if saved is not None:
+                    self.session_store.pop(self.session_id, "posting_results")
+                    self.session_store.set(self.session_id, "analysis_results", saved)
+                    st.session_state.analysis_complete = True
         
-        if not self.agent or st.session_state.agent is None:
+        if not self.agent:
             ResumeAnalysisUI.render_warning(st.session_state.error_message or "Failed to initialize. Please check your OpenAI API Key configuration.")
             return
         
@@ -157,7 +321,8 @@ class ResumeAnalysisApp:
         
         with main_col1:
             # File upload section
-            resume_file, jd_file = ResumeAnalysisUI.render_file_upload_section()
+            resume_file, jd_files = ResumeAnalysisUI.render_file_upload_section()
+            jd_file = jd_files[0] if len(jd_files) == 1 else None
             
             # Alternative: role requirements section
             role_requirements_text = ResumeAnalysisUI.render_role_requirements_section()
@@ -165,11 +330,11 @@ class ResumeAnalysisApp:
             # Validate inputs
             is_valid, validation_message = self.validate_inputs(
                 resume_file, 
-                jd_file, 
+                jd_files, 
                 role_requirements_text
             )
             
-            if not is_valid and (resume_file or jd_file or role_requirements_text):
+            if not is_valid and (resume_file or jd_files or role_requirements_text):
                 ResumeAnalysisUI.render_warning(validation_message)
             
             # Analysis section
@@ -177,7 +342,8 @@ class ResumeAnalysisApp:
             
             # Handle clear results button click - Clear results, files, and FAISS cache
             if clear_results_button:
-                st.session_state.analysis_results = None
+                self.session_store.pop(self.session_id, "analysis_results")
+                self.session_store.pop(self.session_id, "posting_results")
                 st.session_state.analysis_complete = False
                 st.session_state.error_message = None
                 # Change file upload keys to clear uploaded files
@@ -196,14 +362,19 @@ class ResumeAnalysisApp:
                     with st.spinner("🔄 Analyzing resume... This may take a minute..."):
                         # Process role requirements if provided
                         role_requirements = None
-                        if role_requirements_text and not jd_file:
+                        if role_requirements_text and not jd_files:
                             role_requirements = self.process_role_requirements(role_requirements_text)
                         
                         # Run analysis
                         success, result = self.analyze_resume(
                             resume_file,
                             jd_file=jd_file,
-                            role_requirements=role_requirements
+                            role_requirements=role_requirements,
+                            cutoff_score=cutoff_score,
+                            mode=analysis_mode,
+                            scoring=scoring_mode,
+                            profile=profiling_enabled,
+                            jd_files=jd_files
                         )
                         
                         if success:
@@ -213,27 +384,82 @@ class ResumeAnalysisApp:
         
         with main_col1:
             # Display results if analysis is complete
-            if st.session_state.analysis_complete and st.session_state.analysis_results:
+            analysis_results = self.get_analysis_results()
+            if (analysis_results is not None and not analysis_results.get("partial")
+                    and getattr(analysis_results, "cutoff_score", cutoff_score) != cutoff_score):
+                # Cutoff moved: re-derive selection and improvement areas, no re-scoring.
+                # Partial screening results only hold for the cutoff they were decided at.
+                analysis_results = analysis_results.with_cutoff(cutoff_score)
+                self.session_store.set(self.session_id, "analysis_results", analysis_results)
+            posting_results = self.session_store.get(self.session_id, "posting_results")
+            if posting_results and any(not posting.get("partial") and posting.cutoff_score != cutoff_score
+                                       for posting in posting_results):
+                posting_results = [posting if posting.get("partial") else posting.with_cutoff(cutoff_score)
+                                   for posting in posting_results]
+                self.session_store.set(self.session_id, "posting_results", posting_results)
+            if st.session_state.analysis_complete and analysis_results:
                 st.divider()
-                self.render_analysis_results(st.session_state.analysis_results)
+                if posting_results:
+                    # Several openings from one pass: rank them, then show the chosen one in detail
+                    selected_id = ResumeAnalysisUI.render_best_fit_openings(posting_results,
+                                                                            analysis_results.analysis_id)
+                    if selected_id != analysis_results.analysis_id:
+                        analysis_results = next(posting for posting in posting_results
+                                                if posting.analysis_id == selected_id)
+                        self.session_store.set(self.session_id, "analysis_results", analysis_results)
+                    st.divider()
+                self.render_analysis_results(analysis_results)
+            elif st.session_state.analysis_complete:
+                # Results were evicted after the session sat idle
+                st.session_state.analysis_complete = False
+                ResumeAnalysisUI.render_warning("Previous results expired after inactivity. Please run the analysis again.")
 
     def render_analysis_results(self, results):
         """Render comprehensive analysis results"""
         st.header("📊 Analysis Results")
+        if results.get("posting"):
+            st.caption(f"Opening: {results.get('posting')}")
         
         # Results header with score and status
         ResumeAnalysisUI.render_results_header(
             results.get("overall_score", 0),
-            results.get("selected", False)
+            results.get("selected"),
+            results
         )
         
+        if results.get("cancelled"):
+            ResumeAnalysisUI.render_cancelled_notice(
+                results.get("cancel_reason"),
+                results.get("completed_skills", list(results.get("skill_scores", {}))),
+                results.get("cancelled_skills", []),
+                results.get("cancelled_weaknesses", []),
+                score_bounds=results.get("score_bounds") if results.get("selected") is None else None
+            )
+        elif results.get("partial"):
+            ResumeAnalysisUI.render_partial_notice(
+                len(results.get("skill_scores", {})),
+                results.get("unscored_skills", []),
+                results.get("score_bounds", [0, 100])
+            )
+        
+        if results.get("near_duplicate"):
+            ResumeAnalysisUI.render_near_duplicate_notice(results.get("near_duplicate"))
+        
+        if results.get("estimated_skills"):
+            ResumeAnalysisUI.render_estimate_notice(
+                results.get("estimated_skills", []),
+                len(results.get("skill_scores", {}))
+            )
+        
         st.divider()
         
         # Skill analysis
         if results.get("skill_scores"):
             ResumeAnalysisUI.render_skill_scores(
                 results.get("skill_scores", {}),
-                results.get("skill_reasonings", {})
+                results.get("skill_reasonings", {}),
+                analysis_id=results.get("analysis_id"),
+                skill_aliases=results.get("skill_aliases")
             )
             st.divider()
         
@@ -242,9 +468,14 @@ class ResumeAnalysisApp:
             ResumeAnalysisUI.render_strengths(results.get("strengths", []))
             st.divider()
         
-        # Weaknesses with improvements
-        if results.get("resume_weaknesses"):
-            ResumeAnalysisUI.render_weaknesses(results.get("resume_weaknesses", []))
+        # Weaknesses with improvements; deferred ones are generated when asked for
+        pending = self.agent.pending_weaknesses(results) if self.agent else []
+        if results.get("resume_weaknesses") or pending:
+            ResumeAnalysisUI.render_weaknesses(
+                results.get("resume_weaknesses", []),
+                pending=[(skill, results.score_of(skill)) for skill in pending],
+                fetch=self.fetch_weakness
+            )
             st.divider()
         
         # Improvement areas
@@ -256,7 +487,7 @@ class ResumeAnalysisApp:
         st.divider()
         
         # Export results
-        ResumeAnalysisUI.render_export_results(results)
+        ResumeAnalysisUI.render_export_results(results, len(pending), generate=self.generate_pending_weaknesses)
 
     def run(self):
         """Run the application"""
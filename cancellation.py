@@ -0,0 +1,68 @@
+"""
+Deadlines and cancellation for in-flight analyses.
+
+A CancellationToken is created per analysis and passed through extraction,
+embedding, scoring and weakness stages. It fires when cancel() is called or
+when its deadline passes. Stages check it between units of work. Queued LLM
+calls are dropped once it fires, and each LLM call's timeout is capped at the
+time left before the deadline.
+
+Stages running in the caller's thread also call report(), which forwards
+progress to an optional callback. In the Streamlit app that callback updates
+the page, which is where Streamlit stops a script run after the user clicks
+another button or leaves. So progress reporting is also how an abandoned
+analysis stops.
+"""
+
+import threading
+import time
+
+
+class AnalysisCancelled(Exception):
+    """Raised when an analysis stage finds its cancellation token fired"""
+
+
+class CancellationToken:
+    """Cancellation flag with an optional deadline, shared by an analysis and its worker threads"""
+
+    def __init__(self, timeout=None, on_progress=None):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.on_progress = on_progress
+        self._event = threading.Event()
+        self._reason = None
+
+    def cancel(self, reason="cancelled"):
+        """Fire the token; outstanding work stops at its next check"""
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline exceeded")
+        return self._event.is_set()
+
+    @property
+    def reason(self):
+        return self._reason if self.cancelled else None
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without a deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise AnalysisCancelled(f"Analysis {self._reason}")
+
+    def report(self, stage, done=None, total=None):
+        """Forward progress to the callback (call from the analysis' own thread only)"""
+        if self.on_progress is not None:
+            self.on_progress(stage, done, total)
+
+    def check(self, stage, done=None, total=None):
+        """Report progress, then raise AnalysisCancelled if the token fired"""
+        self.report(stage, done, total)
+        self.raise_if_cancelled()
@@ -0,0 +1,277 @@
+"""
+Record and replay OpenAI traffic (chat completions and embeddings).
+
+In record mode, every HTTP request the ChatOpenAI and OpenAIEmbeddings
+clients send is written to a cassette along with its response and timings.
+In replay mode, the cassette serves those responses back without any network
+access, so real analysis workloads can be profiled and benchmarked offline.
+
+The recording happens at the httpx transport shared by both clients, so it
+captures exactly what went over the wire, including retries, hedged
+duplicates and escalations.
+
+A cassette is a gzip-compressed JSON Lines file with one interaction per
+line. Requests are matched on method, URL path and the canonical JSON body.
+Identical requests are served in recorded order, and the last recording is
+repeated once they run out. API keys and other request headers are never
+written.
+
+OpenAIEmbeddings tokenizes its inputs with tiktoken before sending them, and
+tiktoken downloads its encoding on first use, outside any httpx client. While
+a cassette is active, tiktoken's cache is the tiktoken/ directory next to the
+cassette (or TIKTOKEN_CACHE_DIR when set): recording stores the encoding
+there, and replay loads it from there and fails up front if it is missing, so
+a replay never reaches for the network.
+
+Configuration (environment):
+    LLM_CASSETTE_MODE            off (default), record or replay
+    LLM_CASSETTE_PATH            cassette file (default cassettes/openai.jsonl.gz)
+    LLM_CASSETTE_LATENCY_SCALE   replay delay as a fraction of the recorded latency:
+                                 1 = original latency (default), 0 = full speed
+
+Usage:
+    python cassette.py info cassettes/openai.jsonl.gz
+"""
+
+import argparse
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+import httpx
+import openai
+import tiktoken
+
+RECORD = "record"
+REPLAY = "replay"
+
+DEFAULT_PATH = os.path.join("cassettes", "openai.jsonl.gz")
+
+# Encoding OpenAIEmbeddings tokenizes inputs with, and where tiktoken downloads it from
+TIKTOKEN_ENCODING = "cl100k_base"
+TIKTOKEN_ENCODING_URL = "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken"
+
+
+class CassetteMiss(RuntimeError):
+    """A replayed request has no recording in the cassette"""
+
+
+def request_key(method, path, body):
+    """Match key of a request: method, path and body with JSON keys sorted"""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        pass
+    return hashlib.sha256(method.encode("utf-8") + b" " + path.encode("utf-8") + b"\n" + body).hexdigest()
+
+
+def load_interactions(path):
+    """Recorded interactions of a cassette, in recording order"""
+    interactions = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    interactions.append(json.loads(line))
+        except (EOFError, json.JSONDecodeError):
+            # The recording process was killed mid-write; keep what is complete
+            pass
+    return interactions
+
+
+def tiktoken_cache_dir(cassette_path):
+    """tiktoken cache used with a cassette: TIKTOKEN_CACHE_DIR, or tiktoken/ next to the cassette"""
+    return os.getenv("TIKTOKEN_CACHE_DIR") or os.path.join(os.path.dirname(cassette_path) or ".", "tiktoken")
+
+
+def prepare_tiktoken(cache_dir, download=True):
+    """Point tiktoken at cache_dir and load the embeddings encoding from it.
+
+    With download=False a missing encoding raises CassetteMiss instead of
+    being downloaded.
+    """
+    os.environ["TIKTOKEN_CACHE_DIR"] = cache_dir
+    cached = os.path.join(cache_dir, hashlib.sha1(TIKTOKEN_ENCODING_URL.encode("utf-8")).hexdigest())
+    if not download and not os.path.exists(cached):
+        raise CassetteMiss(f"No {TIKTOKEN_ENCODING} tiktoken encoding in {cache_dir}; copy the tiktoken/ directory "
+                           f"recorded next to the cassette, or set TIKTOKEN_CACHE_DIR to a cache that has it")
+    return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """httpx transport that records to, or replays from, a cassette file"""
+
+    def __init__(self, path=DEFAULT_PATH, mode=REPLAY, latency_scale=1.0, transport=None):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.stats = {"requests": 0, "misses": 0}
+        if mode == RECORD:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._transport = transport or httpx.HTTPTransport()
+            # Appending adds a gzip member; readers see one continuous stream
+            self._file = gzip.open(path, "at", encoding="utf-8")
+        else:
+            self._recordings = defaultdict(deque)
+            for interaction in load_interactions(path):
+                self._recordings[interaction["key"]].append(interaction)
+            print(f"Replaying {sum(len(q) for q in self._recordings.values())} recorded OpenAI calls from {path}")
+
+    def handle_request(self, request):
+        body = request.read()
+        key = request_key(request.method, request.url.path, body)
+        if self.mode == RECORD:
+            return self._record(request, key, body)
+        return self._replay(request, key)
+
+    def _record(self, request, key, body):
+        started = time.perf_counter()
+        response = self._transport.handle_request(request)
+        try:
+            content = response.read()
+        finally:
+            response.close()
+        elapsed = time.perf_counter() - started
+        interaction = {
+            "key": key,
+            "method": request.method,
+            "path": request.url.path,
+            "request": body.decode("utf-8", errors="replace"),
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type", "application/json"),
+            "started": round(started - self._start, 4),
+            "elapsed": round(elapsed, 4),
+        }
+        try:
+            interaction["response"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            interaction["response_b64"] = base64.b64encode(content).decode("ascii")
+        line = json.dumps(interaction, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.stats["requests"] += 1
+            self._file.write(line)
+            self._file.flush()
+        # The body was read (and decompressed) above, so it is replayed to the client as-is
+        return httpx.Response(response.status_code, headers={"content-type": interaction["content_type"]},
+                              content=content, request=request)
+
+    def _replay(self, request, key):
+        with self._lock:
+            self.stats["requests"] += 1
+            recordings = self._recordings.get(key)
+            if not recordings:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"No recorded response for {request.method} {request.url.path} in {self.path}")
+            interaction = recordings.popleft() if len(recordings) > 1 else recordings[0]
+        if self.latency_scale > 0:
+            time.sleep(interaction["elapsed"] * self.latency_scale)
+        if "response" in interaction:
+            content = interaction["response"].encode("utf-8")
+        else:
+            content = base64.b64decode(interaction["response_b64"])
+        return httpx.Response(interaction["status"], headers={"content-type": interaction["content_type"]},
+                              content=content, request=request)
+
+    def close(self):
+        # Called whenever one of the sharing clients is closed; the cassette stays open for the others
+        pass
+
+    def shutdown(self):
+        """Close the cassette file (registered to run at exit)"""
+        if self.mode == RECORD:
+            with self._lock:
+                if not self._file.closed:
+                    self._file.close()
+                    self._transport.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def cassette_from_env():
+    """Process-wide CassetteTransport configured by LLM_CASSETTE_*, or None when off.
+
+    Every client in the process shares one transport, so one run records to
+    (or replays from) a single cassette.
+    """
+    global _shared
+    mode = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+    if mode not in (RECORD, REPLAY):
+        return None
+    with _shared_lock:
+        if _shared is None:
+            path = os.getenv("LLM_CASSETTE_PATH") or DEFAULT_PATH
+            prepare_tiktoken(tiktoken_cache_dir(path), download=mode == RECORD)
+            _shared = CassetteTransport(
+                path,
+                mode=mode,
+                latency_scale=float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1")),
+            )
+            atexit.register(_shared.shutdown)
+        return _shared
+
+
+def http_client():
+    """UTF-8 httpx client for the OpenAI clients, recording or replaying when a cassette is configured"""
+    transport = cassette_from_env()
+    if transport is None:
+        return httpx.Client(default_encoding='utf-8')
+    return httpx.Client(default_encoding='utf-8', transport=transport)
+
+
+def async_openai_client(api_key, base_url=None):
+    """AsyncOpenAI client to pass as async_client alongside http_client().
+
+    langchain-openai also hands http_client to its async OpenAI client, which
+    rejects a sync httpx.Client. The agent makes no async calls, so this one
+    keeps openai's default transport.
+    """
+    return openai.AsyncOpenAI(api_key=api_key, base_url=base_url or os.getenv("OPENAI_API_BASE") or None)
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect recorded OpenAI cassettes")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="calls, latency and size per endpoint and model")
+    info.add_argument("path", nargs="?", default=os.getenv("LLM_CASSETTE_PATH") or DEFAULT_PATH)
+    args = parser.parse_args()
+
+    interactions = load_interactions(args.path)
+    groups = defaultdict(list)
+    for interaction in interactions:
+        try:
+            model = json.loads(interaction["request"]).get("model", "?")
+        except ValueError:
+            model = "?"
+        groups[(interaction["path"], model)].append(interaction)
+    span = max((i["started"] + i["elapsed"] for i in interactions), default=0.0)
+    print(f"{args.path}: {len(interactions)} calls, {len({i['key'] for i in interactions})} distinct, "
+          f"{span:.1f}s recorded, {os.path.getsize(args.path) / 1024:.0f} KiB")
+    for (path, model), group in sorted(groups.items()):
+        latencies = [i["elapsed"] for i in group]
+        errors = sum(1 for i in group if i["status"] >= 400)
+        print(f"  {path} {model}: {len(group)} calls, {errors} errors, "
+              f"p50 {_percentile(latencies, 50):.2f}s, p95 {_percentile(latencies, 95):.2f}s, "
+              f"total {sum(latencies):.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -39,3 +39,89 @@ if not OPENAI_API_KEY or OPENAI_API_KEY == 'your-api-key-here':
 # Ensure it's available in environment
 if OPENAI_API_KEY:
     os.environ['OPENAI_API_KEY'] = OPENAI_API_KEY
+
+# Session state management
+# Analysis results of sessions idle for longer than this are evicted from memory
+SESSION_IDLE_TIMEOUT_SECONDS = int(os.getenv('SESSION_IDLE_TIMEOUT_SECONDS', '1800'))
+
+# Skill canonicalization
+# Skills whose embeddings are at least this similar are scored once as the same skill
+SKILL_SIMILARITY_THRESHOLD = float(os.getenv('SKILL_SIMILARITY_THRESHOLD', '0.95'))
+
+# Extracted-text store
+# Resume text is cached here by file content hash so re-uploads skip PDF parsing.
+# Set to an empty value to disable.
+TEXT_STORE_PATH = os.getenv('TEXT_STORE_PATH', 'text_store/extracted_text.db')
+
+# Concurrent LLM scoring calls per analysis
+SKILL_SCORING_WORKERS = int(os.getenv('SKILL_SCORING_WORKERS', '4'))
+
+# Resume chunks per embedding request; batches are embedded while later pages are still parsed
+EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', '16'))
+
+# Improvement suggestions are written on demand; this many of the lowest-scoring skills are prefetched
+WEAKNESS_PREFETCH = int(os.getenv('WEAKNESS_PREFETCH', '2'))
+
+# Model routing
+# Model used for each tier
+MODEL_TIERS = {
+    'fast': os.getenv('MODEL_TIER_FAST', 'gpt-4o-mini'),
+    'large': os.getenv('MODEL_TIER_LARGE', 'gpt-4o'),
+}
+# Tier chain per call type ("fast>large"); later tiers are used when an answer fails validation
+MODEL_ROUTES = {
+    call_type: tuple(tier.strip() for tier in os.getenv(f'MODEL_ROUTE_{call_type.upper()}', default).split('>')
+                     if tier.strip())
+    for call_type, default in (('skill_scoring', 'fast>large'), ('direct_scoring', 'fast>large'),
+                               ('jd_extraction', 'fast>large'), ('weakness', 'large'))
+}
+
+# Request hedging
+# A call slower than the tier's LLM_HEDGING_PERCENTILE latency gets a duplicate; the first answer wins.
+# Duplicates wait for LLM_HEDGING_MIN_SAMPLES calls per tier and are capped at LLM_HEDGING_MAX_RATIO
+# of recent calls and LLM_HEDGING_MAX_IN_FLIGHT at once.
+LLM_HEDGING = os.getenv('LLM_HEDGING', 'false').lower() in ('1', 'true', 'yes')
+LLM_HEDGING_PERCENTILE = float(os.getenv('LLM_HEDGING_PERCENTILE', '95'))
+LLM_HEDGING_MIN_SAMPLES = int(os.getenv('LLM_HEDGING_MIN_SAMPLES', '20'))
+LLM_HEDGING_MAX_RATIO = float(os.getenv('LLM_HEDGING_MAX_RATIO', '0.1'))
+LLM_HEDGING_MAX_IN_FLIGHT = int(os.getenv('LLM_HEDGING_MAX_IN_FLIGHT', '8'))
+
+# Per-analysis profiling (cProfile + tracemalloc)
+# Also switchable per session from the sidebar when the app is opened with ?debug=1
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+# Number of most recent profiles kept on disk
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '20'))
+
+# Persisted FAISS index type: flat (exact float32), fp16, sq8 (int8) or pq (product-quantized).
+# sq8 and pq use a codec trained offline with: python vector_index.py train --type <type>
+FAISS_INDEX_TYPE = os.getenv('FAISS_INDEX_TYPE', 'flat')
+FAISS_CODEC_PATH = os.getenv('FAISS_CODEC_PATH', os.path.join('faiss_indexes', f'codec_{FAISS_INDEX_TYPE}.faiss'))
+# sq8/pq hits re-ranked on memory-mapped float16 vectors: k x this many candidates
+FAISS_REFINE_FACTOR = int(os.getenv('FAISS_REFINE_FACTOR', '4'))
+
+# Embedding-similarity skill estimates ("similarity" and "hybrid" scoring modes).
+# Cosine similarity at or below LOW maps to 0/10, at or above HIGH to 10/10.
+# Fit both to your saved LLM-scored analyses with: python vector_index.py calibrate
+PRESCORE_SIMILARITY_LOW = float(os.getenv('PRESCORE_SIMILARITY_LOW', '0.72'))
+PRESCORE_SIMILARITY_HIGH = float(os.getenv('PRESCORE_SIMILARITY_HIGH', '0.86'))
+# Per-skill similarity is the mean of the best TOP_K resume chunks (1 = best chunk only)
+PRESCORE_TOP_K = int(os.getenv('PRESCORE_TOP_K', '1'))
+
+# Analysis store
+# Completed analyses are saved here and reused for identical requests. Set to an empty value to disable.
+ANALYSIS_STORE_PATH = os.getenv('ANALYSIS_STORE_PATH', 'analysis_store/analyses.db')
+# Least recently opened analyses are deleted once the store exceeds this size
+ANALYSIS_STORE_MAX_MB = int(os.getenv('ANALYSIS_STORE_MAX_MB', '200'))
+
+# Near-duplicate resume detection (MinHash/LSH); needs the analysis store. Empty path disables.
+# Checked on the text the streaming extract+embed pipeline produces, so parsing and embedding still overlap.
+# Resumes at least NEAR_DUPLICATE_THRESHOLD similar (estimated Jaccard of word shingles) reuse saved analyses.
+NEAR_DUPLICATE_INDEX_PATH = os.getenv('NEAR_DUPLICATE_INDEX_PATH', 'analysis_store/near_duplicates.db')
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.9'))
+
+# Deadline for one analysis; work still outstanding when it passes is cancelled
+ANALYSIS_TIMEOUT_SECONDS = float(os.getenv('ANALYSIS_TIMEOUT_SECONDS', '300'))
+
+# Precomputed skill embedding table (build with: python skill_vocab.py build). Set empty to disable.
+SKILL_VOCAB_DIR = os.getenv('SKILL_VOCAB_DIR', 'skill_vocab')
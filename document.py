@@ -0,0 +1,179 @@
+"""
+In-memory document ingestion.
+
+ResumeDocument wraps an uploaded file (Streamlit UploadedFile / BytesIO),
+raw bytes or a path on disk and exposes its content to the PDF and TXT
+readers without copying it and without writing temporary files:
+
+- BytesIO uploads are read in place through getbuffer() and the upload itself
+- bytes are wrapped in a BytesIO, which shares the bytes object
+- paths are memory-mapped
+
+The document is a context manager; leaving the block releases the buffer
+view, so the document lives exactly as long as the analysis that uses it.
+"""
+
+import io
+import mmap
+import os
+import re
+import time
+import unicodedata
+
+import PyPDF2
+
+from cache import content_hash
+
+_TRAILING_SPACES = re.compile(r"[ \t]+\n")
+_INLINE_SPACES = re.compile(r"[ \t\u00a0]{2,}")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_text(text):
+    """Canonical form of extracted text: NFC, unix newlines, collapsed spacing"""
+    text = unicodedata.normalize("NFC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _INLINE_SPACES.sub(" ", text)
+    text = _TRAILING_SPACES.sub("\n", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return text.strip()
+
+
+def iter_normalized_lines(pages):
+    """Lines of a stream of page texts, normalized like normalize_text, as soon as each line is complete"""
+    pending = ""
+    for page in pages:
+        lines = (pending + page).replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        # The last line may continue on the next page
+        pending = lines.pop()
+        for line in lines:
+            yield _INLINE_SPACES.sub(" ", unicodedata.normalize("NFC", line)).rstrip(" \t")
+    if pending:
+        yield _INLINE_SPACES.sub(" ", unicodedata.normalize("NFC", pending)).rstrip(" \t")
+
+
+class ResumeDocument:
+    """Zero-copy view over a PDF or TXT document"""
+
+    def __init__(self, source, name=None):
+        self.name = name or getattr(source, "name", None) or (source if isinstance(source, (str, os.PathLike)) else "")
+        self.name = os.fspath(self.name)
+        self._file = None
+        self._mmap = None
+
+        if hasattr(source, "getbuffer"):
+            # Uploaded file: read in place, never duplicate its bytes
+            self._stream = source
+            self._buffer = source.getbuffer()
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            self._buffer = memoryview(source)
+            # BytesIO shares an immutable bytes object instead of copying it
+            self._stream = io.BytesIO(source) if isinstance(source, bytes) else None
+        elif isinstance(source, (str, os.PathLike)):
+            self._file = open(source, "rb")
+            if os.fstat(self._file.fileno()).st_size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._buffer = memoryview(self._mmap)
+                self._stream = self._mmap
+            else:
+                self._buffer = memoryview(b"")
+                self._stream = io.BytesIO(b"")
+        else:
+            raise TypeError(f"Unsupported document source: {type(source).__name__}")
+
+    @property
+    def buffer(self):
+        """Read-only memoryview over the document bytes"""
+        return self._buffer
+
+    @property
+    def size(self):
+        return self._buffer.nbytes
+
+    @property
+    def content_hash(self):
+        """SHA-256 of the document bytes, computed over the buffer without copying"""
+        return content_hash(self._buffer)
+
+    @property
+    def kind(self):
+        """'pdf', 'txt' or '' for unsupported documents"""
+        lower_name = self.name.lower()
+        if lower_name.endswith(".pdf"):
+            return "pdf"
+        if lower_name.endswith(".txt"):
+            return "txt"
+        return ""
+
+    def stream(self):
+        """Seekable binary stream positioned at the start of the document"""
+        if self._stream is None:
+            # bytearray/memoryview sources have no shareable stream; this is the only copy
+            self._stream = io.BytesIO(self._buffer.tobytes())
+        self._stream.seek(0)
+        return self._stream
+
+    def iter_pdf_pages(self, reader=None, include_empty=False):
+        """Yield the extracted text of each PDF page (pages without text are skipped unless include_empty)"""
+        reader = reader or PyPDF2.PdfReader(self.stream())
+        for page in reader.pages:
+            page_text = page.extract_text()
+            if not page_text and include_empty:
+                yield ""
+            elif page_text:
+                # Ensure proper encoding handling
+                if isinstance(page_text, bytes):
+                    page_text = page_text.decode('utf-8', errors='replace')
+                yield page_text
+
+    def read_pdf_text(self):
+        """Extract text from all PDF pages"""
+        return "".join(page_text + "\n" for page_text in self.iter_pdf_pages())
+
+    def read_txt_text(self):
+        """Decode a text document straight from the buffer"""
+        return str(self._buffer, "utf-8", "replace")
+
+    def iter_pages(self, cancel_token=None):
+        """Yield the raw text of each page as soon as it is parsed ("" for a page without text).
+
+        A TXT document is a single page. A cancel_token is checked between PDF pages.
+        """
+        if self.kind == "pdf":
+            for page_text in self.iter_pdf_pages(include_empty=True):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                yield page_text + "\n" if page_text else ""
+        elif self.kind == "txt":
+            yield self.read_txt_text()
+        else:
+            raise ValueError(f"Unsupported file format: {self.name}")
+
+    def extract(self, cancel_token=None):
+        """Extract normalized text. Returns (text, page_count, extract_seconds).
+
+        A cancel_token is checked between PDF pages.
+        """
+        start = time.perf_counter()
+        pages = list(self.iter_pages(cancel_token))
+        return normalize_text("".join(pages)), len(pages), time.perf_counter() - start
+
+    def close(self):
+        """Release the buffer view and any memory map"""
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,236 @@
+"""
+Streaming export of analysis results to JSONL, CSV and Parquet.
+
+Results are consumed one at a time from any iterable (a list, a generator
+reading from disk, a database cursor...) and written row by row, so memory
+use depends on the batch size and not on the number of results.
+
+Each result becomes one flat row:
+- scalar fields (analysis_id, overall_score, selected, ...)
+- one "skill_scores.<skill>" column per skill
+- "resume_weaknesses" kept nested (JSON string in CSV)
+
+Usage:
+    from export import export_results
+    export_results(results_iterable, "screening.parquet", fmt="parquet")
+"""
+
+import csv
+import io
+import itertools
+import json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow ships with streamlit, but keep JSONL/CSV usable without it
+    pa = None
+    pq = None
+
+EXPORT_FORMATS = ("jsonl", "csv", "parquet")
+
+SKILL_COLUMN_PREFIX = "skill_scores."
+
+BASE_COLUMNS = [
+    "analysis_id",
+    "overall_score",
+    "selected",
+    "reasoning",
+    "strengths",
+    "missing_skills",
+    "improvement_areas",
+]
+
+WEAKNESS_COLUMN = "resume_weaknesses"
+OTHER_SKILLS_COLUMN = "other_skill_scores"
+
+
+def _as_dict(result):
+    """Return a plain dict view of an analysis result"""
+    if hasattr(result, "to_dict"):
+        return result.to_dict()
+    return result
+
+
+def _weaknesses(result):
+    """Normalize weakness entries to a fixed set of keys"""
+    weaknesses = []
+    for weakness in result.get("resume_weaknesses") or []:
+        weaknesses.append({
+            "skill": str(weakness.get("skill", "")),
+            "score": int(weakness.get("score", 0) or 0),
+            "detail": str(weakness.get("detail", "")),
+            "suggestions": [str(s) for s in weakness.get("suggestions", [])],
+            "example": str(weakness.get("example", "")),
+        })
+    return weaknesses
+
+
+def flatten_result(result, skill_columns=None):
+    """Flatten one analysis result into a row dict.
+
+    When skill_columns is given, only those skills get their own column and any
+    other skill scores are collected into OTHER_SKILLS_COLUMN, so the row shape
+    stays fixed for formats that need a schema up front.
+    """
+    result = _as_dict(result)
+    row = {
+        "analysis_id": result.get("analysis_id"),
+        "overall_score": result.get("overall_score", 0),
+        # None when a partial result left the selection undetermined
+        "selected": result.get("selected"),
+        "reasoning": result.get("reasoning", ""),
+        "strengths": list(result.get("strengths", [])),
+        "missing_skills": list(result.get("missing_skills", [])),
+        "improvement_areas": list(result.get("improvement_areas", [])),
+    }
+
+    skill_scores = result.get("skill_scores", {}) or {}
+    if skill_columns is None:
+        for skill, score in skill_scores.items():
+            row[SKILL_COLUMN_PREFIX + skill] = score
+    else:
+        for skill in skill_columns:
+            row[SKILL_COLUMN_PREFIX + skill] = skill_scores.get(skill)
+        others = {skill: score for skill, score in skill_scores.items() if skill not in skill_columns}
+        row[OTHER_SKILLS_COLUMN] = others
+
+    row[WEAKNESS_COLUMN] = _weaknesses(result)
+    return row
+
+
+def _peek_skill_columns(results):
+    """Take skill columns from the first result without losing it from the stream"""
+    iterator = iter(results)
+    try:
+        first = next(iterator)
+    except StopIteration:
+        return [], iterator
+    skills = list((_as_dict(first).get("skill_scores") or {}).keys())
+    return skills, itertools.chain([first], iterator)
+
+
+def write_jsonl(results, fp, skill_columns=None):
+    """Write results as JSON Lines to a text file object. Returns the row count.
+
+    Each row has its own skill columns unless skill_columns fixes them, as for CSV.
+    """
+    count = 0
+    for result in results:
+        fp.write(json.dumps(flatten_result(result, skill_columns), ensure_ascii=False))
+        fp.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(results, fp, skill_columns=None):
+    """Write results as CSV to a text file object. Returns the row count.
+
+    The header is fixed by skill_columns, or by the first result's skills when
+    not given; list and nested fields are stored as JSON strings.
+    """
+    if skill_columns is None:
+        skill_columns, results = _peek_skill_columns(results)
+
+    fieldnames = (BASE_COLUMNS
+                  + [SKILL_COLUMN_PREFIX + skill for skill in skill_columns]
+                  + [OTHER_SKILLS_COLUMN, WEAKNESS_COLUMN])
+    writer = csv.DictWriter(fp, fieldnames=fieldnames)
+    writer.writeheader()
+
+    count = 0
+    for result in results:
+        row = flatten_result(result, skill_columns)
+        for key in ("strengths", "missing_skills", "improvement_areas", OTHER_SKILLS_COLUMN, WEAKNESS_COLUMN):
+            row[key] = json.dumps(row[key], ensure_ascii=False)
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def _parquet_schema(skill_columns):
+    """Arrow schema for flattened result rows"""
+    weakness_type = pa.struct([
+        ("skill", pa.string()),
+        ("score", pa.int8()),
+        ("detail", pa.string()),
+        ("suggestions", pa.list_(pa.string())),
+        ("example", pa.string()),
+    ])
+    fields = [
+        ("analysis_id", pa.string()),
+        ("overall_score", pa.int16()),
+        ("selected", pa.bool_()),
+        ("reasoning", pa.string()),
+        ("strengths", pa.list_(pa.string())),
+        ("missing_skills", pa.list_(pa.string())),
+        ("improvement_areas", pa.list_(pa.string())),
+    ]
+    fields += [(SKILL_COLUMN_PREFIX + skill, pa.int8()) for skill in skill_columns]
+    fields += [
+        (OTHER_SKILLS_COLUMN, pa.map_(pa.string(), pa.int8())),
+        (WEAKNESS_COLUMN, pa.list_(weakness_type)),
+    ]
+    return pa.schema(fields)
+
+
+def write_parquet(results, destination, skill_columns=None, batch_size=1000):
+    """Write results as Parquet, one row group per batch. Returns the row count.
+
+    destination may be a path or a binary file object. At most batch_size rows
+    are held in memory at a time.
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet export. Install it with: pip install pyarrow")
+
+    if skill_columns is None:
+        skill_columns, results = _peek_skill_columns(results)
+
+    schema = _parquet_schema(skill_columns)
+    count = 0
+    with pq.ParquetWriter(destination, schema, compression="zstd") as writer:
+        batch = []
+        for result in results:
+            row = flatten_result(result, skill_columns)
+            row[OTHER_SKILLS_COLUMN] = list(row[OTHER_SKILLS_COLUMN].items())
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def export_results(results, destination, fmt="jsonl", **kwargs):
+    """Stream results to a file path or file object in the given format.
+
+    Returns the number of rows written.
+    """
+    fmt = fmt.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}. Choose one of {', '.join(EXPORT_FORMATS)}")
+
+    if fmt == "parquet":
+        return write_parquet(results, destination, **kwargs)
+
+    writer = write_jsonl if fmt == "jsonl" else write_csv
+    if hasattr(destination, "write"):
+        return writer(results, destination, **kwargs)
+    with open(destination, "w", encoding="utf-8", newline="") as fp:
+        return writer(results, fp, **kwargs)
+
+
+def export_to_bytes(results, fmt="jsonl", **kwargs):
+    """Export results into an in-memory payload, e.g. for a download button"""
+    fmt = fmt.lower()
+    if fmt == "parquet":
+        buffer = io.BytesIO()
+        export_results(results, buffer, fmt, **kwargs)
+        return buffer.getvalue()
+    buffer = io.StringIO(newline="")
+    export_results(results, buffer, fmt, **kwargs)
+    return buffer.getvalue().encode("utf-8")
+
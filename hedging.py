@@ -0,0 +1,152 @@
+"""
+Hedged LLM requests.
+
+A handful of slow calls set the length of an analysis. When a call runs past
+a rolling latency percentile for its tier, the Hedger sends a duplicate; the
+first successful response wins. A duplicate that has not started yet is
+cancelled. A call already in flight cannot be interrupted from Python, so
+the losing response is discarded when it arrives.
+
+Extra traffic is capped globally:
+- duplicates may be at most max_ratio of recent calls
+- at most max_in_flight duplicates run at once
+
+Per-tier metrics report the hedge rate and the p99 latency with hedging
+against the p99 the primary requests alone would have had.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class _HedgeStats:
+    """Rolling latency windows and counters for one tier"""
+
+    def __init__(self, window):
+        self.primary_latencies = deque(maxlen=window)  # primary request alone, hedged or not
+        self.effective_latencies = deque(maxlen=window)  # what the caller waited
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+
+class Hedger:
+    """Run calls with a duplicate request once they exceed a latency percentile"""
+
+    def __init__(self, percentile=95, min_samples=20, max_ratio=0.1, max_in_flight=8, window=500,
+                 max_workers=64):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.max_in_flight = max_in_flight
+        self._stats = {}
+        self._recent = deque(maxlen=1000)  # True for each recent call that was hedged
+        self._in_flight = 0
+        self._window = window
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+
+    def _tier_stats(self, key):
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _HedgeStats(self._window)
+        return stats
+
+    def threshold(self, key):
+        """Seconds after which a call on this tier is hedged, or None while too few samples exist"""
+        with self._lock:
+            latencies = list(self._tier_stats(key).primary_latencies)
+        if len(latencies) < self.min_samples:
+            return None
+        return _percentile(latencies, self.percentile)
+
+    def _acquire_hedge(self):
+        """Reserve budget for one duplicate request under the global caps"""
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                return False
+            if sum(self._recent) + 1 > self.max_ratio * max(len(self._recent), 1):
+                return False
+            self._in_flight += 1
+            return True
+
+    def _release_hedge(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+
+    def run(self, key, fn):
+        """Return fn(), hedging it with a second fn() if it is slower than the tier's threshold"""
+        threshold = self.threshold(key)
+        start = time.perf_counter()
+
+        def _record_primary(future):
+            if not future.cancelled() and future.exception() is None:
+                with self._lock:
+                    self._tier_stats(key).primary_latencies.append(time.perf_counter() - start)
+
+        primary = self._pool.submit(fn)
+        primary.add_done_callback(_record_primary)
+        hedge = None
+        if threshold is not None:
+            done, _ = wait([primary], timeout=threshold)
+            if not done and self._acquire_hedge():
+                hedge = self._pool.submit(fn)
+                hedge.add_done_callback(self._release_hedge)
+
+        outstanding = {primary} if hedge is None else {primary, hedge}
+        winner = None
+        error = None
+        while outstanding and winner is None:
+            done, outstanding = wait(outstanding, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = future
+                    break
+                error = future.exception()
+        for future in outstanding:
+            # Only takes effect if the loser has not started; a running call's response is ignored
+            future.cancel()
+
+        with self._lock:
+            stats = self._tier_stats(key)
+            stats.calls += 1
+            self._recent.append(hedge is not None)
+            if hedge is not None:
+                stats.hedged += 1
+                if winner is hedge:
+                    stats.hedge_wins += 1
+            if winner is not None:
+                stats.effective_latencies.append(time.perf_counter() - start)
+
+        if winner is None:
+            raise error
+        return winner.result()
+
+    def stats(self):
+        """Per-tier hedge rate, wins and p99 latency with and without hedging"""
+        with self._lock:
+            snapshot = {key: (stats.calls, stats.hedged, stats.hedge_wins,
+                              list(stats.primary_latencies), list(stats.effective_latencies))
+                        for key, stats in self._stats.items()}
+        result = {}
+        for key, (calls, hedged, wins, primary, effective) in snapshot.items():
+            result[key] = {
+                "calls": calls,
+                "hedged": hedged,
+                "hedge_rate": hedged / calls if calls else 0.0,
+                "hedge_wins": wins,
+                "threshold_seconds": _percentile(primary, self.percentile) if len(primary) >= self.min_samples else None,
+                "p99_unhedged_seconds": _percentile(primary, 99),
+                "p99_seconds": _percentile(effective, 99),
+            }
+        return result
+
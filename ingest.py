@@ -0,0 +1,136 @@
+"""
+Bulk resume ingestion into the extracted-text store.
+
+Walks a directory tree, extracts the text of every PDF/TXT resume in a
+process pool and stores it in the ExtractedTextStore, keyed by file content
+hash. Files whose bytes are already in the store are skipped without parsing.
+
+Usage:
+    python ingest.py resumes/ --store text_store/extracted_text.db --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from document import ResumeDocument
+from text_store import ExtractedTextStore
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+
+
+def iter_resume_files(root):
+    """Yield paths of supported resume files under root"""
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            if filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.join(dirpath, filename)
+
+
+def hash_file(path):
+    """Content hash of a file without parsing it"""
+    with ResumeDocument(path) as doc:
+        return doc.content_hash
+
+
+def extract_file(path):
+    """Extract one file in a worker process. Returns a record for the store."""
+    with ResumeDocument(path) as doc:
+        text, page_count, extract_seconds = doc.extract()
+        return {
+            "content_hash": doc.content_hash,
+            "text": text,
+            "page_count": page_count,
+            "extract_seconds": extract_seconds,
+            "source": path,
+            "kind": doc.kind,
+        }
+
+
+def ingest_directory(root, store, workers=None, force=False, max_pending=None):
+    """Extract every resume under root into store. Returns a summary dict."""
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    summary = {"files": 0, "extracted": 0, "skipped": 0, "failed": 0, "pages": 0,
+               "extract_seconds": 0.0, "wall_seconds": 0.0}
+    start = time.perf_counter()
+    seen_hashes = set()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def _collect(done):
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    print(f"Failed to extract {path}: {str(e)}")
+                    continue
+                store.put(replace=force, **record)
+                summary["extracted"] += 1
+                summary["pages"] += record["page_count"] or 0
+                summary["extract_seconds"] += record["extract_seconds"]
+
+        for path in iter_resume_files(root):
+            summary["files"] += 1
+            try:
+                file_hash = hash_file(path)
+            except OSError as e:
+                summary["failed"] += 1
+                print(f"Could not read {path}: {str(e)}")
+                continue
+            # Duplicates within this run and files already in the store skip parsing
+            if file_hash in seen_hashes or (not force and file_hash in store):
+                summary["skipped"] += 1
+                continue
+            seen_hashes.add(file_hash)
+
+            # Bound the number of in-flight files so memory stays flat for huge trees
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(done)
+            pending[pool.submit(extract_file, path)] = path
+
+            if summary["files"] % 100 == 0:
+                print(f"Scanned {summary['files']} files, extracted {summary['extracted']}, skipped {summary['skipped']}")
+
+        if pending:
+            done, _ = wait(pending)
+            _collect(done)
+
+    summary["wall_seconds"] = time.perf_counter() - start
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract resume text into the content-hashed text store")
+    parser.add_argument("directory", help="Directory tree containing PDF/TXT resumes")
+    parser.add_argument("--store", default=os.getenv("TEXT_STORE_PATH", "text_store/extracted_text.db"),
+                        help="Path of the extracted-text store (SQLite file)")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-extract files already in the store")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"Not a directory: {args.directory}")
+        return 1
+
+    store = ExtractedTextStore(args.store)
+    summary = ingest_directory(args.directory, store, workers=args.workers, force=args.force)
+
+    print(f"Files: {summary['files']}  extracted: {summary['extracted']}  "
+          f"skipped: {summary['skipped']}  failed: {summary['failed']}")
+    print(f"Pages: {summary['pages']}  extraction CPU time: {summary['extract_seconds']:.1f}s  "
+          f"wall time: {summary['wall_seconds']:.1f}s")
+    stats = store.stats()
+    print(f"Store: {stats['documents']} documents, {stats['text_chars']} chars "
+          f"in {stats['stored_bytes']} compressed bytes")
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,485 @@
+"""
+Multi-session load test for the Streamlit app.
+
+Simulates N concurrent sessions in one process, the way one Streamlit
+server serves them: every session is a thread with its own script-run
+context and session state, and all of them share the imported app and its
+one cached agent (LRU caches, thread pools, GIL). Each session uploads a
+resume, analyzes it and renders the results page.
+
+All OpenAI traffic goes to a local stub server with configurable latency and
+error rates, so runs cost nothing and are repeatable. The stub runs in a
+separate process, so the CPU and memory reported per level are those of the
+app process alone. Each concurrency level reports throughput, p50/p95/p99
+latency, CPU and memory, and the report names the level where latency starts
+to degrade.
+
+A level fails when the stub saw no embedding requests or an analysis fell
+back to scoring without the resume index, since latency is then not that of
+the real path. OpenAIEmbeddings needs tiktoken's cl100k_base encoding; pass
+--tiktoken-cache (or set TIKTOKEN_CACHE_DIR) on machines that cannot
+download it.
+
+Usage:
+    python loadtest.py --levels 1,2,4,8,16 --iterations 3 --llm-latency-ms 800
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SAMPLE_SKILLS = ["Python", "SQL", "Docker", "Kubernetes", "AWS", "Machine Learning",
+                 "React", "Git", "REST APIs", "PostgreSQL", "TensorFlow", "CI/CD"]
+
+
+class EndpointProfile:
+    """Latency and failure behaviour of one stub endpoint"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+    def delay(self, rng):
+        return max(0.0, (self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+
+
+class StubOpenAIServer:
+    """Local OpenAI-compatible server for /chat/completions and /embeddings"""
+
+    def __init__(self, chat_profile, embedding_profile, embedding_dim=1536, host="127.0.0.1", port=0, seed=0):
+        self.chat_profile = chat_profile
+        self.embedding_profile = embedding_profile
+        self.embedding_dim = embedding_dim
+        self.requests = {"chat": 0, "embeddings": 0, "errors": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def _random(self):
+        with self._lock:
+            return random.Random(self._rng.random())
+
+    def _count(self, key):
+        with self._lock:
+            self.requests[key] += 1
+
+    def chat_content(self, prompt, rng):
+        """Plausible response for each prompt the agent sends"""
+        if "Extract and list the key skills" in prompt:
+            return json.dumps(rng.sample(SAMPLE_SKILLS, 8))
+        if "JSON format" in prompt:
+            return json.dumps({
+                "weakness": "The resume does not show hands-on use of this skill.",
+                "improvement_suggestions": ["Add a project", "List a certification", "Quantify impact"],
+                "example_addition": "Built and shipped a service used by 10k users.",
+            })
+        return f"{rng.randint(2, 10)} - the resume shows related experience in the retrieved sections."
+
+    def embedding(self, item):
+        """Deterministic unit vector for one input (text or token ids)"""
+        seed = hashlib.sha256(json.dumps(item).encode("utf-8")).digest()
+        rng = random.Random(seed)
+        vector = [rng.gauss(0, 1) for _ in range(self.embedding_dim)]
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/stats"):
+                    with stub._lock:
+                        self._send(200, dict(stub.requests))
+                else:
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                rng = stub._random()
+                if self.path.endswith("/chat/completions"):
+                    kind, profile = "chat", stub.chat_profile
+                elif self.path.endswith("/embeddings"):
+                    kind, profile = "embeddings", stub.embedding_profile
+                else:
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                stub._count(kind)
+                time.sleep(profile.delay(rng))
+                if rng.random() < profile.error_rate:
+                    stub._count("errors")
+                    self._send(500, {"error": {"message": "Injected stub failure", "type": "server_error"}})
+                    return
+
+                if kind == "chat":
+                    prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+                    content = stub.chat_content(prompt, rng)
+                    self._send(200, {
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": request.get("model", "stub"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}],
+                        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                                  "total_tokens": (len(prompt) + len(content)) // 4},
+                    })
+                else:
+                    inputs = request.get("input", [])
+                    if not isinstance(inputs, list) or (inputs and isinstance(inputs[0], int)):
+                        inputs = [inputs]
+                    self._send(200, {
+                        "object": "list",
+                        "model": request.get("model", "stub"),
+                        "data": [{"object": "embedding", "index": i, "embedding": stub.embedding(item)}
+                                 for i, item in enumerate(inputs)],
+                        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+                    })
+
+        return Handler
+
+
+def serve_stub(chat_profile, embedding_profile, seed, ready):
+    """Run a StubOpenAIServer in this process (started apart from the app) until terminated"""
+    server = StubOpenAIServer(chat_profile, embedding_profile, seed=seed)
+    ready.put(server.base_url)
+    server.serve_forever()
+
+
+def stub_requests(base_url):
+    """Request counts seen so far by the stub server at base_url"""
+    with urllib.request.urlopen(f"{base_url}/stats", timeout=10) as response:
+        return json.loads(response.read())
+
+
+def make_resume(session_index, iteration, skills, rng):
+    """A distinct synthetic resume per run so content-keyed caches do not hide the work"""
+    lines = [f"Candidate {session_index}-{iteration}-{rng.random():.8f}", "", "SUMMARY",
+             "Engineer with experience delivering production systems.", "", "EXPERIENCE"]
+    for year in range(2015, 2024):
+        used = rng.sample(skills, min(3, len(skills)))
+        lines.append(f"Senior Engineer, Company {rng.randint(1, 999)} ({year} - {year + 1})")
+        lines.append(f"- Built services with {', '.join(used)}, improving throughput by {rng.randint(5, 60)}%.")
+    lines += ["", "SKILLS", ", ".join(rng.sample(skills, len(skills) // 2))]
+    return "\n".join(lines).encode("utf-8")
+
+
+def session_context(session_id):
+    """Script-run context of one browser session, like the one Streamlit gives each session's thread"""
+    from streamlit.runtime.fragment import MemoryFragmentStorage
+    from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.runtime.scriptrunner import ScriptRunContext
+    from streamlit.runtime.state import SafeSessionState, SessionState
+
+    main_script = os.path.join(REPO_DIR, "app.py")
+    return ScriptRunContext(
+        session_id=session_id,
+        _enqueue=lambda msg: None,
+        query_string="",
+        session_state=SafeSessionState(SessionState(), yield_callback=lambda: None),
+        uploaded_file_mgr=MemoryUploadedFileManager("/_stcore/upload_file"),
+        main_script_path=main_script,
+        user_info={"email": "loadtest@localhost"},
+        fragment_storage=MemoryFragmentStorage(),
+        pages_manager=PagesManager(main_script),
+    )
+
+
+def session_run(app_module, resume_bytes, skills, cutoff_score):
+    """One script run of a session: upload, analyze and render, as app.main() does for these inputs"""
+    from agent import DIRECT_ANALYSIS_REASONING
+
+    record = {"success": False}
+    start = time.perf_counter()
+    app = app_module.ResumeAnalysisApp()
+    app.initialize_agent()
+    upload = io.BytesIO(resume_bytes)
+    upload.name = "resume.txt"
+    record["upload"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    success, result = app.analyze_resume(upload, role_requirements=skills, cutoff_score=cutoff_score)
+    record["analyze"] = time.perf_counter() - start
+    if not success:
+        record["error"] = str(result)[:200]
+        return record
+    if result.get("reasoning") == DIRECT_ANALYSIS_REASONING:
+        # Indexing failed and the agent fell back; this is not the path under test
+        record["error"] = "Resume indexing failed; the analysis fell back to direct scoring"
+        return record
+    record["skill_errors"] = sum(1 for reasoning in result.get("skill_reasonings", {}).values()
+                                 if reasoning.startswith(("Error:", "Analysis skipped")))
+
+    start = time.perf_counter()
+    app.render_analysis_results(result)
+    record["render"] = time.perf_counter() - start
+    record["success"] = True
+    return record
+
+
+def run_session(app_module, concurrency, session_index, iterations, skills, cutoff_score, seed):
+    """Run one simulated session's analyses on this thread. Returns per-run timing dicts."""
+    from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+    ctx = session_context(uuid.uuid4().hex)
+    add_script_run_ctx(threading.current_thread(), ctx)
+    # Every level, session and iteration gets its own resumes; a resume seen at an
+    # earlier level would be answered by the analysis store instead of analyzed
+    rng = random.Random(f"{seed}:{concurrency}:{session_index}")
+    runs = []
+    try:
+        for iteration in range(iterations):
+            resume_bytes = make_resume(session_index, iteration, skills, rng)
+            # Each analysis is a new script run of the same session
+            ctx.reset()
+            started = time.perf_counter()
+            try:
+                record = session_run(app_module, resume_bytes, skills, cutoff_score)
+            except Exception as e:
+                record = {"success": False, "error": str(e)[:200]}
+            record["total"] = time.perf_counter() - started
+            runs.append(record)
+    finally:
+        add_script_run_ctx(threading.current_thread(), None)
+    return runs
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class RSSSampler:
+    """Highest resident set size of this process while the sampler runs"""
+
+    def __init__(self, interval=0.05):
+        from session_store import process_memory
+        self._process_memory = process_memory
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            self.peak = max(self.peak, self._process_memory()["rss"] or 0)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def run_level(app_module, stub_url, concurrency, iterations, skills, cutoff_score, seed):
+    """Drive `concurrency` session threads at once against the shared app and summarize the level.
+
+    CPU and memory are this process's only: the app, its shared agent and the
+    session threads. The stub server runs in another process.
+    """
+    from session_store import process_memory
+
+    before = stub_requests(stub_url)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    with RSSSampler() as rss, ThreadPoolExecutor(max_workers=concurrency,
+                                                 thread_name_prefix="loadtest-session") as pool:
+        futures = [pool.submit(run_session, app_module, concurrency, i, iterations, skills, cutoff_score, seed)
+                   for i in range(concurrency)]
+        runs = [run for future in futures for run in future.result()]
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    after = stub_requests(stub_url)
+    requests = {key: after[key] - before.get(key, 0) for key in after}
+
+    ok = [run for run in runs if run.get("success")]
+    totals = [run["total"] for run in ok]
+    failures = [run["error"] for run in runs if run.get("error")]
+    if not requests.get("embeddings"):
+        failures.insert(0, "The stub server saw no embedding requests; resumes were never indexed")
+    return {
+        "concurrency": concurrency,
+        "analyses": len(runs),
+        "succeeded": len(ok),
+        "errors": len(runs) - len(ok),
+        "failed": bool(failures),
+        "throughput_per_min": 60 * len(ok) / wall if wall else 0.0,
+        "p50_seconds": percentile(totals, 50),
+        "p95_seconds": percentile(totals, 95),
+        "p99_seconds": percentile(totals, 99),
+        "analyze_p50_seconds": percentile([run["analyze"] for run in ok], 50),
+        "render_p50_seconds": percentile([run["render"] for run in ok], 50),
+        "skill_errors": sum(run.get("skill_errors", 0) for run in ok),
+        "cpu_cores_used": cpu / wall if wall else 0.0,
+        "peak_rss_mb": rss.peak / (1024 * 1024),
+        "rss_mb": (process_memory()["rss"] or 0) / (1024 * 1024),
+        "stub_requests": requests,
+        "wall_seconds": wall,
+        "sample_errors": sorted(set(failures))[:3],
+    }
+
+
+def find_degradation(levels, factor=1.5):
+    """First concurrency level whose p95 exceeds factor x the single-level baseline"""
+    baseline = next((level["p95_seconds"] for level in levels if level["p95_seconds"]), None)
+    if baseline is None:
+        return None
+    for level in levels:
+        if level["p95_seconds"] and level["p95_seconds"] > factor * baseline:
+            return level["concurrency"]
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the resume analyzer with stub OpenAI servers")
+    parser.add_argument("--levels", default="1,2,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--iterations", type=int, default=2, help="Analyses per session at each level")
+    parser.add_argument("--skills", type=int, default=8, help="Skills per analysis")
+    parser.add_argument("--cutoff", type=int, default=75)
+    parser.add_argument("--llm-latency-ms", type=float, default=500)
+    parser.add_argument("--llm-jitter-ms", type=float, default=250)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=50)
+    parser.add_argument("--embed-jitter-ms", type=float, default=20)
+    parser.add_argument("--embed-error-rate", type=float, default=0.0)
+    parser.add_argument("--degrade-factor", type=float, default=1.5,
+                        help="p95 growth over the lowest level that counts as degraded")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds allowed per analysis")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tiktoken-cache", default=os.getenv("TIKTOKEN_CACHE_DIR"),
+                        help="tiktoken cache holding cl100k_base, for machines that cannot download it")
+    parser.add_argument("--json", help="Write the full report to this JSON file")
+    args = parser.parse_args(argv)
+    if args.json:
+        # The run changes into a temporary directory below
+        args.json = os.path.abspath(args.json)
+
+    # OpenAIEmbeddings tokenizes every input with tiktoken before it reaches the stub;
+    # load the encoding now rather than have every analysis fall back without an index
+    sys.path.insert(0, REPO_DIR)
+    from cassette import TIKTOKEN_ENCODING, prepare_tiktoken
+    try:
+        if args.tiktoken_cache:
+            prepare_tiktoken(os.path.abspath(args.tiktoken_cache))
+        else:
+            import tiktoken
+            tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception as e:
+        print(f"Cannot load the tiktoken {TIKTOKEN_ENCODING} encoding ({e}). "
+              f"Run once with network access, or pass --tiktoken-cache with a cache that has it.")
+        return 2
+
+    # The stub runs in its own process so its CPU and memory are not counted as the app's
+    spawn = multiprocessing.get_context("spawn")
+    ready = spawn.Queue()
+    stub = spawn.Process(target=serve_stub, daemon=True, args=(
+        EndpointProfile(args.llm_latency_ms, args.llm_jitter_ms, args.llm_error_rate),
+        EndpointProfile(args.embed_latency_ms, args.embed_jitter_ms, args.embed_error_rate),
+        args.seed, ready,
+    ))
+    stub.start()
+    stub_url = ready.get(timeout=60)
+
+    # Point every OpenAI client at the stub and keep the run's files out of the real stores
+    workdir = tempfile.mkdtemp(prefix="resume_loadtest_")
+    os.environ["OPENAI_API_KEY"] = "sk-loadtest-stub"
+    os.environ["OPENAI_API_BASE"] = stub_url
+    os.environ["TEXT_STORE_PATH"] = os.path.join(workdir, "extracted_text.db")
+    os.environ["ANALYSIS_STORE_PATH"] = os.path.join(workdir, "analyses.db")
+    os.environ["NEAR_DUPLICATE_INDEX_PATH"] = os.path.join(workdir, "near_duplicates.db")
+    os.environ["ANALYSIS_TIMEOUT_SECONDS"] = str(args.timeout)
+    os.chdir(workdir)
+
+    # One app import and one shared agent for every session, as in a Streamlit server
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+    import app as app_module
+
+    skills = SAMPLE_SKILLS[:args.skills]
+    levels = []
+    failed = False
+    try:
+        for concurrency in [int(level) for level in re.split(r"[,\s]+", args.levels) if level]:
+            print(f"Running {concurrency} concurrent session(s) x {args.iterations} analyses...")
+            level = run_level(app_module, stub_url, concurrency, args.iterations, skills, args.cutoff, args.seed)
+            levels.append(level)
+            p = lambda v: "  n/a " if v is None else f"{v:6.2f}"
+            print(f"  {level['succeeded']}/{level['analyses']} ok  {level['throughput_per_min']:.1f}/min  "
+                  f"p50 {p(level['p50_seconds'])}s  p95 {p(level['p95_seconds'])}s  p99 {p(level['p99_seconds'])}s  "
+                  f"cpu {level['cpu_cores_used']:.2f} cores  rss {level['peak_rss_mb']:.0f} MB")
+            for error in level["sample_errors"]:
+                print(f"    error: {error}")
+            if level["failed"]:
+                print(f"FAILED at {concurrency} concurrent sessions: the analyses did not run the path under test.")
+                failed = True
+                break
+        # Let prefetched improvement suggestions finish before the stub goes away
+        app_module.get_shared_agent(os.environ["OPENAI_API_KEY"])._weakness_pool.shutdown(wait=True)
+        stub_totals = stub_requests(stub_url)
+    finally:
+        stub.terminate()
+
+    degraded_at = None
+    if not failed:
+        degraded_at = find_degradation(levels, args.degrade_factor)
+        if degraded_at is None:
+            print("No latency degradation within the tested levels.")
+        else:
+            print(f"Latency degrades (p95 > {args.degrade_factor}x baseline) at {degraded_at} concurrent sessions.")
+
+    report = {"config": vars(args), "levels": levels, "failed": failed, "degraded_at": degraded_at,
+              "stub_requests": stub_totals}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
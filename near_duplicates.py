@@ -0,0 +1,167 @@
+"""
+Near-duplicate resume detection with MinHash and LSH.
+
+Applicants often submit the same resume several times, or a lightly edited
+copy, across postings. Exact copies are caught by the analysis store's
+content hash; near copies are caught here.
+
+How a resume is indexed:
+- its normalized text is split into word shingles
+- a MinHash signature summarizes the shingles; the fraction of equal
+  signature positions estimates the Jaccard similarity of two resumes
+- signature bands are bucketed (locality-sensitive hashing), so a lookup only
+  compares resumes that share at least one bucket
+
+Signatures live in a SQLite file next to the analysis store, so every
+process and screening worker sees the same index.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Prime just above 2**32; with a < 2**31 and 32-bit shingle hashes, a * h + b fits in uint64
+_PRIME = np.uint64(4294967311)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text, size=5):
+    """Set of word shingles of lowercased, punctuation-free text"""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures over word shingles"""
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 31, num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2 ** 32, num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        """uint64 signature of num_perm values (all equal to the prime for empty text)"""
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+             for s in shingles(text, self.shingle_size)),
+            dtype=np.uint64,
+        )
+        signature = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        # Blocks keep the shingle x permutation matrix small for very long documents
+        for start in range(0, len(hashes), 4096):
+            block = hashes[start:start + 4096, None]
+            signature = np.minimum(signature, ((block * self._a + self._b) % _PRIME).min(axis=0))
+        return signature
+
+    @staticmethod
+    def similarity(first, second):
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.mean(first == second))
+
+
+class NearDuplicateIndex:
+    """Persistent LSH index of resume signatures keyed by document content hash"""
+
+    def __init__(self, path="analysis_store/near_duplicates.db", threshold=0.9, num_perm=128, bands=16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS signatures (
+                    resume_hash TEXT PRIMARY KEY,
+                    source TEXT,
+                    signature BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS buckets (
+                    band INTEGER NOT NULL,
+                    bucket TEXT NOT NULL,
+                    resume_hash TEXT NOT NULL,
+                    PRIMARY KEY (band, bucket, resume_hash)
+                )"""
+            )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation, as in the other stores
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _buckets(self, signature):
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            yield band, hashlib.blake2b(rows.tobytes(), digest_size=8).hexdigest()
+
+    def add(self, resume_hash, text, source=None):
+        """Index (or re-index) a resume's text under its document hash"""
+        signature = self.hasher.signature(text)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO signatures (resume_hash, source, signature, created_at) VALUES (?, ?, ?, ?)",
+                (resume_hash, source, signature.tobytes(), time.time()),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO buckets (band, bucket, resume_hash) VALUES (?, ?, ?)",
+                ((band, bucket, resume_hash) for band, bucket in self._buckets(signature)),
+            )
+
+    def query(self, text, exclude=None):
+        """Indexed resumes at least threshold-similar to text, most similar first.
+
+        Returns dicts with "resume_hash", "source" and "similarity".
+        """
+        signature = self.hasher.signature(text)
+        buckets = list(self._buckets(signature))
+        with self._connect() as conn:
+            candidates = {
+                row[0] for band, bucket in buckets
+                for row in conn.execute("SELECT resume_hash FROM buckets WHERE band = ? AND bucket = ?",
+                                        (band, bucket))
+            }
+            candidates.discard(exclude)
+            rows = [
+                conn.execute("SELECT resume_hash, source, signature FROM signatures WHERE resume_hash = ?",
+                             (resume_hash,)).fetchone()
+                for resume_hash in candidates
+            ]
+        matches = []
+        for row in rows:
+            if row is None:
+                continue
+            other = np.frombuffer(row[2], dtype=np.uint64)
+            if len(other) != len(signature):
+                continue  # Indexed with other MinHash settings
+            similarity = self.hasher.similarity(signature, other)
+            if similarity >= self.threshold:
+                matches.append({"resume_hash": row[0], "source": row[1], "similarity": similarity})
+        return sorted(matches, key=lambda match: match["similarity"], reverse=True)
+
+    def stats(self):
+        """Number of indexed resumes"""
+        with self._connect() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+        return {"resumes": count, "threshold": self.threshold}
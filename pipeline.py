@@ -0,0 +1,85 @@
+"""
+Streaming extract -> chunk -> embed pipeline for resume indexes.
+
+Without it, the stages run one after another: every page is extracted into
+one string, the string is chunked, and all chunks are embedded in one call.
+build_index() overlaps the stages instead:
+- pages come from a generator (ResumeDocument.iter_pages) and are split into
+  lines as they arrive
+- sections.iter_chunks emits each chunk as soon as its section or role is
+  complete
+- chunks are grouped into batches, and a background thread embeds them while
+  later pages are still being parsed
+
+The queue between the chunker and the embedder holds at most max_pending
+batches. When embedding falls behind, parsing waits. Memory for work in
+progress therefore stays bounded for any document length; only the index
+itself and the document text grow with the document.
+"""
+
+import queue
+import threading
+
+import numpy as np
+
+from document import iter_normalized_lines
+from sections import iter_chunks
+
+
+def build_index(pages, embeddings, index_factory, batch_size=16, max_pending=2, max_chars=1200):
+    """Stream page texts through chunking and embedding into a vectorstore.
+
+    Returns (vectorstore, raw_pages). raw_pages lists the page texts consumed.
+    vectorstore is None when no chunk was found or embedding failed. Pages
+    are consumed to the end either way, so the text is always complete.
+    """
+    batches = queue.Queue(maxsize=max_pending)
+    vectors = []
+    failures = []
+
+    def _embed():
+        while True:
+            batch = batches.get()
+            if batch is None:
+                return
+            if failures:
+                continue  # Keep draining so the chunker never blocks
+            try:
+                vectors.append(np.asarray(embeddings.embed_documents(batch), dtype=np.float32))
+            except Exception as e:
+                failures.append(e)
+
+    raw_pages = []
+
+    def _pages():
+        for page in pages:
+            raw_pages.append(page)
+            yield page
+
+    worker = threading.Thread(target=_embed, name="index-embed", daemon=True)
+    worker.start()
+    texts, metadatas, batch = [], [], []
+    try:
+        for chunk, metadata in iter_chunks(iter_normalized_lines(_pages()), max_chars):
+            texts.append(chunk)
+            metadatas.append(metadata)
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                batches.put(batch)
+                batch = []
+        if batch:
+            batches.put(batch)
+    except BaseException as e:
+        # Cancelled or failed while parsing: let the embedder drain without waiting for it
+        failures.append(e)
+        batches.put(None)
+        raise
+    batches.put(None)
+    worker.join()
+
+    if failures:
+        print(f"Embedding failed while indexing: {str(failures[0])}")
+        return None, raw_pages
+    if not texts:
+        return None, raw_pages
+    return index_factory.from_vectors(texts, np.vstack(vectors), embeddings, metadatas), raw_pages
@@ -0,0 +1,110 @@
+"""
+Embedding-similarity pre-scoring of skills.
+
+Estimates a 0-10 score for every skill at once, without LLM calls:
+1. Embed all skills and all resume chunks.
+2. Compute the full skill x chunk cosine similarity matrix in one matrix
+   product.
+3. Aggregate each skill's row: the maximum, or the mean of the top k.
+4. Map that value linearly onto 0-10 between two calibrated thresholds.
+   `low` is the similarity of unrelated text and maps to 0; `high` is a clear
+   match and maps to 10.
+
+Estimates can stand alone (fast mode), or route to the LLM only the skills
+whose estimate falls in the ambiguous middle band.
+
+The default thresholds suit text-embedding-ada-002, whose cosine
+similarities bunch up between about 0.7 and 0.9. fit_thresholds() derives
+new ones from skills that were also scored by the LLM; run
+`python vector_index.py calibrate` to fit them on the saved analyses and
+print the PRESCORE_SIMILARITY_LOW/HIGH values.
+"""
+
+import numpy as np
+
+
+def similarity_matrix(skill_vectors, chunk_vectors):
+    """Cosine similarity of every skill (rows) against every chunk (columns)"""
+    skills = np.asarray(skill_vectors, dtype=np.float32)
+    chunks = np.asarray(chunk_vectors, dtype=np.float32)
+    skills = skills / (np.linalg.norm(skills, axis=1, keepdims=True) + 1e-12)
+    chunks = chunks / (np.linalg.norm(chunks, axis=1, keepdims=True) + 1e-12)
+    return skills @ chunks.T
+
+
+def fit_thresholds(similarities, scores):
+    """(low, high) thresholds from a least-squares fit of 0-10 scores on similarity"""
+    similarities = np.asarray(similarities, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    if len(similarities) < 2 or np.ptp(similarities) == 0:
+        raise ValueError("Need at least two samples with different similarities to calibrate")
+    slope, intercept = np.polyfit(similarities, scores, 1)
+    if slope <= 0:
+        raise ValueError("Scores do not increase with similarity; thresholds cannot be fitted")
+    return float(-intercept / slope), float((10 - intercept) / slope)
+
+
+def calibration_samples(analyses, get_text, embeddings, chunker, top_k=1):
+    """(similarities, scores) of LLM-scored skills, one sample per resume and skill.
+
+    analyses yields (resume_hash, AnalysisResult) newest first, as
+    AnalysisStore.iter_results() does; get_text(resume_hash) returns the
+    extracted text and chunker(text) its chunks. Similarity estimates and near-duplicate reuses are skipped,
+    since their scores were not given by the LLM for that resume's text.
+    """
+    aggregate = SimilarityScorer(top_k=top_k).aggregate
+    pending = {}
+    for resume_hash, result in analyses:
+        if result.extras.get("near_duplicate"):
+            continue
+        estimated = set(result.extras.get("estimated_skills", []))
+        skills = pending.setdefault(resume_hash, {})
+        for skill, score in zip(result.skills, result.scores):
+            if skill not in estimated:
+                skills.setdefault(skill, score)
+
+    similarities, scores = [], []
+    for resume_hash, skills in pending.items():
+        text = get_text(resume_hash) if skills else None
+        if not text:
+            continue
+        chunks = chunker(text)
+        if not chunks:
+            continue
+        names = list(skills)
+        matrix = similarity_matrix(embeddings.embed_documents(names), embeddings.embed_documents(chunks))
+        similarities.extend(aggregate(matrix).tolist())
+        scores.extend(skills[name] for name in names)
+    return similarities, scores
+
+
+class SimilarityScorer:
+    """Map skill/chunk similarity to 0-10 estimates and flag the ambiguous ones"""
+
+    def __init__(self, low=0.72, high=0.86, top_k=1, ambiguous_band=(3, 7)):
+        if high <= low:
+            raise ValueError("Similarity threshold high must be greater than low")
+        self.low = low
+        self.high = high
+        self.top_k = top_k
+        self.ambiguous_band = ambiguous_band
+
+    def aggregate(self, similarities):
+        """Per-skill similarity: row maximum, or mean of the top_k chunks"""
+        if self.top_k <= 1 or similarities.shape[1] <= 1:
+            return similarities.max(axis=1)
+        k = min(self.top_k, similarities.shape[1])
+        top = np.partition(similarities, -k, axis=1)[:, -k:]
+        return top.mean(axis=1)
+
+    def estimate(self, skill_vectors, chunk_vectors):
+        """(scores, similarities): integer 0-10 estimates and the aggregated similarity per skill"""
+        similarities = self.aggregate(similarity_matrix(skill_vectors, chunk_vectors))
+        scaled = (similarities - self.low) / (self.high - self.low) * 10
+        scores = np.clip(np.rint(scaled), 0, 10).astype(int)
+        return scores.tolist(), similarities.tolist()
+
+    def is_ambiguous(self, score):
+        """True when an estimate is too uncertain to use without an LLM check"""
+        lower, upper = self.ambiguous_band
+        return lower <= score <= upper
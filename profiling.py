@@ -0,0 +1,133 @@
+"""
+Opt-in CPU and memory profiling of individual analyses.
+
+When profiling is on, each analysis runs under cProfile and tracemalloc.
+The result is saved under the profile directory as two artifacts:
+- <id>.prof       cProfile stats, loadable with pstats, snakeviz, tuna or
+                  gprof2dot
+- <id>.alloc.txt  wall/CPU time, peak traced memory and the top allocation
+                  sites
+
+Only the newest `keep` profiles are retained.
+
+cProfile follows the thread that runs the analysis. Time spent in scoring
+worker threads shows up as waiting on their futures. Set
+SKILL_SCORING_WORKERS=1 to see those calls broken down. tracemalloc covers
+all threads.
+"""
+
+import cProfile
+import os
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class AnalysisProfiler:
+    """Profile analyses one at a time and keep the newest artifacts on disk"""
+
+    def __init__(self, directory="profiles", keep=20, top_allocations=25, frames=10):
+        self.directory = directory
+        self.keep = keep
+        self.top_allocations = top_allocations
+        self.frames = frames
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def profile(self, label="analysis"):
+        """Profile the enclosed block and save its artifacts.
+
+        Yields the artifact record (filled in on exit), or None when another
+        analysis is already being profiled; that block then runs unprofiled.
+        """
+        if not self._lock.acquire(blocking=False):
+            yield None
+            return
+        record = {}
+        started_tracing = not tracemalloc.is_tracing()
+        try:
+            if started_tracing:
+                tracemalloc.start(self.frames)
+            tracemalloc.reset_peak()
+            profiler = cProfile.Profile()
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            profiler.enable()
+            try:
+                yield record
+            finally:
+                profiler.disable()
+                wall = time.perf_counter() - wall_start
+                cpu = time.process_time() - cpu_start
+                snapshot = tracemalloc.take_snapshot()
+                _current, peak = tracemalloc.get_traced_memory()
+                try:
+                    record.update(self._save(label, profiler, snapshot, wall, cpu, peak))
+                except OSError as e:
+                    print(f"Could not save profile for {label}: {str(e)}")
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            self._lock.release()
+
+    def _save(self, label, profiler, snapshot, wall, cpu, peak):
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(label))[:60] or "analysis"
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{safe_label}"
+        prof_path = os.path.join(self.directory, f"{profile_id}.prof")
+        alloc_path = os.path.join(self.directory, f"{profile_id}.alloc.txt")
+
+        profiler.dump_stats(prof_path)
+
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        lines = [
+            f"Analysis: {label}",
+            f"Wall time: {wall:.3f}s",
+            f"CPU time: {cpu:.3f}s",
+            f"Peak traced memory: {peak / (1024 * 1024):.1f} MB",
+            "",
+            f"Top {self.top_allocations} allocation sites (live at end of analysis):",
+        ]
+        for index, stat in enumerate(snapshot.statistics("traceback")[:self.top_allocations], 1):
+            lines.append(f"#{index}: {stat.size / 1024:.1f} KB in {stat.count} blocks")
+            lines.extend(f"    {line}" for line in stat.traceback.format(limit=self.frames))
+        with open(alloc_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+        self._prune()
+        return {"id": profile_id, "profile_path": prof_path, "allocations_path": alloc_path,
+                "wall_seconds": wall, "cpu_seconds": cpu, "peak_bytes": peak}
+
+    def _prune(self):
+        """Delete all but the newest `keep` profiles"""
+        for profile in self.list()[self.keep:]:
+            for path in (profile["profile_path"], profile["allocations_path"]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def list(self):
+        """Saved profiles, newest first"""
+        profiles = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".prof"):
+                continue
+            profile_id = filename[:-len(".prof")]
+            prof_path = os.path.join(self.directory, filename)
+            try:
+                created = os.path.getmtime(prof_path)
+            except OSError:
+                continue
+            profiles.append({
+                "id": profile_id,
+                "profile_path": prof_path,
+                "allocations_path": os.path.join(self.directory, f"{profile_id}.alloc.txt"),
+                "created_at": created,
+            })
+        profiles.sort(key=lambda p: (p["created_at"], p["id"]), reverse=True)
+        return profiles
@@ -0,0 +1,220 @@
+"""
+Compact representation of a resume analysis result.
+
+Only the per-skill data is stored (skill names, 0-10 scores packed into bytes,
+reasonings and weakness text). Everything derived from it - overall score,
+selection, strengths, missing skills, improvement areas - is computed on
+access, so a result keeps a single copy of each value while still reading
+like the original results dict (results.get("overall_score"), etc.).
+"""
+
+from collections.abc import Mapping
+
+STRENGTH_THRESHOLD = 7
+MISSING_THRESHOLD = 5
+
+
+def compute_overall_score(scores, skill_count=None):
+    """Overall match percentage for a list of 0-10 skill scores"""
+    skill_count = len(scores) if skill_count is None else skill_count
+    return int((sum(scores) / (skill_count * 10)) * 100) if skill_count else 0
+
+
+def score_bounds(known_scores, total_skills):
+    """Lowest and highest reachable overall score given the scores known so far"""
+    known_sum = sum(known_scores)
+    remaining = total_skills - len(known_scores)
+    lower = compute_overall_score([known_sum], total_skills)
+    upper = compute_overall_score([known_sum + 10 * remaining], total_skills)
+    return lower, upper
+
+
+def screening_decision(skills, scored, cutoff_score):
+    """True/False once the selection outcome can no longer change, None while it still can.
+
+    scored maps skill -> score or (score, reasoning).
+    """
+    known = [scored[skill] for skill in skills if skill in scored]
+    known = [value[0] if isinstance(value, tuple) else value for value in known]
+    lower, upper = score_bounds(known, len(skills))
+    if lower >= cutoff_score:
+        return True
+    if upper < cutoff_score:
+        return False
+    return None
+
+
+class AnalysisResult(Mapping):
+    """Read-only, dict-like view over compactly stored analysis data"""
+
+    __slots__ = ("analysis_id", "skills", "scores", "reasonings", "cutoff_score",
+                 "reasoning", "weaknesses", "extras")
+
+    _DERIVED_KEYS = ("overall_score", "skill_scores", "skill_reasonings", "selected",
+                     "reasoning", "missing_skills", "strengths", "improvement_areas")
+
+    def __init__(self, skills, scores, reasonings, cutoff_score, reasoning="",
+                 analysis_id=None, weaknesses=None, extras=None):
+        self.analysis_id = analysis_id
+        self.skills = tuple(skills)
+        self.scores = bytes(min(max(int(score), 0), 10) for score in scores)
+        self.reasonings = tuple(reasonings)
+        self.cutoff_score = cutoff_score
+        self.reasoning = reasoning
+        # Weakness entries are stored without their score; it is looked up from self.scores
+        self.weaknesses = tuple(
+            {key: value for key, value in weakness.items() if key != "score"}
+            for weakness in (weaknesses or [])
+        )
+        self.extras = dict(extras or {})
+
+    @classmethod
+    def from_scores(cls, skill_scores, skill_reasonings, cutoff_score, reasoning="", **kwargs):
+        """Build a result from skill -> score and skill -> reasoning dicts"""
+        skills = list(skill_scores.keys())
+        return cls(
+            skills,
+            [skill_scores[skill] for skill in skills],
+            [skill_reasonings.get(skill, "") for skill in skills],
+            cutoff_score,
+            reasoning,
+            **kwargs
+        )
+
+    # Derived values
+
+    @property
+    def overall_score(self):
+        return compute_overall_score(self.scores)
+
+    @property
+    def selected(self):
+        """True/False, or None for a partial result whose outcome is undetermined"""
+        # Early-exit screening results carry the decision reached from the score bounds
+        decision = self.extras.get("screening_decision")
+        if decision is not None:
+            return decision
+        if self.extras.get("partial"):
+            # Scores of the skills finished so far say nothing about the ones never scored
+            return None
+        return self.overall_score >= self.cutoff_score
+
+    @property
+    def missing_skills(self):
+        return [skill for skill, score in zip(self.skills, self.scores) if score <= MISSING_THRESHOLD]
+
+    @property
+    def strengths(self):
+        return [skill for skill, score in zip(self.skills, self.scores) if score >= STRENGTH_THRESHOLD]
+
+    def score_of(self, skill, default=0):
+        """Score for one skill (or an alias of it) without building the full skill_scores dict"""
+        skill = self.extras.get("skill_aliases", {}).get(skill, skill)
+        try:
+            return self.scores[self.skills.index(skill)]
+        except ValueError:
+            return default
+
+    @property
+    def cache_key(self):
+        """Identifies this exact view of the result for memoized rendering"""
+        return f"{self.analysis_id}:{self.cutoff_score}:{len(self.weaknesses)}"
+
+    def _replace(self, **changes):
+        """Copy of this result with some stored fields replaced (data is shared, not copied)"""
+        fields = {
+            "skills": self.skills,
+            "scores": self.scores,
+            "reasonings": self.reasonings,
+            "cutoff_score": self.cutoff_score,
+            "reasoning": self.reasoning,
+            "analysis_id": self.analysis_id,
+            "weaknesses": self.weaknesses,
+            "extras": self.extras,
+        }
+        fields.update(changes)
+        return AnalysisResult(**fields)
+
+    def with_weaknesses(self, weaknesses):
+        """Return a copy of this result carrying the given weakness entries"""
+        return self._replace(weaknesses=weaknesses)
+
+    def with_extras(self, **extras):
+        """Return a copy of this result with additional extra fields"""
+        return self._replace(extras=dict(self.extras, **extras))
+
+    def with_cutoff(self, cutoff_score):
+        """Return a copy of this result judged against a different cutoff.
+
+        Selection and improvement areas are derived values, so this needs no
+        re-scoring at all.
+        """
+        return self._replace(cutoff_score=cutoff_score)
+
+    # Mapping interface
+
+    def __getitem__(self, key):
+        if key == "overall_score":
+            return self.overall_score
+        if key == "skill_scores":
+            return dict(zip(self.skills, self.scores))
+        if key == "skill_reasonings":
+            return dict(zip(self.skills, self.reasonings))
+        if key == "selected":
+            return self.selected
+        if key == "reasoning":
+            return self.reasoning
+        if key == "missing_skills":
+            return self.missing_skills
+        if key == "strengths":
+            return self.strengths
+        if key == "improvement_areas":
+            return [] if self.selected else self.missing_skills
+        if key == "resume_weaknesses" and self.weaknesses:
+            return [dict(weakness, score=self.score_of(weakness.get("skill"))) for weakness in self.weaknesses]
+        if key == "analysis_id" and self.analysis_id is not None:
+            return self.analysis_id
+        if key in self.extras:
+            return self.extras[key]
+        raise KeyError(key)
+
+    def _keys(self):
+        keys = list(self._DERIVED_KEYS)
+        if self.weaknesses:
+            keys.append("resume_weaknesses")
+        if self.analysis_id is not None:
+            keys.append("analysis_id")
+        keys.extend(key for key in self.extras if key not in keys)
+        return keys
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def to_dict(self):
+        """Expand into a plain results dict (e.g. for JSON export)"""
+        return {key: self[key] for key in self._keys()}
+
+    def to_state(self):
+        """Stored fields as JSON-serializable data (see from_state)"""
+        return {
+            "analysis_id": self.analysis_id,
+            "skills": list(self.skills),
+            "scores": list(self.scores),
+            "reasonings": list(self.reasonings),
+            "cutoff_score": self.cutoff_score,
+            "reasoning": self.reasoning,
+            "weaknesses": list(self.weaknesses),
+            "extras": self.extras,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a result from to_state() data"""
+        return cls(**state)
+
+    def __repr__(self):
+        return (f"AnalysisResult(analysis_id={self.analysis_id!r}, skills={len(self.skills)}, "
+                f"overall_score={self.overall_score}, selected={self.selected})")
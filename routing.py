@@ -0,0 +1,179 @@
+"""
+Cost- and latency-tiered model routing for LLM calls.
+
+Each kind of call the agent makes is routed to a chain of model tiers from
+configuration. The first tier handles the call; if its answer fails the
+caller's validator (or the call errors), the call escalates to the next tier.
+Latency, call, error and escalation counts are recorded per tier. With a
+Hedger (see hedging.py), slow calls are duplicated and the first answer wins.
+
+Defaults: skill scoring and JD extraction run on the fast tier and escalate
+to the large tier; weakness write-ups go straight to the large tier. The app
+passes the MODEL_TIERS and MODEL_ROUTES from config.py.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from langchain_openai import ChatOpenAI
+
+from cancellation import AnalysisCancelled
+from cassette import async_openai_client, http_client
+
+# Call types used by the agent
+SKILL_SCORING = "skill_scoring"
+DIRECT_SCORING = "direct_scoring"
+JD_EXTRACTION = "jd_extraction"
+WEAKNESS = "weakness"
+
+DEFAULT_TIERS = {
+    "fast": "gpt-4o-mini",
+    "large": "gpt-4o",
+}
+
+DEFAULT_ROUTES = {
+    SKILL_SCORING: ("fast", "large"),
+    DIRECT_SCORING: ("fast", "large"),
+    JD_EXTRACTION: ("fast", "large"),
+    WEAKNESS: ("large",),
+}
+
+
+class _TierStats:
+    """Counters and a bounded latency window for one tier"""
+
+    def __init__(self, window=500):
+        self.calls = 0
+        self.errors = 0
+        self.escalations = 0
+        self.total_seconds = 0.0
+        self.latencies = deque(maxlen=window)
+
+    def snapshot(self):
+        ordered = sorted(self.latencies)
+
+        def _percentile(p):
+            if not ordered:
+                return None
+            return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "escalations": self.escalations,
+            "avg_seconds": self.total_seconds / self.calls if self.calls else None,
+            "p50_seconds": _percentile(50),
+            "p95_seconds": _percentile(95),
+        }
+
+
+class ModelRouter:
+    """Route LLM calls to model tiers with validation-based escalation"""
+
+    def __init__(self, api_key, tiers=None, routes=None, base_url=None, hedger=None):
+        self.api_key = api_key
+        self.hedger = hedger
+        self.tiers = dict(tiers or DEFAULT_TIERS)
+        self.routes = dict(routes or DEFAULT_ROUTES)
+        self.base_url = base_url or os.getenv("OPENAI_API_BASE") or None
+        for call_type, chain in self.routes.items():
+            unknown = [tier for tier in chain if tier not in self.tiers]
+            if unknown or not chain:
+                raise ValueError(f"Route for {call_type} uses unknown tier(s): {', '.join(unknown) or '(empty)'}")
+        self._clients = {}
+        self._stats = {tier: _TierStats() for tier in self.tiers}
+        self._lock = threading.Lock()
+
+    def llm(self, tier, temperature=0):
+        """Shared ChatOpenAI client for a tier and temperature"""
+        key = (tier, temperature)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                kwargs = {"model": self.tiers[tier], "openai_api_key": self.api_key, "temperature": temperature}
+                if self.base_url:
+                    kwargs["openai_api_base"] = self.base_url
+                # Custom HTTP client with UTF-8 encoding (and the cassette, when configured); a cassette
+                # that cannot be opened must fail here rather than fall back to the live API
+                http = http_client()
+                try:
+                    client = ChatOpenAI(
+                        http_client=http,
+                        async_client=async_openai_client(self.api_key, self.base_url).chat.completions,
+                        **kwargs
+                    )
+                except Exception:
+                    client = ChatOpenAI(**kwargs)
+                self._clients[key] = client
+            return client
+
+    def _call(self, tier, prompt, temperature, timeout=None):
+        """Invoke one tier, hedged when a Hedger is set. Returns the stripped response text."""
+        llm = self.llm(tier, temperature)
+
+        def _attempt():
+            response = llm.invoke(prompt) if timeout is None else llm.invoke(prompt, timeout=timeout)
+            return response.content.strip()
+
+        if self.hedger is None:
+            return _attempt()
+        return self.hedger.run(tier, _attempt)
+
+    def invoke(self, call_type, prompt, temperature=0, validator=None, cancel_token=None):
+        """Run prompt on the route for call_type and return the response text.
+
+        validator(text) -> bool decides whether an answer is acceptable; a rejected
+        answer or a failed call escalates to the next tier in the route. If every
+        tier rejects, the last answer is returned; if the last tier errors, the
+        error is raised. With a cancel_token, no tier is called once it has fired
+        and each call's timeout is capped at the time left before its deadline;
+        a call that fails once the token has fired (typically that timeout)
+        raises AnalysisCancelled rather than escalating.
+        """
+        chain = self.routes[call_type]
+        text = None
+        for position, tier in enumerate(chain):
+            is_last = position == len(chain) - 1
+            timeout = None
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+                timeout = cancel_token.remaining()
+            start = time.perf_counter()
+            try:
+                text = self._call(tier, prompt, temperature, timeout)
+            except Exception as e:
+                if cancel_token is not None and cancel_token.cancelled:
+                    # Cut off by the deadline (or a cancel), not a failure of the tier
+                    self._record(tier, time.perf_counter() - start, error=True)
+                    raise AnalysisCancelled(f"Analysis {cancel_token.reason}") from e
+                self._record(tier, time.perf_counter() - start, error=True, escalated=not is_last)
+                if is_last:
+                    raise
+                continue
+            accepted = validator is None or validator(text)
+            self._record(tier, time.perf_counter() - start, escalated=not accepted and not is_last)
+            if accepted:
+                return text
+        return text
+
+    def _record(self, tier, seconds, error=False, escalated=False):
+        with self._lock:
+            stats = self._stats[tier]
+            stats.calls += 1
+            stats.total_seconds += seconds
+            stats.latencies.append(seconds)
+            if error:
+                stats.errors += 1
+            if escalated:
+                stats.escalations += 1
+
+    def stats(self):
+        """Per-tier call counts, escalations and latency percentiles"""
+        with self._lock:
+            return {tier: dict(stats.snapshot(), model=self.tiers[tier]) for tier, stats in self._stats.items()}
+
+    def hedge_stats(self):
+        """Per-tier hedge rate and p99 with/without hedging, or {} when hedging is off"""
+        return self.hedger.stats() if self.hedger is not None else {}
@@ -0,0 +1,488 @@
+"""
+Sharded screening jobs over a shared SQLite task store.
+
+A coordinator splits a batch (a job description or skill list plus a set of
+resumes) into one task per resume and writes them to a task store. That
+store is a single SQLite file that every node can reach. Any number of
+worker processes, on one machine or many, then:
+1. claim tasks under a time-limited lease
+2. run ResumeAnalysisAgent.analyze_resume on them
+3. write the results back
+
+Leases are renewed while a worker is busy. If a worker dies, its leases run
+out and the tasks are handed to another worker, up to max_attempts times.
+Writing a result is idempotent: the first result for a task is kept and
+later duplicates are ignored.
+
+The store uses SQLite's rollback journal, not WAL, because WAL's shared
+memory index does not work across machines on network file systems. Paths
+in a batch are stored as given at submit time, so every node must see the
+resumes and the job description under the same paths.
+
+Usage:
+    python screening.py submit --jd jd.pdf --resumes resumes/ --store /shared/screening.db
+    python screening.py work --store /shared/screening.db --concurrency 4    # on every node
+    python screening.py status --store /shared/screening.db --watch 30
+    python screening.py export --store /shared/screening.db --batch <id> --out results.csv
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+
+from cancellation import CancellationToken
+from export import export_results
+from results import AnalysisResult
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+THROUGHPUT_WINDOW_SECONDS = 600
+RESULTS_PAGE_SIZE = 200
+
+
+class TaskStore:
+    """SQLite task table shared by the coordinator and all workers"""
+
+    def __init__(self, path="screening/tasks.db", max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS batches (
+                    batch_id TEXT PRIMARY KEY,
+                    jd_path TEXT,
+                    role_requirements TEXT,
+                    cutoff_score INTEGER,
+                    mode TEXT,
+                    scoring TEXT,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    batch_id TEXT NOT NULL,
+                    resume_path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    result BLOB,
+                    overall_score INTEGER,
+                    selected INTEGER,
+                    error TEXT,
+                    worker TEXT,
+                    created_at REAL NOT NULL,
+                    finished_at REAL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_batch_status ON tasks (batch_id, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_status_lease ON tasks (status, lease_expires)")
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_batch_path ON tasks (batch_id, resume_path)")
+
+    @contextmanager
+    def _connect(self, immediate=False):
+        # Short-lived connections; BEGIN IMMEDIATE serializes claims across processes and nodes
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def submit(self, resume_paths, jd_path=None, role_requirements=None, cutoff_score=75, mode="screen",
+               scoring="llm", batch_id=None):
+        """Create (or extend) a batch with one task per resume. Returns (batch_id, tasks added).
+
+        Without an explicit batch_id, the id is derived from the batch settings,
+        so submitting the same job again only adds resumes that are new to it.
+        """
+        if not jd_path and not role_requirements:
+            raise ValueError("A batch needs a job description file or a list of skills")
+        jd_path = os.path.abspath(jd_path) if jd_path else None
+        if batch_id is None:
+            batch_id = hashlib.sha256(json.dumps(
+                [jd_path, sorted(role_requirements or []), cutoff_score, mode, scoring]
+            ).encode("utf-8")).hexdigest()[:16]
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO batches (batch_id, jd_path, role_requirements, cutoff_score, mode, scoring, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (batch_id, jd_path, json.dumps(role_requirements) if role_requirements else None,
+                 cutoff_score, mode, scoring, now),
+            )
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (task_id, batch_id, resume_path, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((hashlib.sha256(f"{batch_id}:{path}".encode("utf-8")).hexdigest()[:32], batch_id, path, PENDING, now)
+                 for path in (os.path.abspath(p) for p in resume_paths)),
+            )
+            added = conn.total_changes - before
+        return batch_id, added
+
+    def claim(self, worker_id, lease_seconds, limit=1, batch_id=None):
+        """Lease up to limit runnable tasks (pending, or leased with an expired lease) to worker_id"""
+        now = time.time()
+        batch_filter = "AND t.batch_id = ?" if batch_id else ""
+        batch_params = (batch_id,) if batch_id else ()
+        with self._connect(immediate=True) as conn:
+            # Tasks whose leases ran out too often are given up on
+            conn.execute(
+                "UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+                "error = COALESCE(error, 'lease expired') WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, LEASED, now, self.max_attempts),
+            )
+            rows = conn.execute(
+                "SELECT t.task_id, t.batch_id, t.resume_path, t.attempts, b.jd_path, b.role_requirements, "
+                "b.cutoff_score, b.mode, b.scoring FROM tasks t JOIN batches b ON b.batch_id = t.batch_id "
+                f"WHERE (t.status = ? OR (t.status = ? AND t.lease_expires < ?)) {batch_filter} "
+                "ORDER BY t.created_at LIMIT ?",
+                (PENDING, LEASED, now, *batch_params, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE task_id = ?",
+                ((LEASED, worker_id, now + lease_seconds, row[0]) for row in rows),
+            )
+        return [
+            {"task_id": task_id, "batch_id": batch, "resume_path": resume_path, "attempt": attempts + 1,
+             "jd_path": jd_path, "role_requirements": json.loads(requirements) if requirements else None,
+             "cutoff_score": cutoff_score, "mode": mode, "scoring": scoring}
+            for task_id, batch, resume_path, attempts, jd_path, requirements, cutoff_score, mode, scoring in rows
+        ]
+
+    def renew(self, task_ids, worker_id, lease_seconds):
+        """Extend worker_id's leases on task_ids. Returns how many it still held."""
+        if not task_ids:
+            return 0
+        with self._connect(immediate=True) as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "UPDATE tasks SET lease_expires = ? WHERE task_id = ? AND lease_owner = ? AND status = ?",
+                ((time.time() + lease_seconds, task_id, worker_id, LEASED) for task_id in task_ids),
+            )
+            return conn.total_changes - before
+
+    def complete(self, task_id, worker_id, result):
+        """Store a task's result unless one was already stored. Returns whether this write won."""
+        payload = zlib.compress(json.dumps(result.to_state()).encode("utf-8"), 6)
+        with self._connect(immediate=True) as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, overall_score = ?, selected = ?, error = NULL, "
+                "worker = ?, lease_owner = NULL, lease_expires = NULL, finished_at = ? "
+                "WHERE task_id = ? AND status != ?",
+                (DONE, payload, result.overall_score,
+                 None if result.selected is None else int(result.selected), worker_id, time.time(),
+                 task_id, DONE),
+            )
+            return cursor.rowcount > 0
+
+    def fail(self, task_id, worker_id, error):
+        """Return a failed task to the queue, or mark it failed once it is out of attempts"""
+        with self._connect(immediate=True) as conn:
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, error = ?, "
+                "lease_owner = NULL, lease_expires = NULL WHERE task_id = ? AND lease_owner = ? AND status = ?",
+                (self.max_attempts, FAILED, PENDING, str(error)[:2000], task_id, worker_id, LEASED),
+            )
+
+    def release(self, task_ids, worker_id):
+        """Hand leased tasks back without counting the attempt (e.g. on shutdown)"""
+        with self._connect(immediate=True) as conn:
+            conn.executemany(
+                "UPDATE tasks SET status = ?, attempts = MAX(attempts - 1, 0), lease_owner = NULL, "
+                "lease_expires = NULL WHERE task_id = ? AND lease_owner = ? AND status = ?",
+                ((PENDING, task_id, worker_id, LEASED) for task_id in task_ids),
+            )
+
+    def retry_failed(self, batch_id=None):
+        """Queue failed tasks again with a fresh attempt budget. Returns how many."""
+        clause, params = ("AND batch_id = ?", (batch_id,)) if batch_id else ("", ())
+        with self._connect(immediate=True) as conn:
+            cursor = conn.execute(
+                f"UPDATE tasks SET status = ?, attempts = 0 WHERE status = ? {clause}", (PENDING, FAILED, *params)
+            )
+            return cursor.rowcount
+
+    def progress(self, batch_id=None):
+        """Task counts by status, recent throughput and an ETA, for one batch or all of them"""
+        clause, params = ("WHERE batch_id = ?", (batch_id,)) if batch_id else ("", ())
+        now = time.time()
+        with self._connect() as conn:
+            counts = dict(conn.execute(f"SELECT status, COUNT(*) FROM tasks {clause} GROUP BY status", params))
+            recent_clause = f"{clause} {'AND' if clause else 'WHERE'} status = ? AND finished_at >= ?"
+            recent = conn.execute(f"SELECT COUNT(*) FROM tasks {recent_clause}",
+                                  (*params, DONE, now - THROUGHPUT_WINDOW_SECONDS)).fetchone()[0]
+            workers = conn.execute(
+                f"SELECT COUNT(DISTINCT lease_owner) FROM tasks {clause} {'AND' if clause else 'WHERE'} "
+                "status = ? AND lease_expires >= ?", (*params, LEASED, now)
+            ).fetchone()[0]
+            started = conn.execute(f"SELECT MIN(created_at) FROM tasks {clause}", params).fetchone()[0]
+        total = sum(counts.values())
+        remaining = counts.get(PENDING, 0) + counts.get(LEASED, 0)
+        # A batch younger than the window has only been running since it was submitted
+        elapsed = min(THROUGHPUT_WINDOW_SECONDS, now - started) if started is not None else 0
+        per_minute = recent / (elapsed / 60) if elapsed > 0 else 0.0
+        return {
+            "total": total,
+            "pending": counts.get(PENDING, 0),
+            "leased": counts.get(LEASED, 0),
+            "done": counts.get(DONE, 0),
+            "failed": counts.get(FAILED, 0),
+            "active_workers": workers,
+            "per_minute": per_minute,
+            "eta_seconds": remaining / per_minute * 60 if per_minute else None,
+        }
+
+    def batches(self):
+        """All batches, newest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT batch_id, jd_path, role_requirements, cutoff_score, mode, scoring, created_at "
+                "FROM batches ORDER BY created_at DESC"
+            ).fetchall()
+        return [
+            {"batch_id": batch_id, "jd_path": jd_path,
+             "role_requirements": json.loads(requirements) if requirements else None,
+             "cutoff_score": cutoff_score, "mode": mode, "scoring": scoring, "created_at": created_at}
+            for batch_id, jd_path, requirements, cutoff_score, mode, scoring, created_at in rows
+        ]
+
+    def results(self, batch_id, page_size=RESULTS_PAGE_SIZE):
+        """Yield the finished results of a batch, each identified by its resume path.
+
+        Rows are read a page at a time (keyset pagination on resume_path), so an
+        export holds at most one page in memory and never keeps a read lock on
+        the store while the rows are being written out.
+        """
+        last_path = ""
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT resume_path, result FROM tasks WHERE batch_id = ? AND status = ? AND resume_path > ? "
+                    "ORDER BY resume_path LIMIT ?",
+                    (batch_id, DONE, last_path, page_size),
+                ).fetchall()
+            for resume_path, payload in rows:
+                state = json.loads(zlib.decompress(payload).decode("utf-8"))
+                yield AnalysisResult.from_state(dict(state, analysis_id=resume_path))
+            if len(rows) < page_size:
+                return
+            last_path = rows[-1][0]
+
+
+def run_task(agent, task, token=None):
+    """Analyze one claimed task. Returns an AnalysisResult or raises."""
+    result = agent.analyze_resume(
+        task["resume_path"],
+        role_requirements=task["role_requirements"],
+        custom_jd=task["jd_path"],
+        cutoff_score=task["cutoff_score"],
+        mode=task["mode"],
+        scoring=task["scoring"],
+        cancel_token=token,
+        weaknesses="eager",
+    )
+    if result is None:
+        raise ValueError("Analysis produced no result (no text or no skills)")
+    if result.get("cancelled"):
+        raise TimeoutError(f"Analysis {result.get('cancel_reason') or 'cancelled'}")
+    return result
+
+
+def run_worker(store, agent, worker_id=None, concurrency=2, lease_seconds=600, batch_id=None,
+               poll_seconds=5.0, exit_when_idle=False, analysis_timeout=None):
+    """Claim and analyze tasks until interrupted (or until none are left with exit_when_idle).
+
+    Returns a summary dict with completed / failed / duplicate counts.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    summary = {"completed": 0, "failed": 0, "duplicates": 0}
+    renew_every = max(lease_seconds / 3, 1)
+    last_renewal = time.monotonic()
+    start = time.perf_counter()
+    running = {}
+    tokens = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="screening") as pool:
+        try:
+            while True:
+                free = concurrency - len(running)
+                if free > 0:
+                    for task in store.claim(worker_id, lease_seconds, limit=free, batch_id=batch_id):
+                        token = CancellationToken(timeout=analysis_timeout)
+                        future = pool.submit(run_task, agent, task, token)
+                        running[future] = task
+                        tokens[future] = token
+
+                if not running:
+                    if exit_when_idle:
+                        break
+                    time.sleep(poll_seconds)
+                    continue
+
+                done, _ = wait(running, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    tokens.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        store.fail(task["task_id"], worker_id, e)
+                        summary["failed"] += 1
+                        print(f"Failed {task['resume_path']} (attempt {task['attempt']}): {str(e)}")
+                        continue
+                    if store.complete(task["task_id"], worker_id, result):
+                        summary["completed"] += 1
+                    else:
+                        # Another worker finished it after this worker's lease expired
+                        summary["duplicates"] += 1
+
+                if time.monotonic() - last_renewal >= renew_every:
+                    held = store.renew([task["task_id"] for task in running.values()], worker_id, lease_seconds)
+                    if held < len(running):
+                        print(f"Lost {len(running) - held} lease(s); results will still be written if first")
+                    last_renewal = time.monotonic()
+
+                finished = summary["completed"] + summary["failed"]
+                if done and finished % 10 == 0:
+                    rate = summary["completed"] / (time.perf_counter() - start) * 60
+                    print(f"{worker_id}: {summary['completed']} completed, {summary['failed']} failed, "
+                          f"{rate:.1f}/min")
+        except KeyboardInterrupt:
+            print("Stopping: handing leased tasks back")
+            for future, token in tokens.items():
+                future.cancel()
+                token.cancel("worker stopped")
+            store.release([task["task_id"] for task in running.values()], worker_id)
+            raise
+
+    summary["wall_seconds"] = time.perf_counter() - start
+    return summary
+
+
+def _format_progress(progress):
+    eta = progress["eta_seconds"]
+    eta_text = f"{eta / 60:.0f} min" if eta is not None else "unknown"
+    return (f"{progress['done']}/{progress['total']} done, {progress['failed']} failed, "
+            f"{progress['leased']} running, {progress['pending']} pending | "
+            f"{progress['active_workers']} workers, {progress['per_minute']:.1f}/min, ETA {eta_text}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed resume screening over a shared task store")
+    parser.add_argument("--store", default=os.getenv("SCREENING_STORE_PATH", "screening/tasks.db"),
+                        help="Path of the shared task store (SQLite file)")
+    parser.add_argument("--max-attempts", type=int, default=int(os.getenv("SCREENING_MAX_ATTEMPTS", "3")))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    submit = sub.add_parser("submit", help="Create a batch from a job description (or skills) and a resume directory")
+    submit.add_argument("--resumes", required=True, help="Directory tree containing PDF/TXT resumes")
+    submit.add_argument("--jd", help="Job description file (PDF/TXT)")
+    submit.add_argument("--skills", help="Comma-separated skills, instead of --jd")
+    submit.add_argument("--cutoff", type=int, default=75)
+    submit.add_argument("--mode", choices=("screen", "full"), default="screen")
+    submit.add_argument("--scoring", choices=("llm", "similarity", "hybrid"), default="llm")
+    submit.add_argument("--batch", help="Batch id (default: derived from the batch settings)")
+
+    work = sub.add_parser("work", help="Claim and analyze tasks")
+    work.add_argument("--batch", help="Only work on this batch")
+    work.add_argument("--concurrency", type=int, default=2, help="Analyses run at once by this worker")
+    work.add_argument("--lease", type=float, default=float(os.getenv("SCREENING_LEASE_SECONDS", "600")),
+                      help="Lease length in seconds; renewed while the task runs")
+    work.add_argument("--exit-when-idle", action="store_true", help="Stop when no task is left to claim")
+
+    status = sub.add_parser("status", help="Show progress and throughput")
+    status.add_argument("--batch")
+    status.add_argument("--watch", type=float, default=0, help="Refresh every N seconds")
+
+    retry = sub.add_parser("retry", help="Queue failed tasks again")
+    retry.add_argument("--batch")
+
+    export = sub.add_parser("export", help="Export a batch's results")
+    export.add_argument("--batch", required=True)
+    export.add_argument("--out", required=True, help="Output file (.jsonl, .csv or .parquet)")
+
+    args = parser.parse_args(argv)
+    store = TaskStore(args.store, max_attempts=args.max_attempts)
+
+    if args.command == "submit":
+        from ingest import iter_resume_files
+
+        skills = [skill.strip() for skill in args.skills.split(",") if skill.strip()] if args.skills else None
+        if not os.path.isdir(args.resumes):
+            print(f"Not a directory: {args.resumes}")
+            return 1
+        try:
+            batch_id, added = store.submit(iter_resume_files(args.resumes), jd_path=args.jd, role_requirements=skills,
+                                           cutoff_score=args.cutoff, mode=args.mode, scoring=args.scoring,
+                                           batch_id=args.batch)
+        except ValueError as e:
+            print(str(e))
+            return 1
+        print(f"Batch {batch_id}: {added} new task(s)")
+        print(_format_progress(store.progress(batch_id)))
+        return 0
+
+    if args.command == "work":
+        import config
+        from app import build_agent
+
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            print("OPENAI_API_KEY is not set")
+            return 1
+        summary = run_worker(store, build_agent(api_key), concurrency=args.concurrency, lease_seconds=args.lease,
+                             batch_id=args.batch, exit_when_idle=args.exit_when_idle,
+                             analysis_timeout=config.ANALYSIS_TIMEOUT_SECONDS)
+        print(f"Completed: {summary['completed']}  failed: {summary['failed']}  "
+              f"duplicates: {summary['duplicates']}  wall time: {summary['wall_seconds']:.1f}s")
+        return 0
+
+    if args.command == "status":
+        while True:
+            if args.batch:
+                print(_format_progress(store.progress(args.batch)))
+            else:
+                for batch in store.batches():
+                    print(f"{batch['batch_id']}: {_format_progress(store.progress(batch['batch_id']))}")
+            if not args.watch:
+                return 0
+            time.sleep(args.watch)
+
+    if args.command == "retry":
+        print(f"Queued {store.retry_failed(args.batch)} failed task(s) again")
+        return 0
+
+    if args.command == "export":
+        fmt = os.path.splitext(args.out)[1].lstrip(".").lower() or "jsonl"
+        count = export_results(store.results(args.batch), args.out, fmt=fmt)
+        print(f"Wrote {count} result(s) to {args.out}")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
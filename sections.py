@@ -0,0 +1,212 @@
+"""
+Section-aware resume chunking.
+
+Fixed-size splitting cuts resumes at arbitrary points: a skills list or a
+job entry ends up half in one chunk and half in the next, and retrieval
+returns fragments. build_chunks() instead:
+- detects the resume's sections (Summary, Experience, Skills, Projects,
+  Education, ...)
+- splits Experience and Projects into individual roles and entries
+- emits one chunk per section or role, tagged with section metadata
+
+Retrieval can then filter or boost by section.
+"""
+
+import re
+
+# Section name -> headings that introduce it (matched case-insensitively on a line of their own)
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "career summary", "profile", "professional profile",
+                "objective", "career objective", "about me", "about"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "core competencies",
+               "competencies", "technologies", "tools and technologies", "tech stack", "expertise"],
+    "projects": ["projects", "personal projects", "key projects", "selected projects", "open source"],
+    "education": ["education", "academic background", "education and training", "qualifications"],
+    "certifications": ["certifications", "certificates", "licenses and certifications", "courses", "training"],
+    "publications": ["publications", "papers"],
+    "awards": ["awards", "honors", "achievements", "awards and honors"],
+}
+
+# Sections whose entries (roles, projects) become separate chunks
+ENTRY_SECTIONS = ("experience", "projects")
+
+# Retrieval distance multipliers; lower favours the section when ranking hits
+SECTION_WEIGHTS = {
+    "skills": 0.9,
+    "experience": 0.9,
+    "projects": 0.95,
+    "certifications": 0.95,
+    "summary": 1.0,
+    "education": 1.05,
+}
+
+_HEADING_LOOKUP = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:(?:{_MONTH}\s+)?(?:19|20)\d{{2}}|\d{{1,2}}/(?:19|20)?\d{{2}})"
+_DATE_RANGE = re.compile(rf"{_DATE}\s*(?:-|–|—|to)\s*(?:{_DATE}|present|current|now|today)", re.IGNORECASE)
+_BULLET = re.compile(r"^\s*(?:[-•*▪◦●‣]|\d+[.)])\s+")
+
+
+def _heading_section(line):
+    """Section name if the line is a section heading, else None"""
+    candidate = line.strip().strip(":").strip().strip("#*=_-").strip()
+    if not candidate or len(candidate) > 40:
+        return None
+    return _HEADING_LOOKUP.get(re.sub(r"\s+", " ", candidate.replace("&", "and")).lower())
+
+
+def parse_sections(text):
+    """Split resume text into (section, heading, lines) tuples in document order.
+
+    Text before the first recognised heading is labelled "header".
+    """
+    sections = []
+    current = ("header", "", [])
+    for line in text.splitlines():
+        name = _heading_section(line)
+        if name:
+            if any(l.strip() for l in current[2]):
+                sections.append(current)
+            current = (name, line.strip().strip(":").strip(), [])
+        else:
+            current[2].append(line)
+    if any(l.strip() for l in current[2]):
+        sections.append(current)
+    return sections
+
+
+def split_entries(lines):
+    """Split an Experience/Projects section into entries at role boundaries.
+
+    A role starts at a non-bullet line carrying a date range, or at the title
+    line just above it.
+    """
+    starts = []
+    for i, line in enumerate(lines):
+        if _BULLET.match(line) or not _DATE_RANGE.search(line):
+            continue
+        start = i
+        previous = lines[i - 1] if i > 0 else ""
+        if previous.strip() and not _BULLET.match(previous) and len(previous.strip()) < 80 \
+                and not _DATE_RANGE.search(previous) and (not starts or i - 1 > starts[-1]):
+            start = i - 1
+        if not starts or start > starts[-1]:
+            starts.append(start)
+    if not starts:
+        return [lines]
+    if starts[0] > 0:
+        starts.insert(0, 0)
+    return [lines[a:b] for a, b in zip(starts, starts[1:] + [len(lines)])]
+
+
+def _split_long(lines, max_chars):
+    """Group lines into pieces of at most max_chars, breaking only between lines"""
+    pieces, current, size = [], [], 0
+    for line in lines:
+        if current and size + len(line) + 1 > max_chars:
+            pieces.append(current)
+            current, size = [], 0
+        # A single overlong line is cut hard
+        while len(line) > max_chars:
+            pieces.append([line[:max_chars]])
+            line = line[max_chars:]
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def iter_chunks(lines, max_chars=1200, min_chars=10):
+    """Yield (chunk, metadata) pairs from an iterable of lines as soon as each chunk is complete.
+
+    Lines can come straight from a page-by-page extractor: a role is emitted
+    once the next one starts, and a section once the next heading appears.
+    Within a long section or role, pieces are emitted once they are full, so
+    only about one chunk's worth of lines is held at a time.
+    """
+    section, heading, buffer, size, entry_index = "header", "", [], 0, 0
+
+    def _emit(entry_lines, index):
+        entry_lines = [line.rstrip() for line in entry_lines if line.strip()]
+        for piece in _split_long(entry_lines, max_chars):
+            body = "\n".join(piece).strip()
+            if len(body) <= min_chars:
+                continue
+            yield (f"{heading}\n{body}" if heading else body), {
+                "section": section,
+                "heading": heading,
+                "entry": index if section in ENTRY_SECTIONS else None,
+            }
+
+    def _flush_entries():
+        nonlocal buffer, size, entry_index
+        entries = split_entries(buffer) if section in ENTRY_SECTIONS else [buffer]
+        for entry in entries[:-1]:
+            yield from _emit(entry, entry_index)
+            entry_index += 1
+        buffer = entries[-1]
+        size = sum(len(line) + 1 for line in buffer)
+
+    for line in lines:
+        name = _heading_section(line)
+        if name:
+            yield from _flush_entries()
+            yield from _emit(buffer, entry_index)
+            section, heading, buffer, size, entry_index = name, line.strip().strip(":").strip(), [], 0, 0
+            continue
+        buffer.append(line)
+        size += len(line) + 1
+        if section in ENTRY_SECTIONS and not _BULLET.match(line) and _DATE_RANGE.search(line):
+            # A new role started; the ones before it are complete
+            yield from _flush_entries()
+        if size > 2 * max_chars:
+            # Emit the full pieces of an overlong section or role; the last line is kept
+            # because it may be the title of a role whose dates are on the next line
+            head, tail = buffer[:-1], buffer[-1:]
+            pieces = _split_long([l.rstrip() for l in head if l.strip()], max_chars)
+            for piece in pieces[:-1]:
+                yield from _emit(piece, entry_index)
+            buffer = (pieces[-1] if pieces else []) + tail
+            size = sum(len(l) + 1 for l in buffer)
+    yield from _flush_entries()
+    yield from _emit(buffer, entry_index)
+
+
+def build_chunks(text, max_chars=1200, min_chars=10):
+    """Chunk resume text along section and role boundaries.
+
+    Returns (chunks, metadatas): chunk texts prefixed with their section heading,
+    and one metadata dict per chunk with "section", "heading" and "entry" (the
+    role/project index within the section, or None).
+    """
+    chunks, metadatas = [], []
+    for chunk, metadata in iter_chunks(text.splitlines(), max_chars, min_chars):
+        chunks.append(chunk)
+        metadatas.append(metadata)
+    return chunks, metadatas
+
+
+def fallback_chunk(text):
+    """Single chunk indexed for a resume in which no chunk was found"""
+    return text[:1000] or "Resume content", {"section": "other", "heading": "", "entry": None}
+
+
+def resume_chunks(text):
+    """Chunks and metadata indexed for one resume, never empty"""
+    chunks, metadatas = build_chunks(text)
+    if not chunks:
+        chunk, metadata = fallback_chunk(text)
+        chunks, metadatas = [chunk], [metadata]
+    return chunks, metadatas
+
+
+def rerank_by_section(docs_and_scores, k, weights=SECTION_WEIGHTS):
+    """Re-rank (document, distance) hits with per-section weights and keep the best k"""
+    ranked = sorted(
+        docs_and_scores,
+        key=lambda pair: pair[1] * weights.get(pair[0].metadata.get("section"), 1.0),
+    )
+    return [doc for doc, _score in ranked[:k]]
@@ -0,0 +1,141 @@
+"""
+Process-wide store for per-session state with idle eviction and memory reporting.
+
+Streamlit keeps st.session_state alive for as long as the browser session
+exists, so large objects stored there accumulate across hundreds of sessions.
+Heavy per-session data (analysis results) lives here instead, keyed by a small
+session id kept in st.session_state, and is dropped once a session has been
+idle longer than the configured timeout.
+"""
+
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def deep_sizeof(obj, _seen=None):
+    """Approximate memory footprint of an object graph in bytes"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), _seen)
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            if hasattr(obj, slot):
+                size += deep_sizeof(getattr(obj, slot), _seen)
+    return size
+
+
+def process_memory():
+    """Current and peak resident set size of this process in bytes"""
+    stats = {"rss": None, "peak_rss": None}
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        stats["rss"] = resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+        stats["peak_rss"] = peak if sys.platform == "darwin" else peak * 1024
+    return stats
+
+
+class SessionStore:
+    """Thread-safe map of session id -> {key: value} with idle eviction.
+
+    Each value is sized once when it is set (values are replaced, not mutated
+    in place), so memory stats are running totals rather than a walk over
+    every session's data.
+    """
+
+    def __init__(self, idle_timeout=1800, sweep_interval=60):
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self._sessions = {}
+        self._sizes = {}          # session id -> {key: approximate bytes}
+        self._total_bytes = 0
+        self._last_seen = {}
+        self._last_sweep = 0.0
+        self._evicted_count = 0
+        self._lock = threading.RLock()
+
+    def touch(self, session_id):
+        """Mark a session as active and evict idle sessions periodically"""
+        now = time.monotonic()
+        with self._lock:
+            self._last_seen[session_id] = now
+            self._sessions.setdefault(session_id, {})
+            if now - self._last_sweep >= self.sweep_interval:
+                self.evict_idle(now)
+
+    def get(self, session_id, key, default=None):
+        with self._lock:
+            return self._sessions.get(session_id, {}).get(key, default)
+
+    def set(self, session_id, key, value):
+        # Sized outside the lock; other sessions are never blocked on it
+        size = deep_sizeof(value)
+        with self._lock:
+            self._sessions.setdefault(session_id, {})[key] = value
+            sizes = self._sizes.setdefault(session_id, {})
+            self._total_bytes += size - sizes.get(key, 0)
+            sizes[key] = size
+            self._last_seen[session_id] = time.monotonic()
+
+    def pop(self, session_id, key, default=None):
+        with self._lock:
+            self._total_bytes -= self._sizes.get(session_id, {}).pop(key, 0)
+            return self._sessions.get(session_id, {}).pop(key, default)
+
+    def clear(self, session_id):
+        """Drop all state held for a session"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._total_bytes -= sum(self._sizes.pop(session_id, {}).values())
+            self._last_seen.pop(session_id, None)
+
+    def evict_idle(self, now=None):
+        """Remove sessions idle for longer than idle_timeout. Returns evicted ids."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._last_sweep = now
+            expired = [sid for sid, seen in self._last_seen.items() if now - seen > self.idle_timeout]
+            for session_id in expired:
+                self.clear(session_id)
+            self._evicted_count += len(expired)
+        if expired:
+            print(f"Evicted {len(expired)} idle session(s)")
+        return expired
+
+    def session_memory(self, session_id):
+        """Approximate bytes held for one session"""
+        with self._lock:
+            return sum(self._sizes.get(session_id, {}).values())
+
+    def stats(self):
+        """Session count, approximate bytes held and evictions so far"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._total_bytes,
+                "evicted": self._evicted_count,
+            }
@@ -0,0 +1,204 @@
+"""
+Precomputed skill-vocabulary embedding table.
+
+The same few thousand skill names are embedded again and again: as retrieval
+queries, for canonicalization, and for similarity estimates. The build step
+below embeds a vocabulary of skills once and writes a versioned table:
+
+    skill_vocab/
+        CURRENT               name of the active version, e.g. v3
+        v3/vectors.npy        float32 matrix, one row per skill
+        v3/manifest.json      version, embedding model, dimension, skill -> row
+        misses.txt            skills requested at runtime but not in the table
+
+At startup the agent memory-maps the active table. Known skills are looked up
+with no embedding API call. Unknown skills go through the live embeddings
+client and are appended to misses.txt, so the next rebuild includes them.
+
+Usage:
+    python skill_vocab.py build                    # aliases + previous table + recorded misses
+    python skill_vocab.py build --skills more.txt  # plus one skill per line from a file
+    python skill_vocab.py info
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from skills import SKILL_ALIASES, normalize_skill
+
+CURRENT_FILE = "CURRENT"
+MISSES_FILE = "misses.txt"
+
+
+class SkillVocabulary:
+    """Read-only, memory-mapped skill -> embedding table that records misses"""
+
+    def __init__(self, directory, version, vectors, rows, model=None):
+        self.directory = directory
+        self.version = version
+        self.vectors = vectors
+        self.rows = rows
+        self.model = model
+        self._misses = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, directory="skill_vocab"):
+        """Map the active table of a vocabulary directory, or return None if none was built"""
+        try:
+            with open(os.path.join(directory, CURRENT_FILE), encoding="utf-8") as f:
+                version = f.read().strip()
+            version_dir = os.path.join(directory, version)
+            with open(os.path.join(version_dir, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        vectors = np.load(os.path.join(version_dir, "vectors.npy"), mmap_mode="r")
+        rows = {skill: row for row, skill in enumerate(manifest["skills"])}
+        return cls(directory, version, vectors, rows, manifest.get("model"))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, skill):
+        return str(skill).strip() in self.rows
+
+    def get(self, skill):
+        """Vector for a skill, or None if it is not in the table"""
+        row = self.rows.get(str(skill).strip())
+        return None if row is None else np.asarray(self.vectors[row], dtype=np.float32)
+
+    def record_misses(self, skills):
+        """Remember skills that had to be embedded live, for the next rebuild"""
+        with self._lock:
+            new = [skill for skill in dict.fromkeys(str(s).strip() for s in skills)
+                   if skill and skill not in self._misses]
+            if not new:
+                return
+            self._misses.update(new)
+            try:
+                with open(os.path.join(self.directory, MISSES_FILE), "a", encoding="utf-8") as f:
+                    f.write("".join(skill.replace("\n", " ") + "\n" for skill in new))
+            except OSError as e:
+                print(f"Could not record skill vocabulary misses: {str(e)}")
+
+
+class VocabularyEmbeddings:
+    """Embeddings client that answers known skills from a SkillVocabulary.
+
+    Offers the embed_documents / embed_query interface of the wrapped client;
+    only strings missing from the table reach it (in one batch).
+    """
+
+    def __init__(self, embeddings, vocabulary):
+        self.embeddings = embeddings
+        self.vocabulary = vocabulary
+        self.model = getattr(embeddings, "model", None)
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        vectors = [self.vocabulary.get(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            live = dict(zip(missing, self.embeddings.embed_documents(missing)))
+            self.vocabulary.record_misses(missing)
+            vectors = [live[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return [list(map(float, vector)) for vector in vectors]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def vocabulary_sources(directory, extra_files=()):
+    """Skill strings for a rebuild: alias table, previous table, recorded misses and extra files"""
+    skills = list(SKILL_ALIASES) + list(SKILL_ALIASES.values())
+    previous = SkillVocabulary.load(directory)
+    if previous is not None:
+        skills.extend(previous.rows)
+    for path in [os.path.join(directory, MISSES_FILE), *extra_files]:
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                skills.extend(line.strip() for line in f)
+    # Canonicalization embeds normalized keys, so include those forms too
+    skills.extend([normalize_skill(skill) for skill in skills])
+    return [skill for skill in dict.fromkeys(skill.strip() for skill in skills) if skill]
+
+
+def build_vocabulary(directory, embeddings, skills, model=None, batch_size=500):
+    """Write a new table version for skills and make it current. Returns the version name."""
+    os.makedirs(directory, exist_ok=True)
+    previous = SkillVocabulary.load(directory)
+    reusable = previous is not None and previous.model == model
+
+    vectors = {}
+    missing = []
+    for skill in skills:
+        vector = previous.get(skill) if reusable else None
+        if vector is None:
+            missing.append(skill)
+        else:
+            vectors[skill] = vector
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        vectors.update(zip(batch, embeddings.embed_documents(batch)))
+        print(f"Embedded {min(start + batch_size, len(missing))} of {len(missing)} new skills")
+
+    existing = [name for name in os.listdir(directory) if name.startswith("v") and name[1:].isdigit()]
+    version = f"v{max((int(name[1:]) for name in existing), default=0) + 1}"
+    version_dir = os.path.join(directory, version)
+    os.makedirs(version_dir)
+    matrix = np.asarray([vectors[skill] for skill in skills], dtype=np.float32)
+    np.save(os.path.join(version_dir, "vectors.npy"), matrix)
+    with open(os.path.join(version_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": version, "model": model, "dim": int(matrix.shape[1]) if len(matrix) else 0,
+                   "created_at": time.time(), "skills": skills}, f)
+
+    # Switch atomically, then forget the misses this version now covers
+    current_tmp = os.path.join(directory, CURRENT_FILE + ".tmp")
+    with open(current_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(directory, CURRENT_FILE))
+    misses_path = os.path.join(directory, MISSES_FILE)
+    if os.path.exists(misses_path):
+        os.remove(misses_path)
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the memory-mapped skill embedding table")
+    sub = parser.add_subparsers(dest="command", required=True)
+    default_dir = os.getenv("SKILL_VOCAB_DIR", "skill_vocab") or "skill_vocab"
+    build = sub.add_parser("build", help="Embed the skill vocabulary into a new table version")
+    build.add_argument("--dir", default=default_dir)
+    build.add_argument("--skills", action="append", default=[], help="File with one skill per line (repeatable)")
+    info = sub.add_parser("info", help="Show the active table")
+    info.add_argument("--dir", default=default_dir)
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        vocabulary = SkillVocabulary.load(args.dir)
+        if vocabulary is None:
+            print(f"No skill vocabulary built in {args.dir}")
+            return 1
+        misses_path = os.path.join(args.dir, MISSES_FILE)
+        misses = sum(1 for _ in open(misses_path, encoding="utf-8")) if os.path.exists(misses_path) else 0
+        print(f"{vocabulary.version}: {len(vocabulary)} skills, {vocabulary.vectors.shape[1]} dims, "
+              f"model {vocabulary.model}; {misses} recorded misses")
+        return 0
+
+    from langchain_openai import OpenAIEmbeddings
+    embeddings = OpenAIEmbeddings(openai_api_key=os.getenv("OPENAI_API_KEY"))
+    skills = vocabulary_sources(args.dir, args.skills)
+    version = build_vocabulary(args.dir, embeddings, skills, model=getattr(embeddings, "model", None))
+    print(f"Built skill vocabulary {version} with {len(skills)} skills in {args.dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Skill canonicalization and de-duplication.
+
+Job descriptions often list the same skill several ways ("Python",
+"Python 3.x", "Proficiency in Python programming"; "AWS", "Amazon Web
+Services"). Scoring each variant costs its own retrieval and LLM call and
+double-counts the skill in the overall score. canonicalize_skills() collapses
+such variants to one canonical skill in three steps:
+
+1. normalize the string (case, filler phrases, version suffixes)
+2. map known aliases through SKILL_ALIASES
+3. optionally merge what is left by embedding cosine similarity
+"""
+
+import re
+
+import numpy as np
+
+# Normalized alias -> canonical skill name
+SKILL_ALIASES = {
+    "python": "Python",
+    "py": "Python",
+    "aws": "AWS",
+    "amazon web services": "AWS",
+    "gcp": "Google Cloud",
+    "google cloud": "Google Cloud",
+    "google cloud platform": "Google Cloud",
+    "azure": "Azure",
+    "microsoft azure": "Azure",
+    "js": "JavaScript",
+    "javascript": "JavaScript",
+    "ecmascript": "JavaScript",
+    "ts": "TypeScript",
+    "typescript": "TypeScript",
+    "node": "Node.js",
+    "nodejs": "Node.js",
+    "node.js": "Node.js",
+    "react": "React",
+    "reactjs": "React",
+    "react.js": "React",
+    "k8s": "Kubernetes",
+    "kubernetes": "Kubernetes",
+    "docker": "Docker",
+    "containerization": "Docker",
+    "sql": "SQL",
+    "postgres": "PostgreSQL",
+    "postgresql": "PostgreSQL",
+    "mysql": "MySQL",
+    "nosql": "NoSQL",
+    "mongodb": "MongoDB",
+    "mongo": "MongoDB",
+    "ml": "Machine Learning",
+    "machine learning": "Machine Learning",
+    "dl": "Deep Learning",
+    "deep learning": "Deep Learning",
+    "ai": "Artificial Intelligence",
+    "artificial intelligence": "Artificial Intelligence",
+    "nlp": "Natural Language Processing",
+    "natural language processing": "Natural Language Processing",
+    "llm": "Large Language Models",
+    "llms": "Large Language Models",
+    "large language models": "Large Language Models",
+    "cv": "Computer Vision",
+    "computer vision": "Computer Vision",
+    "tensorflow": "TensorFlow",
+    "tf": "TensorFlow",
+    "pytorch": "PyTorch",
+    "torch": "PyTorch",
+    "scikit-learn": "scikit-learn",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "ci/cd": "CI/CD",
+    "ci cd": "CI/CD",
+    "continuous integration": "CI/CD",
+    "git": "Git",
+    "version control": "Git",
+    "rest": "REST APIs",
+    "rest api": "REST APIs",
+    "rest apis": "REST APIs",
+    "restful apis": "REST APIs",
+    "c#": "C#",
+    "csharp": "C#",
+    "c++": "C++",
+    "cpp": "C++",
+    "golang": "Go",
+    "go": "Go",
+}
+
+_FILLER_PREFIXES = re.compile(
+    r"^(?:(?:strong|solid|good|excellent|proven|deep|hands-on|working|advanced|basic)\s+)*"
+    r"(?:(?:proficiency|proficient|experience|experienced|knowledge|familiarity|familiar|"
+    r"expertise|skilled|skills|understanding|background|competency)\s+(?:in|with|of|using)\s+)?",
+    re.IGNORECASE,
+)
+_FILLER_SUFFIXES = re.compile(
+    r"\s+(?:programming(?:\s+language)?|language|skills?|experience|framework|development)$",
+    re.IGNORECASE,
+)
+_VERSION_SUFFIX = re.compile(r"\s+v?\d+(?:\.(?:\d+|x))*\+?$", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_skill(skill):
+    """Lowercase key for a skill with filler words and version suffixes removed"""
+    text = _WHITESPACE.sub(" ", str(skill)).strip().strip(".,;:-*").strip()
+    text = text.lower()
+    # Drop parenthesized qualifiers, e.g. "aws (ec2, s3)"
+    text = re.sub(r"\s*\([^)]*\)", "", text)
+    text = _FILLER_PREFIXES.sub("", text)
+    previous = None
+    while previous != text:
+        previous = text
+        text = _FILLER_SUFFIXES.sub("", text)
+        text = _VERSION_SUFFIX.sub("", text)
+    return text.strip()
+
+
+def canonical_name(skill):
+    """Canonical display name from the alias table, or None if the skill is not known"""
+    return SKILL_ALIASES.get(normalize_skill(skill))
+
+
+def canonicalize_skills(skills, embeddings=None, similarity_threshold=0.95):
+    """Collapse duplicate and aliased skills.
+
+    Returns (canonical_skills, skill_map) where canonical_skills keeps first-seen
+    order and skill_map maps every original skill string to its canonical skill.
+    When an embeddings client is given, skills that are still distinct after
+    normalization and alias lookup are merged if their embeddings have cosine
+    similarity >= similarity_threshold.
+    """
+    groups = {}        # group key -> list of original skills
+    display = {}       # group key -> canonical display name from the alias table
+    for skill in skills:
+        if not str(skill).strip():
+            continue
+        key = normalize_skill(skill) or str(skill).strip().lower()
+        alias = SKILL_ALIASES.get(key)
+        if alias:
+            key = alias.lower()
+            display[key] = alias
+        groups.setdefault(key, []).append(skill)
+
+    keys = list(groups)
+    merged_into = {key: key for key in keys}
+    if embeddings is not None and len(keys) > 1:
+        try:
+            vectors = np.asarray(embeddings.embed_documents(keys), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+            similarity = vectors @ vectors.T
+            for i, key in enumerate(keys):
+                if merged_into[key] != key:
+                    continue
+                for j in range(i + 1, len(keys)):
+                    other = keys[j]
+                    if merged_into[other] == other and similarity[i, j] >= similarity_threshold:
+                        merged_into[other] = key
+        except Exception as e:
+            print(f"Skill similarity clustering skipped: {str(e)}")
+
+    canonical_skills = []
+    skill_map = {}
+    for key in keys:
+        root = merged_into[key]
+        if root != key:
+            continue
+        members = [skill for other in keys if merged_into[other] == root for skill in groups[other]]
+        # Prefer the alias table name, otherwise the shortest way the skill was written
+        name = display.get(root) or min((str(m).strip() for m in members), key=len)
+        canonical_skills.append(name)
+        for member in members:
+            skill_map[member] = name
+    return canonical_skills, skill_map
@@ -0,0 +1,100 @@
+"""Cassette replay must work without network access, embeddings included."""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import httpx
+import pytest
+
+import cassette
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEXTS = ["Python developer with five years of Django", "SQL"]
+
+REPLAY_SCRIPT = """
+import json, socket, sys
+
+def blocked(*args, **kwargs):
+    raise OSError("network access is blocked in this test")
+
+socket.socket.connect = blocked
+socket.create_connection = blocked
+socket.getaddrinfo = blocked
+
+sys.path.insert(0, sys.argv[1])
+from agent import ResumeAnalysisAgent
+
+agent = ResumeAnalysisAgent(api_key="offline")
+print(json.dumps(agent.embeddings.embed_documents(json.loads(sys.argv[2]))))
+"""
+
+
+def _fake_embeddings(request):
+    inputs = json.loads(request.content)["input"]
+    data = [{"object": "embedding", "index": i,
+             "embedding": [b / 255 for b in hashlib.sha256(json.dumps(item).encode("utf-8")).digest()[:8]]}
+            for i, item in enumerate(inputs)]
+    return httpx.Response(200, json={"object": "list", "data": data, "model": "text-embedding-ada-002",
+                                     "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+
+
+@pytest.fixture
+def tiktoken_cache(tmp_path):
+    """tiktoken/ directory next to a cassette, holding the embeddings encoding"""
+    cache_dir = tmp_path / "cassettes" / "tiktoken"
+    cache_dir.mkdir(parents=True)
+    name = hashlib.sha1(cassette.TIKTOKEN_ENCODING_URL.encode("utf-8")).hexdigest()
+    for existing in (os.getenv("TIKTOKEN_CACHE_DIR"), os.getenv("DATA_GYM_CACHE_DIR"),
+                     os.path.join(tempfile.gettempdir(), "data-gym-cache")):
+        if existing and os.path.exists(os.path.join(existing, name)):
+            shutil.copy(os.path.join(existing, name), cache_dir / name)
+            break
+    else:
+        try:
+            cassette.prepare_tiktoken(str(cache_dir))
+        except Exception as e:
+            pytest.skip(f"tiktoken encoding not cached and cannot be downloaded: {e}")
+    return cache_dir
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    for name in ("TIKTOKEN_CACHE_DIR", "DATA_GYM_CACHE_DIR", "OPENAI_API_BASE", "LLM_CASSETTE_MODE",
+                 "LLM_CASSETTE_PATH"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(cassette, "_shared", None)
+    yield
+    # prepare_tiktoken sets this directly; monkeypatch then restores any original value
+    os.environ.pop("TIKTOKEN_CACHE_DIR", None)
+
+
+def test_embeddings_replay_without_network(tiktoken_cache, clean_env, monkeypatch):
+    from langchain_openai import OpenAIEmbeddings
+
+    path = str(tiktoken_cache.parent / "openai.jsonl.gz")
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(tiktoken_cache))
+    transport = cassette.CassetteTransport(path, mode=cassette.RECORD, transport=httpx.MockTransport(_fake_embeddings))
+    embeddings = OpenAIEmbeddings(openai_api_key="test", http_client=httpx.Client(transport=transport),
+                                  async_client=cassette.async_openai_client("test").embeddings)
+    recorded = embeddings.embed_documents(TEXTS)
+    transport.shutdown()
+
+    env = {key: value for key, value in os.environ.items()
+           if key not in ("TIKTOKEN_CACHE_DIR", "DATA_GYM_CACHE_DIR", "OPENAI_API_BASE")}
+    env.update(LLM_CASSETTE_MODE="replay", LLM_CASSETTE_PATH=path, LLM_CASSETTE_LATENCY_SCALE="0")
+    replay = subprocess.run([sys.executable, "-c", REPLAY_SCRIPT, REPO_DIR, json.dumps(TEXTS)],
+                            env=env, cwd=tiktoken_cache.parent, capture_output=True, text=True, timeout=120)
+    assert replay.returncode == 0, replay.stderr
+    assert json.loads(replay.stdout.strip().splitlines()[-1]) == recorded
+
+
+def test_replay_without_tiktoken_encoding_fails_up_front(tmp_path, clean_env, monkeypatch):
+    monkeypatch.setenv("LLM_CASSETTE_MODE", "replay")
+    monkeypatch.setenv("LLM_CASSETTE_PATH", str(tmp_path / "openai.jsonl.gz"))
+    with pytest.raises(cassette.CassetteMiss, match="tiktoken"):
+        cassette.http_client()
@@ -0,0 +1,125 @@
+"""
+An analysis leaves no temporary files behind and releases the upload buffers
+and memory maps of the documents it opened (in-memory ingestion).
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+import agent as agent_module
+from agent import ResumeAnalysisAgent
+
+RESUME = """Jane Doe
+
+SUMMARY
+Backend engineer building data services.
+
+EXPERIENCE
+Senior Engineer, Acme (2019 - 2023)
+- Built Python services and SQL pipelines on AWS.
+- Led the migration to Docker and Kubernetes.
+
+SKILLS
+Python, SQL, Docker, AWS
+"""
+
+
+class StubEmbeddings:
+    """Deterministic embeddings without any API calls"""
+
+    model = "stub-embeddings"
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+        vector = np.random.RandomState(seed).normal(size=16)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+class StubRouter:
+    """ModelRouter stand-in answering every call with a fixed score or weakness"""
+
+    tiers = {"fast": "stub"}
+    routes = {}
+
+    def invoke(self, call_type, prompt, temperature=0, validator=None, cancel_token=None):
+        if "JSON format" in prompt:
+            return ('{"weakness": "Not shown.", "improvement_suggestions": ["Add a project"], '
+                    '"example_addition": "Built it."}')
+        return "4 - some related experience"
+
+    def stats(self):
+        return {}
+
+    def hedge_stats(self):
+        return {}
+
+
+@pytest.fixture
+def stub_agent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    agent = ResumeAnalysisAgent("sk-test", router=StubRouter(), weakness_prefetch=0)
+    agent.embeddings = agent.skill_embeddings = StubEmbeddings()
+    return agent
+
+
+@pytest.fixture
+def opened_documents(monkeypatch):
+    """Every ResumeDocument the agent opens during the test"""
+    opened = []
+
+    class RecordingDocument(agent_module.ResumeDocument):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+    monkeypatch.setattr(agent_module, "ResumeDocument", RecordingDocument)
+    return opened
+
+
+def _assert_released(documents):
+    assert documents
+    for doc in documents:
+        assert doc._buffer is None
+        assert doc._mmap is None
+        assert doc._file is None
+
+
+def test_upload_analysis_leaves_no_temp_files_or_buffer_views(stub_agent, opened_documents):
+    temp_before = set(os.listdir(tempfile.gettempdir()))
+    upload = io.BytesIO(RESUME.encode("utf-8"))
+    upload.name = "resume.txt"
+
+    result = stub_agent.analyze_resume(upload, role_requirements=["Python", "Go"], weaknesses="eager")
+
+    assert result is not None and result.skills == ("Python", "Go")
+    assert set(os.listdir(tempfile.gettempdir())) == temp_before
+    _assert_released(opened_documents)
+    # Resizing a BytesIO fails while any getbuffer() view is still exported
+    upload.seek(0, io.SEEK_END)
+    upload.write(b"\nresized")
+
+
+def test_path_analysis_releases_memory_map(stub_agent, opened_documents, tmp_path):
+    resume_path = tmp_path / "resume.txt"
+    resume_path.write_text(RESUME, encoding="utf-8")
+    jd = io.BytesIO(b"Python developer")
+    jd.name = "jd.txt"
+    stub_agent.extract_skills_from_jd = lambda jd_text, cancel_token=None: ["Python", "SQL"]
+    temp_before = set(os.listdir(tempfile.gettempdir()))
+
+    result = stub_agent.analyze_resume(str(resume_path), custom_jd=jd, weaknesses="eager")
+
+    assert result is not None
+    assert set(os.listdir(tempfile.gettempdir())) == temp_before
+    _assert_released(opened_documents)
+    assert any(doc.name == "jd.txt" for doc in opened_documents)
+    jd.seek(0, io.SEEK_END)
+    jd.write(b" with SQL")
@@ -0,0 +1,108 @@
+"""
+Exported rows read back as written, in every format, when results are
+streamed in from a generator and Parquet is written in several row groups.
+"""
+
+import csv
+import io
+import json
+
+import pytest
+
+from export import OTHER_SKILLS_COLUMN, SKILL_COLUMN_PREFIX, WEAKNESS_COLUMN, export_results, flatten_result
+from results import AnalysisResult
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+SKILLS = ["Python", "SQL", "Docker"]
+
+
+def _results(count=7):
+    """Generator of results; odd ones carry a weakness, the last one is partial"""
+    for i in range(count):
+        result = AnalysisResult.from_scores(
+            {skill: (i + n) % 11 for n, skill in enumerate(SKILLS)},
+            {skill: f"reason {i}" for skill in SKILLS},
+            cutoff_score=50,
+            reasoning=f"résumé {i}",
+            analysis_id=f"resume-{i}",
+            extras={"partial": True} if i == count - 1 else None,
+        )
+        if i % 2:
+            result = result.with_weaknesses([{"skill": "SQL", "detail": "No joins", "suggestions": ["Add a query"],
+                                              "example": "SELECT ..."}])
+        yield result
+
+
+def _csv_row(row):
+    """A flattened row as csv.DictReader returns it"""
+    encoded = {}
+    for key, value in row.items():
+        if isinstance(value, (list, dict)):
+            encoded[key] = json.dumps(value, ensure_ascii=False)
+        else:
+            encoded[key] = "" if value is None else str(value)
+    return encoded
+
+
+@pytest.mark.parametrize("skill_columns", [None, SKILLS[:2]])
+def test_jsonl_round_trip(skill_columns):
+    buffer = io.StringIO()
+    assert export_results(_results(), buffer, fmt="jsonl", skill_columns=skill_columns) == 7
+
+    rows = [json.loads(line) for line in buffer.getvalue().splitlines()]
+    assert rows == [flatten_result(result, skill_columns) for result in _results()]
+    assert rows[-1]["selected"] is None
+
+
+def test_csv_round_trip():
+    buffer = io.StringIO(newline="")
+    assert export_results(_results(), buffer, fmt="csv") == 7
+
+    buffer.seek(0)
+    rows = list(csv.DictReader(buffer))
+    expected = [flatten_result(result, SKILLS) for result in _results()]
+    assert rows == [_csv_row(row) for row in expected]
+
+
+def test_parquet_round_trip_over_several_row_groups(tmp_path):
+    path = tmp_path / "results.parquet"
+    assert export_results(_results(), str(path), fmt="parquet", batch_size=3) == 7
+
+    parquet = pq.ParquetFile(str(path))
+    assert parquet.num_row_groups == 3
+    rows = parquet.read().to_pylist()
+    expected = [flatten_result(result, SKILLS) for result in _results()]
+    for row in expected:
+        row[OTHER_SKILLS_COLUMN] = list(row[OTHER_SKILLS_COLUMN].items())
+    assert rows == expected
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv", "parquet"])
+def test_fixed_skill_columns_header(tmp_path, fmt):
+    path = tmp_path / f"results.{fmt}"
+    columns = ["Kubernetes", "Python"]
+    export_results(_results(3), str(path), fmt=fmt, skill_columns=columns)
+
+    if fmt == "parquet":
+        table = pq.read_table(str(path))
+        header, rows = table.column_names, table.to_pylist()
+        others = [dict(row[OTHER_SKILLS_COLUMN]) for row in rows]
+    elif fmt == "csv":
+        with open(path, encoding="utf-8", newline="") as fp:
+            reader = csv.DictReader(fp)
+            rows = list(reader)
+        header = reader.fieldnames
+        others = [json.loads(row[OTHER_SKILLS_COLUMN]) for row in rows]
+    else:
+        with open(path, encoding="utf-8") as fp:
+            rows = [json.loads(line) for line in fp]
+        header = list(rows[0])
+        others = [row[OTHER_SKILLS_COLUMN] for row in rows]
+
+    skill_header = [name for name in header if name.startswith(SKILL_COLUMN_PREFIX)]
+    assert skill_header == [SKILL_COLUMN_PREFIX + skill for skill in columns]
+    assert header[-2:] == [OTHER_SKILLS_COLUMN, WEAKNESS_COLUMN]
+    # A requested skill no result has stays empty; the unrequested ones are kept aside
+    assert all(row[SKILL_COLUMN_PREFIX + "Kubernetes"] in (None, "") for row in rows)
+    assert others == [{"SQL": (i + 1) % 11, "Docker": (i + 2) % 11} for i in range(3)]
@@ -0,0 +1,101 @@
+"""
+A posting analyzed as part of a multi-posting run is saved exactly as a
+single analysis of that posting would be, so either one can answer the other.
+"""
+
+import hashlib
+import io
+
+import numpy as np
+import pytest
+
+from agent import ResumeAnalysisAgent
+from analysis_store import AnalysisStore
+
+RESUME = """Sam Lee
+
+EXPERIENCE
+Platform Engineer, Initech (2018 - 2024)
+- Ran Python services on Kubernetes clusters.
+"""
+
+# Skills with the same meaning get the same vector, so canonicalization merges them
+SYNONYMS = {"container orchestration": "kubernetes"}
+
+POSTINGS = {
+    "platform.txt": ["Kubernetes", "Python"],
+    "devops.txt": ["Container orchestration", "Python", "Terraform"],
+}
+
+
+class StubEmbeddings:
+    """Deterministic embeddings without any API calls"""
+
+    model = "stub-embeddings"
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        text = SYNONYMS.get(text, text)
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+        vector = np.random.RandomState(seed).normal(size=16)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+class StubRouter:
+    """ModelRouter stand-in scoring every skill 4 and writing a fixed weakness"""
+
+    tiers = {"fast": "stub"}
+    routes = {}
+
+    def invoke(self, call_type, prompt, temperature=0, validator=None, cancel_token=None):
+        if "JSON format" in prompt:
+            return ('{"weakness": "Not shown.", "improvement_suggestions": ["Add a project"], '
+                    '"example_addition": "Built it."}')
+        return "4 - some related experience"
+
+    def stats(self):
+        return {}
+
+    def hedge_stats(self):
+        return {}
+
+
+def _agent(tmp_path, monkeypatch, analysis_store=None):
+    monkeypatch.chdir(tmp_path)
+    agent = ResumeAnalysisAgent("sk-test", router=StubRouter(), weakness_prefetch=0, analysis_store=analysis_store)
+    agent.embeddings = agent.skill_embeddings = StubEmbeddings()
+    agent.extract_skills_from_jd = lambda jd_text, cancel_token=None: POSTINGS[jd_text.strip()]
+    return agent
+
+
+def _upload(name, text):
+    upload = io.BytesIO(text.encode("utf-8"))
+    upload.name = name
+    return upload
+
+
+@pytest.mark.parametrize("weaknesses", ["eager", "lazy"])
+def test_multi_posting_results_are_saved_as_single_analyses(tmp_path, monkeypatch, weaknesses):
+    agent = _agent(tmp_path, monkeypatch, AnalysisStore(str(tmp_path / "analyses.db")))
+    results = agent.analyze_resume_multi(_upload("resume.txt", RESUME),
+                                         [_upload(name, name) for name in POSTINGS], weaknesses=weaknesses)
+    by_posting = {result["posting"]: result for result in results}
+    # Pooled with "Kubernetes", but named the way the posting itself lists it
+    assert by_posting["devops.txt"].skills == ("Container orchestration", "Python", "Terraform")
+
+    # An agent without the store analyzes the posting on its own
+    (tmp_path / "single").mkdir()
+    single = _agent(tmp_path / "single", monkeypatch).analyze_resume(
+        _upload("resume.txt", RESUME), custom_jd=_upload("devops.txt", "devops.txt"), weaknesses=weaknesses)
+    for name in POSTINGS:
+        saved = agent.analyze_resume(_upload("resume.txt", RESUME), custom_jd=_upload(name, name),
+                                     weaknesses=weaknesses)
+        assert saved.analysis_id == by_posting[name].analysis_id
+        assert saved.skills == tuple(POSTINGS[name])
+    saved = agent.analyze_resume(_upload("resume.txt", RESUME), custom_jd=_upload("devops.txt", "devops.txt"),
+                                 weaknesses=weaknesses)
+    assert saved.skills == single.skills
+    assert saved["skill_scores"] == single["skill_scores"]
+    assert [w["skill"] for w in saved.weaknesses] == [w["skill"] for w in single.weaknesses]
@@ -0,0 +1,138 @@
+"""
+Task store semantics for distributed screening: leases, idempotent results,
+retries, resuming after a crashed worker and paged result export.
+"""
+
+import time
+
+import pytest
+
+from results import AnalysisResult
+from screening import DONE, FAILED, PENDING, TaskStore, run_worker
+
+
+class StubAgent:
+    """Stands in for ResumeAnalysisAgent; fails the resumes listed in fail_paths"""
+
+    def __init__(self, fail_paths=()):
+        self.fail_paths = set(fail_paths)
+        self.calls = []
+
+    def analyze_resume(self, resume_path, role_requirements=None, custom_jd=None, cutoff_score=75, mode="screen",
+                       scoring="llm", cancel_token=None, weaknesses=None):
+        self.calls.append(resume_path)
+        if resume_path in self.fail_paths:
+            raise RuntimeError("stub analysis failed")
+        return AnalysisResult.from_scores({skill: 8 for skill in role_requirements},
+                                          {skill: "stub" for skill in role_requirements}, cutoff_score)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TaskStore(str(tmp_path / "tasks.db"), max_attempts=2)
+
+
+def _submit(store, tmp_path, count):
+    paths = [str(tmp_path / f"resume_{i:02d}.txt") for i in range(count)]
+    batch_id, added = store.submit(paths, role_requirements=["Python", "SQL"], cutoff_score=50)
+    assert added == count
+    return batch_id, paths
+
+
+def _statuses(store, batch_id):
+    with store._connect() as conn:
+        return dict(conn.execute("SELECT resume_path, status FROM tasks WHERE batch_id = ?", (batch_id,)))
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(store, tmp_path):
+    _submit(store, tmp_path, 1)
+    first = store.claim("worker-a", lease_seconds=0.05)
+    assert len(first) == 1 and first[0]["attempt"] == 1
+    assert store.claim("worker-b", lease_seconds=60) == []
+
+    time.sleep(0.1)
+    second = store.claim("worker-b", lease_seconds=60)
+    assert [task["task_id"] for task in second] == [first[0]["task_id"]]
+    assert second[0]["attempt"] == 2
+    # The first worker no longer holds the lease
+    assert store.renew([first[0]["task_id"]], "worker-a", 60) == 0
+    assert store.renew([first[0]["task_id"]], "worker-b", 60) == 1
+
+
+def test_complete_keeps_the_first_result(store, tmp_path):
+    batch_id, _ = _submit(store, tmp_path, 1)
+    task = store.claim("worker-a", lease_seconds=60)[0]
+    first = AnalysisResult.from_scores({"Python": 9, "SQL": 9}, {}, 50)
+    late = AnalysisResult.from_scores({"Python": 1, "SQL": 1}, {}, 50)
+
+    assert store.complete(task["task_id"], "worker-a", first) is True
+    assert store.complete(task["task_id"], "worker-b", late) is False
+    [stored] = store.results(batch_id)
+    assert stored["skill_scores"] == {"Python": 9, "SQL": 9}
+    assert store.progress(batch_id)["done"] == 1
+
+
+def test_failing_task_is_retried_then_marked_failed(store, tmp_path):
+    batch_id, paths = _submit(store, tmp_path, 2)
+    agent = StubAgent(fail_paths=[paths[0]])
+
+    summary = run_worker(store, agent, worker_id="worker-a", lease_seconds=60, poll_seconds=0.01,
+                         exit_when_idle=True)
+    assert summary["completed"] == 1
+    assert summary["failed"] == 2
+    assert agent.calls.count(paths[0]) == store.max_attempts
+    assert _statuses(store, batch_id) == {paths[0]: FAILED, paths[1]: DONE}
+
+    assert store.retry_failed(batch_id) == 1
+    assert _statuses(store, batch_id)[paths[0]] == PENDING
+
+
+def test_expired_lease_out_of_attempts_is_marked_failed(store, tmp_path):
+    batch_id, paths = _submit(store, tmp_path, 1)
+    for _ in range(store.max_attempts):
+        assert len(store.claim("crashing-worker", lease_seconds=0.01)) == 1
+        time.sleep(0.05)
+
+    assert store.claim("worker-b", lease_seconds=60) == []
+    assert _statuses(store, batch_id) == {paths[0]: FAILED}
+
+
+def test_batch_resumes_after_a_worker_crash(store, tmp_path):
+    batch_id, paths = _submit(store, tmp_path, 5)
+    # A worker leases two tasks, finishes one and dies without releasing the other
+    crashed = store.claim("crashed-worker", lease_seconds=0.05, limit=2)
+    store.complete(crashed[0]["task_id"], "crashed-worker",
+                   StubAgent().analyze_resume(crashed[0]["resume_path"], ["Python", "SQL"], cutoff_score=50))
+    assert store.progress(batch_id)["leased"] == 1
+
+    time.sleep(0.1)
+    agent = StubAgent()
+    summary = run_worker(store, agent, worker_id="worker-b", lease_seconds=60, poll_seconds=0.01,
+                         exit_when_idle=True)
+    assert summary["completed"] == 4
+    assert sorted(agent.calls) == sorted(p for p in paths if p != crashed[0]["resume_path"])
+    assert set(_statuses(store, batch_id).values()) == {DONE}
+    assert [result.analysis_id for result in store.results(batch_id)] == paths
+
+
+def test_results_are_read_in_pages(store, tmp_path):
+    batch_id, paths = _submit(store, tmp_path, 5)
+    run_worker(store, StubAgent(), worker_id="worker-a", lease_seconds=60, poll_seconds=0.01, exit_when_idle=True)
+
+    for page_size in (1, 2, 5, 10):
+        assert [result.analysis_id for result in store.results(batch_id, page_size=page_size)] == paths
+
+
+def test_throughput_of_a_young_batch_uses_its_age(store, tmp_path):
+    batch_id, _ = _submit(store, tmp_path, 4)
+    with store._connect() as conn:
+        conn.execute("UPDATE tasks SET created_at = ?", (time.time() - 60,))
+    for task in store.claim("worker-a", lease_seconds=60, limit=2):
+        store.complete(task["task_id"], "worker-a",
+                       StubAgent().analyze_resume(task["resume_path"], ["Python", "SQL"], cutoff_score=50))
+
+    progress = store.progress(batch_id)
+    # Two results in the batch's first minute, not two per throughput window
+    assert progress["per_minute"] == pytest.approx(2, rel=0.05)
+    assert progress["eta_seconds"] == pytest.approx(60, rel=0.05)
+    assert progress["leased"] == 0
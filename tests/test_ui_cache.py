@@ -0,0 +1,36 @@
+"""
+Memoized views of results that carry no analysis_id are not shared between
+different results.
+"""
+
+import streamlit as st
+
+import ui
+from results import AnalysisResult
+
+
+def _result(scores):
+    return AnalysisResult.from_scores(scores, {skill: f"{skill} reasoning" for skill in scores}, 50)
+
+
+def test_skill_rows_of_results_without_id_are_kept_apart():
+    st.cache_data.clear()
+    first, second = _result({"Python": 9, "SQL": 2}), _result({"Python": 3, "Go": 7})
+    assert first.get("analysis_id") is None and second.get("analysis_id") is None
+
+    rows = []
+    for result in (first, second, first):
+        scores, reasonings = result["skill_scores"], result["skill_reasonings"]
+        rows.append(ui._cached_skill_rows(None, ui._content_hash([scores, reasonings, None]), scores, reasonings))
+    assert [row["Skill"] for row in rows[0]] == ["Python", "SQL"]
+    assert [row["Skill"] for row in rows[1]] == ["Go", "Python"]
+    assert rows[2] == rows[0]
+
+
+def test_result_key_without_id_depends_on_content():
+    first, second = _result({"Python": 9}), _result({"Python": 3})
+    assert ui._result_key(first) != ui._result_key(second)
+    assert ui._result_key(first) == ui._result_key(_result({"Python": 9}))
+
+    first.analysis_id = "abc"
+    assert ui._result_key(first) == first.cache_key
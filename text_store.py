@@ -0,0 +1,120 @@
+"""
+Content-addressed store of extracted resume text.
+
+Extracting text from PDFs dominates CPU time in batch screening, and the same
+files are parsed again and again. ExtractedTextStore keeps the normalized text
+of each document, zlib-compressed, in a local SQLite file keyed by the SHA-256
+of the original file bytes, together with its page count and extraction time.
+Any later upload or batch containing the same bytes reads the text back
+instead of parsing it.
+"""
+
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+
+
+class ExtractedTextStore:
+    """SQLite-backed map of document content hash -> extracted text"""
+
+    def __init__(self, path="text_store/extracted_text.db"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS documents (
+                    content_hash TEXT PRIMARY KEY,
+                    source TEXT,
+                    kind TEXT,
+                    text BLOB NOT NULL,
+                    text_length INTEGER NOT NULL,
+                    page_count INTEGER,
+                    extract_seconds REAL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps the store safe to use from
+        # Streamlit's script threads and from several processes at once
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, content_hash):
+        """Stored record for a content hash, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT source, kind, text, page_count, extract_seconds, created_at "
+                "FROM documents WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+        if row is None:
+            return None
+        source, kind, blob, page_count, extract_seconds, created_at = row
+        return {
+            "content_hash": content_hash,
+            "source": source,
+            "kind": kind,
+            "text": zlib.decompress(blob).decode("utf-8"),
+            "page_count": page_count,
+            "extract_seconds": extract_seconds,
+            "created_at": created_at,
+        }
+
+    def get_text(self, content_hash):
+        """Stored text for a content hash, or None"""
+        record = self.get(content_hash)
+        return record["text"] if record else None
+
+    def put(self, content_hash, text, page_count=None, extract_seconds=None, source=None, kind=None,
+            replace=False):
+        """Store extracted text; an existing entry for the same hash is kept unless replace is set"""
+        blob = zlib.compress(text.encode("utf-8"), 6)
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._connect() as conn:
+            conn.execute(
+                f"{verb} INTO documents "
+                "(content_hash, source, kind, text, text_length, page_count, extract_seconds, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, source, kind, blob, len(text), page_count, extract_seconds, time.time()),
+            )
+
+    def iter_texts(self):
+        """Yield (content_hash, text) for every stored document"""
+        with self._connect() as conn:
+            hashes = [row[0] for row in conn.execute("SELECT content_hash FROM documents ORDER BY created_at")]
+        for content_hash in hashes:
+            text = self.get_text(content_hash)
+            if text is not None:
+                yield content_hash, text
+
+    def __contains__(self, content_hash):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT 1 FROM documents WHERE content_hash = ?", (content_hash,)
+            ).fetchone() is not None
+
+    def stats(self):
+        """Document count, total pages, text vs stored size and total extraction time"""
+        with self._connect() as conn:
+            count, pages, text_chars, stored_bytes, seconds = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(page_count), 0), COALESCE(SUM(text_length), 0), "
+                "COALESCE(SUM(LENGTH(text)), 0), COALESCE(SUM(extract_seconds), 0) FROM documents"
+            ).fetchone()
+        return {
+            "documents": count,
+            "pages": pages,
+            "text_chars": text_chars,
+            "stored_bytes": stored_bytes,
+            "extract_seconds": seconds,
+        }
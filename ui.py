@@ -1,6 +1,84 @@
 import streamlit as st
+import hashlib
 import json
+import os
 from datetime import datetime
+from export import export_to_bytes
+
+
+def _content_hash(data):
+    """Stable hash of JSON-serializable data, for memoizing views of results without an analysis_id"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _result_key(analysis_results):
+    """Memoization key for one view (cutoff, weaknesses) of an analysis result"""
+    if analysis_results.get("analysis_id") is None:
+        # Results without an id would all share one entry; tell them apart by content
+        data = analysis_results.to_dict() if hasattr(analysis_results, "to_dict") else analysis_results
+        return _content_hash(data)
+    return getattr(analysis_results, "cache_key", None) or analysis_results.get("analysis_id")
+
+
+def _selection_label(selected):
+    """Selection status text; selected is None when a partial result left it undetermined"""
+    if selected is None:
+        return "UNDETERMINED"
+    return "RECOMMENDED" if selected else "NOT RECOMMENDED"
+
+
+def _analysis_date(analysis_results, fmt):
+    """When the analysis ran, from the timestamp stored with its result"""
+    analyzed_at = analysis_results.get("analyzed_at")
+    # Results saved before analyses were timestamped have no date of their own
+    return (datetime.fromtimestamp(analyzed_at) if analyzed_at else datetime.now()).strftime(fmt)
+
+
+def _fragment(func):
+    """Run a render function as an independently rerunnable fragment when supported"""
+    decorator = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    return decorator(func) if decorator else func
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_skill_rows(analysis_id, content_key, _skill_scores, _skill_reasonings, _skill_aliases=None):
+    """Build the sorted skill table once per analysis (content_key tells apart results without an id)"""
+    variants = {}
+    for original, canonical in (_skill_aliases or {}).items():
+        variants.setdefault(canonical, []).append(original)
+    
+    skill_data = []
+    for skill, score in _skill_scores.items():
+        row = {
+            "Skill": skill,
+            "Score": score * 10,  # Convert to percentage
+            "Assessment": _skill_reasonings.get(skill, "No explanation provided")
+        }
+        if variants:
+            row["Also Listed As"] = "; ".join(variants.get(skill, []))
+        skill_data.append(row)
+    skill_data.sort(key=lambda x: x["Score"], reverse=True)
+    return skill_data
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_json_export(result_key, _analysis_results):
+    """Serialize the JSON export once per analysis"""
+    if hasattr(_analysis_results, "to_dict"):
+        _analysis_results = _analysis_results.to_dict()
+    return json.dumps(_analysis_results, indent=2)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_tabular_export(result_key, fmt, _analysis_results):
+    """Build a JSONL/CSV/Parquet export once per analysis and format"""
+    return export_to_bytes([_analysis_results], fmt)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_text_export(result_key, _analysis_results):
+    """Format the text export once per analysis"""
+    return ResumeAnalysisUI._format_report_as_text(_analysis_results)
 
 
 class ResumeAnalysisUI:
@@ -48,6 +126,202 @@ class ResumeAnalysisUI:
             
             return cutoff_score
 
+    @staticmethod
+    def render_analysis_mode():
+        """Render analysis mode selector in the sidebar. Returns 'full' or 'screen'."""
+        with st.sidebar:
+            mode = st.radio(
+                "Analysis Mode",
+                options=["full", "screen"],
+                format_func=lambda m: "Full analysis" if m == "full" else "Screening (decision only)",
+                help="Screening stops scoring as soon as the selection outcome is certain "
+                     "and skips improvement suggestions"
+            )
+        return mode
+
+    @staticmethod
+    def render_scoring_mode():
+        """Render skill scoring selector in the sidebar. Returns 'llm', 'hybrid' or 'similarity'."""
+        labels = {
+            "llm": "LLM (most accurate)",
+            "hybrid": "Hybrid (LLM only when unsure)",
+            "similarity": "Similarity only (fastest)",
+        }
+        with st.sidebar:
+            scoring = st.radio(
+                "Skill Scoring",
+                options=list(labels),
+                format_func=labels.get,
+                help="Similarity estimates compare skill and resume embeddings without LLM calls. "
+                     "Hybrid sends only skills with an ambiguous estimate to the LLM."
+            )
+        return scoring
+
+    @staticmethod
+    def render_estimate_notice(estimated_skills, total):
+        """Note which skill scores are embedding-similarity estimates"""
+        st.caption(
+            f"📐 {len(estimated_skills)} of {total} skill scores are similarity estimates "
+            f"rather than LLM assessments: {', '.join(estimated_skills)}"
+        )
+
+    @staticmethod
+    def render_near_duplicate_notice(near_duplicate):
+        """Note that the result was reused from a near-identical resume's analysis"""
+        st.info(
+            f"♻️ This resume is {near_duplicate.get('similarity', 0):.0%} similar to "
+            f"**{near_duplicate.get('of') or 'a resume'}**, which was already analyzed against the same "
+            "requirements, so its scores were reused without a new analysis.",
+            icon="ℹ️"
+        )
+
+    @staticmethod
+    def render_progress(placeholder, stage, done=None, total=None):
+        """Show the running analysis stage in a placeholder"""
+        labels = {
+            "extracting": "Extracting resume text",
+            "embedding": "Indexing resume",
+            "scoring": "Scoring skills",
+            "weaknesses": "Writing improvement suggestions",
+        }
+        label = labels.get(stage, stage)
+        if total:
+            placeholder.caption(f"⏳ {label}: {done} of {total}")
+        else:
+            placeholder.caption(f"⏳ {label}...")
+
+    @staticmethod
+    def render_cancelled_notice(reason, completed_skills, cancelled_skills, cancelled_weaknesses, score_bounds=None):
+        """Explain a result cut short by cancellation or the analysis deadline.
+
+        score_bounds is given when the selection was left undetermined.
+        """
+        lines = [f"Analysis stopped early ({reason}). Results below cover completed work only."]
+        if score_bounds:
+            lines.append(f"Selection status is undetermined: with the unscored skills, the overall score "
+                         f"could be anywhere from {score_bounds[0]}% to {score_bounds[1]}%.")
+        lines.append(f"Scored: {', '.join(completed_skills) or 'none'}")
+        if cancelled_skills:
+            lines.append(f"Not scored (cancelled): {', '.join(cancelled_skills)}")
+        if cancelled_weaknesses:
+            lines.append(f"No improvement suggestions (cancelled): {', '.join(cancelled_weaknesses)}")
+        st.warning("  \n".join(lines))
+
+    @staticmethod
+    def render_partial_notice(scored_count, unscored_skills, score_bounds):
+        """Explain an early-exit screening result"""
+        total = scored_count + len(unscored_skills)
+        st.info(
+            f"Screening result: decided after scoring {scored_count} of {total} skills. "
+            f"The overall score could range from {score_bounds[0]}% to {score_bounds[1]}%, "
+            f"which cannot change the selection outcome. "
+            f"Not scored: {', '.join(unscored_skills)}"
+        )
+
+    @staticmethod
+    def render_memory_usage(session_bytes, store_stats, process_stats):
+        """Render per-session and process memory usage in the sidebar"""
+        def _mb(value):
+            return "n/a" if value is None else f"{value / (1024 * 1024):.1f} MB"
+        
+        with st.sidebar:
+            with st.expander("🧠 Memory Usage"):
+                st.caption(f"This session: {session_bytes / 1024:.1f} KB")
+                st.caption(
+                    f"All sessions: {store_stats['sessions']} active, "
+                    f"{_mb(store_stats['bytes'])}, {store_stats['evicted']} evicted"
+                )
+                st.caption(f"Process RSS: {_mb(process_stats['rss'])} (peak {_mb(process_stats['peak_rss'])})")
+
+    @staticmethod
+    def render_model_usage(tier_stats, hedge_stats=None):
+        """Render per-tier LLM call counts, latency and hedging in the sidebar"""
+        with st.sidebar:
+            with st.expander("🤖 Model Usage"):
+                for tier, stats in tier_stats.items():
+                    if stats["calls"]:
+                        st.caption(
+                            f"**{tier}** ({stats['model']}): {stats['calls']} calls, "
+                            f"{stats['escalations']} escalated, {stats['errors']} errors, "
+                            f"p50 {stats['p50_seconds']:.2f}s / p95 {stats['p95_seconds']:.2f}s"
+                        )
+                    else:
+                        st.caption(f"**{tier}** ({stats['model']}): no calls yet")
+                    hedging = (hedge_stats or {}).get(tier)
+                    if hedging and hedging["calls"]:
+                        p99 = hedging["p99_seconds"]
+                        p99_unhedged = hedging["p99_unhedged_seconds"]
+                        latency = (f", p99 {p99:.2f}s vs {p99_unhedged:.2f}s unhedged"
+                                   if p99 is not None and p99_unhedged is not None else "")
+                        st.caption(
+                            f"↳ hedged {hedging['hedge_rate']:.1%} of calls, "
+                            f"{hedging['hedge_wins']} hedge wins{latency}"
+                        )
+
+    @staticmethod
+    def render_profiling_toggle(default_enabled):
+        """Hidden profiling switch, shown only when the app is opened with ?debug=1. Returns whether profiling is on."""
+        if st.query_params.get("debug") != "1":
+            return default_enabled
+        with st.sidebar:
+            return st.toggle(
+                "Profile analyses",
+                value=default_enabled,
+                help="Record a CPU profile and top allocation sites for each analysis"
+            )
+
+    @staticmethod
+    def render_profiles(profiles):
+        """Render download buttons for saved analysis profiles in the sidebar"""
+        with st.sidebar:
+            with st.expander("⏱️ Profiles"):
+                if not profiles:
+                    st.caption("No profiles yet. Run an analysis to record one.")
+                for profile in profiles:
+                    st.caption(profile["id"])
+                    col1, col2 = st.columns(2)
+                    for col, path, label, mime in (
+                        (col1, profile["profile_path"], ".prof", "application/octet-stream"),
+                        (col2, profile["allocations_path"], "allocations", "text/plain"),
+                    ):
+                        try:
+                            with open(path, "rb") as f:
+                                data = f.read()
+                        except OSError:
+                            continue
+                        col.download_button(
+                            label,
+                            data=data,
+                            file_name=os.path.basename(path),
+                            mime=mime,
+                            key=f"profile_{label}_{profile['id']}"
+                        )
+                st.caption("Open .prof files with snakeviz, tuna or python -m pstats")
+
+    @staticmethod
+    def render_analysis_history(search):
+        """Render saved-analysis search in the sidebar. Returns the analysis key to open, or None."""
+        with st.sidebar:
+            with st.expander("📚 Analysis History"):
+                candidate = st.text_input("Candidate", key="history_candidate", placeholder="Resume file name")
+                posting = st.text_input("Posting", key="history_posting", placeholder="Job description or skill")
+                try:
+                    entries = search(candidate=candidate.strip(), posting=posting.strip(), limit=20)
+                except Exception as e:
+                    st.caption(f"History unavailable: {str(e)}")
+                    return None
+                if not entries:
+                    st.caption("No saved analyses found.")
+                opened = None
+                for entry in entries:
+                    status = "❔" if entry["selected"] is None else "✅" if entry["selected"] else "❌"
+                    when = datetime.fromtimestamp(entry["created_at"]).strftime("%Y-%m-%d %H:%M")
+                    st.caption(f"{status} **{entry['candidate']}** vs {entry['posting'][:60]}  \n"
+                               f"{entry['overall_score']}% (cutoff {entry['cutoff_score']}), {when}")
+                    if st.button("Open", key=f"history_open_{entry['analysis_key']}"):
+                        opened = entry["analysis_key"]
+                return opened
+
     @staticmethod
     def render_file_upload_section():
         """Render file upload section for resume and job description"""
@@ -66,16 +340,18 @@ class ResumeAnalysisUI:
         
         with col2:
             st.subheader("Job Description")
-            jd_file = st.file_uploader(
-                "Upload job description (PDF or TXT)",
+            jd_files = st.file_uploader(
+                "Upload one or more job descriptions (PDF or TXT)",
                 type=["pdf", "txt"],
+                accept_multiple_files=True,
                 key=f"jd_upload_{st.session_state.get('jd_file_key', 0)}",
-                help="Supported formats: PDF or TXT"
+                help="Supported formats: PDF or TXT. Upload several to rank the openings by fit; "
+                     "the resume is analyzed once for all of them."
             )
         
         st.divider()
         
-        return resume_file, jd_file
+        return resume_file, jd_files or []
 
     @staticmethod
     def render_role_requirements_section():
@@ -125,8 +401,8 @@ class ResumeAnalysisUI:
         return analyze_button, clear_results_button
 
     @staticmethod
-    def render_results_header(overall_score, selected):
-        """Render results header with overall score and selection status"""
+    def render_results_header(overall_score, selected, analysis_results):
+        """Render results header with overall score, selection status and analysis date"""
         col1, col2, col3 = st.columns([1, 1, 1])
         
         with col1:
@@ -138,55 +414,84 @@ class ResumeAnalysisUI:
             )
         
         with col2:
-            status = "[RECOMMENDED]" if selected else "[NOT RECOMMENDED]"
+            status = f"[{_selection_label(selected)}]"
             st.metric(
                 "Selection Status",
                 status
             )
         
         with col3:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+            timestamp = _analysis_date(analysis_results, "%Y-%m-%d %H:%M")
             st.metric(
                 "Analysis Date",
                 timestamp
             )
 
     @staticmethod
-    def render_skill_scores(skill_scores, skill_reasonings):
+    def render_best_fit_openings(posting_results, selected_id=None):
+        """Render the ranked openings table and a selector for the one to show in detail.
+
+        Returns the analysis_id of the selected posting's result.
+        """
+        st.subheader("🏆 Best-Fit Openings")
+        rows = [
+            {
+                "Rank": result.get("fit_rank"),
+                "Opening": result.get("posting", "Job description"),
+                "Score": result.get("overall_score", 0),
+                "Status": _selection_label(result.get("selected")).capitalize(),
+                "Strengths": ", ".join(result.get("strengths", [])),
+                "Missing": ", ".join(result.get("missing_skills", [])),
+            }
+            for result in posting_results
+        ]
+        st.dataframe(
+            rows,
+            column_config={
+                "Rank": st.column_config.NumberColumn("Rank", width="small"),
+                "Opening": st.column_config.TextColumn("Opening", width="medium"),
+                "Score": st.column_config.ProgressColumn(
+                    "Score", min_value=0, max_value=100, format="%d%%"
+                ),
+                "Strengths": st.column_config.TextColumn("Strengths", width="medium"),
+                "Missing": st.column_config.TextColumn("Missing", width="medium"),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        ids = [result.get("analysis_id") for result in posting_results]
+        labels = {result.get("analysis_id"): f"#{result.get('fit_rank')} {result.get('posting', 'Job description')}"
+                  for result in posting_results}
+        return st.selectbox(
+            "Show details for",
+            options=ids,
+            index=ids.index(selected_id) if selected_id in ids else 0,
+            format_func=labels.get
+        )
+
+    @staticmethod
+    @_fragment
+    def render_skill_scores(skill_scores, skill_reasonings, analysis_id=None, skill_aliases=None):
         """Render skill scores in a detailed table"""
         st.subheader("📊 Skill Analysis")
         
-        # Create data for display
-        skill_data = []
-        for skill, score in skill_scores.items():
-            reasoning = skill_reasonings.get(skill, "No explanation provided")
-            skill_data.append({
-                "Skill": skill,
-                "Score": score * 10,  # Convert to percentage
-                "Assessment": reasoning
-            })
-        
-        # Sort by score descending
-        skill_data.sort(key=lambda x: x["Score"], reverse=True)
-        
-        # Display skills with color coding
-        for item in skill_data:
-            col1, col2, col3 = st.columns([2, 1, 4])
-            
-            with col1:
-                st.write(f"**{item['Skill']}**")
-            
-            with col2:
-                score_pct = item['Score']
-                if score_pct >= 70:
-                    st.success(f"{score_pct}%")
-                elif score_pct >= 40:
-                    st.warning(f"{score_pct}%")
-                else:
-                    st.error(f"{score_pct}%")
-            
-            with col3:
-                st.caption(item['Assessment'])
+        # Rows are built once per analysis and rendered as a single table element,
+        # which stays fast with many skills and long reasoning text
+        content_key = _content_hash([skill_scores, skill_reasonings, skill_aliases])
+        skill_data = _cached_skill_rows(analysis_id, content_key, skill_scores, skill_reasonings, skill_aliases)
+        
+        st.dataframe(
+            skill_data,
+            column_config={
+                "Skill": st.column_config.TextColumn("Skill", width="medium"),
+                "Score": st.column_config.ProgressColumn(
+                    "Score", min_value=0, max_value=100, format="%d%%"
+                ),
+                "Assessment": st.column_config.TextColumn("Assessment", width="large"),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
 
     @staticmethod
     def render_strengths(strengths):
@@ -202,29 +507,53 @@ class ResumeAnalysisUI:
             st.info("No strong skills identified based on the analysis.")
 
     @staticmethod
-    def render_weaknesses(weaknesses):
-        """Render identified weaknesses with improvement suggestions"""
+    def _render_weakness_detail(weakness):
+        """Render the issue, suggestions and example of one weakness"""
+        st.markdown(f"**Issue:** {weakness.get('detail', 'N/A')}")
+        
+        suggestions = weakness.get('suggestions', [])
+        if suggestions:
+            st.markdown("**Improvement Suggestions:**")
+            for i, suggestion in enumerate(suggestions, 1):
+                st.write(f"{i}. {suggestion}")
+        
+        example = weakness.get('example', '')
+        if example:
+            st.markdown("**Example Addition:**")
+            with st.container(border=True):
+                st.write(f"*{example}*")
+
+    @staticmethod
+    @_fragment
+    def render_weaknesses(weaknesses, pending=None, fetch=None):
+        """Render identified weaknesses with improvement suggestions.
+
+        pending lists (skill, score) pairs whose suggestions are generated on
+        demand: fetch(skill, wait) returns the entry, or None when it is not
+        ready and wait is False.
+        """
         st.subheader("⚠️ Areas for Improvement")
         
-        if weaknesses:
+        if weaknesses or pending:
             for idx, weakness in enumerate(weaknesses, 1):
                 with st.expander(
                     f"🔴 {weakness['skill']} (Score: {weakness.get('score', 0) * 10}%)",
                     expanded=(idx == 1)
                 ):
-                    st.markdown(f"**Issue:** {weakness.get('detail', 'N/A')}")
-                    
-                    suggestions = weakness.get('suggestions', [])
-                    if suggestions:
-                        st.markdown("**Improvement Suggestions:**")
-                        for i, suggestion in enumerate(suggestions, 1):
-                            st.write(f"{i}. {suggestion}")
-                    
-                    example = weakness.get('example', '')
-                    if example:
-                        st.markdown("**Example Addition:**")
-                        with st.container(border=True):
-                            st.write(f"*{example}*")
+                    ResumeAnalysisUI._render_weakness_detail(weakness)
+            for skill, score in pending or []:
+                with st.expander(f"🔴 {skill} (Score: {score * 10}%)"):
+                    weakness = fetch(skill, False)
+                    if weakness is None and st.button("✍️ Suggest improvements", key=f"weakness_{skill}"):
+                        with st.spinner(f"Writing suggestions for {skill}..."):
+                            weakness = fetch(skill, True)
+                        if weakness is None:
+                            st.caption("The resume text is no longer available. Run the analysis again.")
+                        else:
+                            # Refresh the exports so they include the new suggestions
+                            st.rerun()
+                    if weakness is not None:
+                        ResumeAnalysisUI._render_weakness_detail(weakness)
         else:
             st.success("✓ No major weaknesses detected!", icon="✅")
 
@@ -270,64 +599,102 @@ class ResumeAnalysisUI:
             st.write("⏳ Please wait...")
 
     @staticmethod
-    def render_export_results(analysis_results):
-        """Render export options for results"""
+    @_fragment
+    def render_export_results(analysis_results, pending_weaknesses=0, generate=None):
+        """Render export options for results.
+
+        generate() writes the suggestions still pending. It is a callback because
+        a click reruns only this fragment, whose return value Streamlit discards.
+        """
         st.subheader("📥 Export Results")
         
+        if pending_weaknesses and generate is not None:
+            st.caption(f"Exports include improvement suggestions generated so far; {pending_weaknesses} skill(s) have none yet.")
+            if st.button("✍️ Add all improvement suggestions to the exports"):
+                with st.spinner("✍️ Writing improvement suggestions..."):
+                    generate()
+                # Rerun the whole page so the exports and Areas for Improvement include them
+                st.rerun()
+        
+        result_key = _result_key(analysis_results)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
         col1, col2 = st.columns(2)
         
         with col1:
-            json_str = json.dumps(analysis_results, indent=2)
+            json_str = _cached_json_export(result_key, analysis_results)
             st.download_button(
                 label="📄 Download as JSON",
                 data=json_str,
-                file_name=f"resume_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                file_name=f"resume_analysis_{timestamp}.json",
                 mime="application/json",
                 use_container_width=True
             )
         
         with col2:
             # Create a formatted text version
-            text_report = ResumeAnalysisUI._format_report_as_text(analysis_results)
+            text_report = _cached_text_export(result_key, analysis_results)
             st.download_button(
                 label="📝 Download as Text",
                 data=text_report,
-                file_name=f"resume_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                file_name=f"resume_analysis_{timestamp}.txt",
                 mime="text/plain",
                 use_container_width=True
             )
+        
+        # Tabular formats use the same streaming writers as bulk exports
+        tabular_formats = [
+            ("jsonl", "🧾 Download as JSONL", "application/jsonl"),
+            ("csv", "📊 Download as CSV", "text/csv"),
+            ("parquet", "🗄️ Download as Parquet", "application/vnd.apache.parquet"),
+        ]
+        for col, (fmt, label, mime) in zip(st.columns(len(tabular_formats)), tabular_formats):
+            with col:
+                try:
+                    payload = _cached_tabular_export(result_key, fmt, analysis_results)
+                except ImportError as e:
+                    st.caption(str(e))
+                    continue
+                st.download_button(
+                    label=label,
+                    data=payload,
+                    file_name=f"resume_analysis_{timestamp}.{fmt}",
+                    mime=mime,
+                    use_container_width=True
+                )
 
     @staticmethod
     def _format_report_as_text(analysis_results):
         """Format analysis results as readable text report"""
-        report = "=" * 80 + "\n"
-        report += "RESUME ANALYSIS REPORT\n"
-        report += "=" * 80 + "\n\n"
-        
-        report += f"Overall Score: {analysis_results.get('overall_score', 'N/A')}%\n"
-        report += f"Selection Status: {'RECOMMENDED' if analysis_results.get('selected') else 'NOT RECOMMENDED'}\n"
-        report += f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        
-        report += "-" * 80 + "\n"
-        report += "SKILL SCORES\n"
-        report += "-" * 80 + "\n"
+        rule = "=" * 80
+        divider = "-" * 80
+        lines = [
+            rule,
+            "RESUME ANALYSIS REPORT",
+            rule,
+            "",
+            f"Overall Score: {analysis_results.get('overall_score', 'N/A')}%",
+            f"Selection Status: {_selection_label(analysis_results.get('selected'))}",
+            f"Analysis Date: {_analysis_date(analysis_results, '%Y-%m-%d %H:%M:%S')}",
+            "",
+            divider,
+            "SKILL SCORES",
+            divider,
+        ]
         for skill, score in analysis_results.get('skill_scores', {}).items():
-            report += f"• {skill}: {score * 10}%\n"
+            lines.append(f"• {skill}: {score * 10}%")
         
-        report += "\n" + "-" * 80 + "\n"
-        report += "STRENGTHS\n"
-        report += "-" * 80 + "\n"
+        lines += ["", divider, "STRENGTHS", divider]
         for strength in analysis_results.get('strengths', []):
-            report += f"✓ {strength}\n"
+            lines.append(f"✓ {strength}")
         
         if analysis_results.get('resume_weaknesses'):
-            report += "\n" + "-" * 80 + "\n"
-            report += "AREAS FOR IMPROVEMENT\n"
-            report += "-" * 80 + "\n"
+            lines += ["", divider, "AREAS FOR IMPROVEMENT", divider]
             for weakness in analysis_results.get('resume_weaknesses', []):
-                report += f"\n• {weakness.get('skill', 'N/A')}\n"
-                report += f"  Issue: {weakness.get('detail', 'N/A')}\n"
+                lines.append("")
+                lines.append(f"• {weakness.get('skill', 'N/A')}")
+                lines.append(f"  Issue: {weakness.get('detail', 'N/A')}")
                 for suggestion in weakness.get('suggestions', []):
-                    report += f"  - {suggestion}\n"
+                    lines.append(f"  - {suggestion}")
         
-        return report
+        return "\n".join(lines) + "\n"
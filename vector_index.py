@@ -0,0 +1,404 @@
+"""
+Compact, quantized FAISS indexes for resume chunks.
+
+Index types (FAISS_INDEX_TYPE):
+    flat   float32 vectors, exact search (the default)
+    fp16   scalar-quantized to float16, 2x smaller, needs no training
+    sq8    scalar-quantized to int8, 4x smaller
+    pq     product-quantized, PQ_M bytes per vector (1536-dim: 6 KB -> 64 B)
+
+Quantized indexes hold only codes in RAM. sq8 and pq searches fetch
+refine_factor x k candidates from the codes and re-rank them on float16
+copies of the vectors, so recall stays close to flat search. The float16
+vectors are saved next to the index (index.vectors.npy, half the size of a
+flat index) and memory-mapped, so only the rows of re-ranked candidates are
+read. fp16 indexes already hold float16 codes and are searched directly.
+
+A resume has too few chunks to train sq8 or pq codes on, so the codec is
+trained once, offline, on a sample of chunk embeddings. Each per-resume index
+is a copy of that trained codec with the resume's vectors added; nothing is
+trained during an analysis. Indexes for every resume in the text store can
+also be built ahead of time, and the agent loads them instead of embedding.
+
+Usage:
+    python vector_index.py train --type pq --store text_store/extracted_text.db
+    python vector_index.py build --type pq --store text_store/extracted_text.db
+    python vector_index.py benchmark --n 20000 --dim 1536
+    python vector_index.py calibrate --store text_store/extracted_text.db
+
+calibrate fits the similarity pre-scoring thresholds (PRESCORE_SIMILARITY_LOW
+and PRESCORE_SIMILARITY_HIGH) to the LLM skill scores of saved analyses.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from cache import content_hash
+from sections import resume_chunks
+
+INDEX_TYPES = ("flat", "fp16", "sq8", "pq")
+TRAINED_TYPES = ("sq8", "pq")
+# Types whose hits are re-ranked on float16 vectors stored next to the index
+RERANKED_TYPES = ("sq8", "pq")
+RERANK_DTYPE = np.float16
+PREBUILT_DIR = "prebuilt"
+
+
+def make_codec(index_type, dim, pq_m=64, pq_nbits=8):
+    """Empty (untrained) FAISS index of the given type using L2 distance"""
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "fp16":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+    if index_type == "sq8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    if index_type == "pq":
+        if dim % pq_m:
+            raise ValueError(f"PQ sub-quantizer count {pq_m} must divide the vector dimension {dim}")
+        return faiss.IndexPQ(dim, pq_m, pq_nbits, faiss.METRIC_L2)
+    raise ValueError(f"Unknown index type {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+
+
+def train_codec(index_type, vectors, pq_m=64, pq_nbits=8):
+    """Train an empty codec of index_type on sample vectors"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    codec = make_codec(index_type, vectors.shape[1], pq_m, pq_nbits)
+    if not codec.is_trained:
+        codec.train(vectors)
+    return codec
+
+
+def index_bytes(index):
+    """Serialized size of a FAISS index"""
+    return int(faiss.serialize_index(index).size)
+
+
+def stored_vectors(vectorstore):
+    """Float32 vectors of every chunk in a vectorstore, in index order"""
+    rerank = getattr(vectorstore, "rerank_vectors", None)
+    if rerank is not None:
+        return np.asarray(rerank, dtype=np.float32)
+    return vectorstore.index.reconstruct_n(0, vectorstore.index.ntotal)
+
+
+class QuantizedFAISS(FAISS):
+    """FAISS vectorstore that re-ranks quantized hits on float16 vectors.
+
+    rerank_vectors holds the vectors by index position (in memory for a fresh
+    build, memory-mapped once saved or loaded). With rerank_vectors None this
+    behaves exactly like FAISS. Vectors must not be added after build.
+    """
+
+    def __init__(self, *args, rerank_vectors=None, refine_factor=4, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rerank_vectors = rerank_vectors
+        self.refine_factor = refine_factor
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, fetch_k=20, **kwargs):
+        if self.rerank_vectors is None:
+            return super().similarity_search_with_score_by_vector(embedding, k, filter=filter, fetch_k=fetch_k,
+                                                                   **kwargs)
+        vector = np.asarray([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vector)
+        candidates = min(self.index.ntotal, max(k, fetch_k if filter else k) * self.refine_factor)
+        if candidates <= 0:
+            return []
+        _distances, ids = self.index.search(vector, candidates)
+        ids = [int(i) for i in ids[0] if i != -1]
+        # Squared L2 distances, the scores a flat index returns (to float16 precision)
+        rows = np.asarray(self.rerank_vectors[ids], dtype=np.float32)
+        distances = ((rows - vector) ** 2).sum(axis=1)
+
+        results = []
+        for position in np.argsort(distances):
+            doc = self.docstore.search(self.index_to_docstore_id[ids[position]])
+            if not isinstance(doc, Document):
+                continue
+            if filter and any(
+                doc.metadata.get(key) not in value if isinstance(value, list) else doc.metadata.get(key) != value
+                for key, value in filter.items()
+            ):
+                continue
+            results.append((doc, float(distances[position])))
+            if len(results) == k:
+                break
+        return results
+
+    def save_local(self, folder_path, index_name="index"):
+        super().save_local(folder_path, index_name)
+        if self.rerank_vectors is not None:
+            vectors_path = os.path.join(folder_path, f"{index_name}.vectors.npy")
+            np.save(vectors_path, np.asarray(self.rerank_vectors, dtype=RERANK_DTYPE))
+            # Serve re-ranking from disk from now on
+            self.rerank_vectors = np.load(vectors_path, mmap_mode="r")
+
+    @classmethod
+    def load_local(cls, folder_path, embeddings, index_name="index", refine_factor=4, **kwargs):
+        store = super().load_local(folder_path, embeddings, index_name, allow_dangerous_deserialization=True,
+                                   **kwargs)
+        vectors_path = os.path.join(folder_path, f"{index_name}.vectors.npy")
+        # Older indexes saved float32 vectors; they load and re-rank the same way
+        store.rerank_vectors = np.load(vectors_path, mmap_mode="r") if os.path.exists(vectors_path) else None
+        store.refine_factor = refine_factor
+        return store
+
+
+class IndexFactory:
+    """Builds and loads per-resume vectorstores of the configured index type"""
+
+    def __init__(self, index_type="flat", codec_path=None, refine_factor=4):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+        self.index_type = index_type
+        self.codec_path = codec_path
+        self.refine_factor = refine_factor
+        self._codec = None
+        if index_type in TRAINED_TYPES:
+            if codec_path and os.path.exists(codec_path):
+                self._codec = faiss.read_index(codec_path)
+            else:
+                print(f"No trained {index_type} codec at {codec_path}; "
+                      f"indexes will train on their own vectors (run: python vector_index.py train)")
+
+    def new_index(self, vectors):
+        """Index of the configured type ready for vectors to be added"""
+        if self._codec is not None:
+            return faiss.clone_index(self._codec)
+        index_type = self.index_type
+        if index_type == "pq":
+            # A handful of chunks cannot train a product quantizer
+            index_type = "sq8"
+        return train_codec(index_type, vectors)
+
+    def from_texts(self, texts, embeddings, metadatas=None):
+        """Embed texts and build a vectorstore of the configured type"""
+        texts = list(texts)
+        vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        return self.from_vectors(texts, vectors, embeddings, metadatas)
+
+    def from_vectors(self, texts, vectors, embeddings, metadatas=None):
+        """Build a vectorstore of the configured type from already embedded texts"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        index = self.new_index(vectors)
+        index.add(vectors)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [str(i) for i in range(len(texts))]
+        docstore = InMemoryDocstore({
+            doc_id: Document(page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        })
+        return QuantizedFAISS(
+            embeddings, index, docstore, dict(enumerate(ids)),
+            rerank_vectors=vectors.astype(RERANK_DTYPE) if self.index_type in RERANKED_TYPES else None,
+            refine_factor=self.refine_factor,
+        )
+
+    def prebuilt_path(self, index_dir, resume_key):
+        """Directory of an offline-built index for a resume"""
+        return os.path.join(index_dir, PREBUILT_DIR, self.index_type, resume_key)
+
+    def load(self, path, embeddings):
+        """Load a saved vectorstore"""
+        return QuantizedFAISS.load_local(path, embeddings, refine_factor=self.refine_factor)
+
+
+def _store_chunks(store, sample=None, seed=0):
+    """Chunk texts of documents in an ExtractedTextStore, optionally a random sample of them"""
+    chunks = [chunk for _hash, text in store.iter_texts() for chunk in resume_chunks(text)[0]]
+    if sample and len(chunks) > sample:
+        chunks = random.Random(seed).sample(chunks, sample)
+    return chunks
+
+
+def _embeddings():
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(openai_api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def _clustered_vectors(n, dim, clusters=64, seed=0):
+    """Synthetic unit vectors grouped around random centroids, like embeddings of similar texts"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centroids[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def benchmark(vectors, queries, k=3, refine_factor=4, pq_m=64, train_size=20000):
+    """Size, build time, query time and recall@k of every index type against exact search.
+
+    disk_mb is the index plus its float16 re-rank vectors. ram_mb is what a
+    loaded index keeps resident: the index itself, since re-rank vectors are
+    memory-mapped and only the candidates' rows are read.
+    """
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _distances, truth = exact.search(queries, k)
+
+    rows = []
+    for index_type in INDEX_TYPES:
+        start = time.perf_counter()
+        index = train_codec(index_type, vectors[:train_size], pq_m=pq_m)
+        index.add(vectors)
+        rerank = vectors.astype(RERANK_DTYPE) if index_type in RERANKED_TYPES else None
+        build_seconds = time.perf_counter() - start
+
+        # Search the way QuantizedFAISS does: re-ranked types fetch extra candidates
+        start = time.perf_counter()
+        _distances, found = index.search(queries, k * refine_factor if rerank is not None else k)
+        reranked = found
+        if rerank is not None:
+            reranked = []
+            for query, candidates in zip(queries, found):
+                candidates = candidates[candidates != -1]
+                distances = ((rerank[candidates].astype(np.float32) - query) ** 2).sum(axis=1)
+                reranked.append(candidates[np.argsort(distances)[:k]])
+        query_ms = 1000 * (time.perf_counter() - start) / len(queries)
+
+        def _recall(results):
+            return float(np.mean([len(set(r[:k]) & set(t)) / k for r, t in zip(results, truth)]))
+
+        size = index_bytes(index)
+        rerank_size = 0 if rerank is None else rerank.nbytes
+        rows.append({
+            "type": index_type,
+            "index_mb": size / (1024 * 1024),
+            "rerank_mb": rerank_size / (1024 * 1024),
+            "disk_mb": (size + rerank_size) / (1024 * 1024),
+            "ram_mb": size / (1024 * 1024),
+            "bytes_per_vector": (size + rerank_size) / len(vectors),
+            "build_seconds": build_seconds,
+            "query_ms": query_ms,
+            f"recall@{k}": _recall(found),
+            f"recall@{k}_reranked": _recall(reranked),
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train, build and benchmark quantized resume indexes, "
+                                                 "and calibrate similarity pre-scoring")
+    sub = parser.add_subparsers(dest="command", required=True)
+    default_store = os.getenv("TEXT_STORE_PATH", "text_store/extracted_text.db")
+    default_type = os.getenv("FAISS_INDEX_TYPE", "pq")
+
+    train = sub.add_parser("train", help="Train a codec on chunk embeddings from the text store")
+    train.add_argument("--type", choices=TRAINED_TYPES, default=default_type if default_type in TRAINED_TYPES else "pq")
+    train.add_argument("--store", default=default_store)
+    train.add_argument("--vectors", help="Train on vectors from this .npy file instead of embedding the store")
+    train.add_argument("--sample", type=int, default=20000, help="Maximum chunks to embed for training")
+    train.add_argument("--pq-m", type=int, default=int(os.getenv("FAISS_PQ_M", "64")))
+    train.add_argument("--out", help="Codec path (default: FAISS_CODEC_PATH or faiss_indexes/codec_<type>.faiss)")
+
+    build = sub.add_parser("build", help="Build indexes for every resume in the text store")
+    build.add_argument("--type", choices=INDEX_TYPES, default=default_type)
+    build.add_argument("--store", default=default_store)
+    build.add_argument("--codec", help="Trained codec path (default: faiss_indexes/codec_<type>.faiss)")
+    build.add_argument("--index-dir", default="faiss_indexes")
+
+    bench = sub.add_parser("benchmark", help="Compare memory and recall of the index types")
+    bench.add_argument("--vectors", help=".npy file of embeddings (default: synthetic clustered vectors)")
+    bench.add_argument("--n", type=int, default=20000)
+    bench.add_argument("--dim", type=int, default=1536)
+    bench.add_argument("--queries", type=int, default=200)
+    bench.add_argument("--k", type=int, default=3)
+    bench.add_argument("--refine-factor", type=int, default=4)
+    bench.add_argument("--pq-m", type=int, default=int(os.getenv("FAISS_PQ_M", "64")))
+    bench.add_argument("--json", help="Write results to this JSON file")
+
+    calibrate = sub.add_parser("calibrate", help="Fit pre-scoring thresholds to LLM scores of saved analyses")
+    calibrate.add_argument("--store", default=default_store)
+    calibrate.add_argument("--analyses", default=os.getenv("ANALYSIS_STORE_PATH", "analysis_store/analyses.db"))
+    calibrate.add_argument("--top-k", type=int, default=int(os.getenv("PRESCORE_TOP_K", "1")))
+    args = parser.parse_args(argv)
+
+    if args.command == "calibrate":
+        from analysis_store import AnalysisStore
+        from prescore import calibration_samples, fit_thresholds
+        from text_store import ExtractedTextStore
+        if not os.path.exists(args.analyses):
+            print(f"No analysis store at {args.analyses}")
+            return 1
+        similarities, scores = calibration_samples(
+            AnalysisStore(args.analyses).iter_results(), ExtractedTextStore(args.store).get_text,
+            _embeddings(), lambda text: resume_chunks(text)[0], top_k=args.top_k)
+        try:
+            low, high = fit_thresholds(similarities, scores)
+        except ValueError as e:
+            print(f"Calibration failed on {len(scores)} LLM-scored skills: {e}")
+            return 1
+        print(f"Fitted on {len(scores)} LLM-scored skills "
+              f"(correlation {np.corrcoef(similarities, scores)[0, 1]:.2f}). Add to .env:")
+        print(f"PRESCORE_SIMILARITY_LOW={low:.3f}")
+        print(f"PRESCORE_SIMILARITY_HIGH={high:.3f}")
+        return 0
+
+    if args.command == "train":
+        if args.vectors:
+            vectors = np.load(args.vectors)
+        else:
+            from text_store import ExtractedTextStore
+            chunks = _store_chunks(ExtractedTextStore(args.store), args.sample)
+            print(f"Embedding {len(chunks)} chunks for training...")
+            vectors = np.asarray(_embeddings().embed_documents(chunks), dtype=np.float32)
+        out = args.out or os.getenv("FAISS_CODEC_PATH") or os.path.join("faiss_indexes", f"codec_{args.type}.faiss")
+        start = time.perf_counter()
+        codec = train_codec(args.type, vectors, pq_m=args.pq_m)
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        faiss.write_index(codec, out)
+        print(f"Trained {args.type} codec on {len(vectors)} vectors in {time.perf_counter() - start:.1f}s -> {out}")
+        return 0
+
+    if args.command == "build":
+        from text_store import ExtractedTextStore
+        codec = args.codec or os.path.join(args.index_dir, f"codec_{args.type}.faiss")
+        factory = IndexFactory(args.type, codec_path=codec)
+        embeddings = _embeddings()
+        built = skipped = 0
+        for _hash, text in ExtractedTextStore(args.store).iter_texts():
+            # Same key and chunks the agent uses for this resume
+            path = factory.prebuilt_path(args.index_dir, content_hash(text))
+            if os.path.exists(path):
+                skipped += 1
+                continue
+            chunks, metadatas = resume_chunks(text)
+            factory.from_texts(chunks, embeddings, metadatas).save_local(path)
+            built += 1
+            if built % 100 == 0:
+                print(f"Built {built} indexes")
+        print(f"Built {built} {args.type} indexes, {skipped} already present")
+        return 0
+
+    if args.vectors:
+        vectors = np.ascontiguousarray(np.load(args.vectors), dtype=np.float32)
+    else:
+        vectors = _clustered_vectors(args.n + args.queries, args.dim)
+    vectors, queries = vectors[:-args.queries], vectors[-args.queries:]
+    rows = benchmark(vectors, queries, k=args.k, refine_factor=args.refine_factor, pq_m=args.pq_m)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, "
+          f"re-ranking {args.refine_factor * args.k} candidates")
+    print(f"{'type':6} {'disk MB':>9} {'RAM MB':>9} {'B/vec':>8} {'build s':>8} {'query ms':>9} "
+          f"{'recall':>7} {'reranked':>9}")
+    for row in rows:
+        print(f"{row['type']:6} {row['disk_mb']:9.1f} {row['ram_mb']:9.1f} {row['bytes_per_vector']:8.0f} "
+              f"{row['build_seconds']:8.2f} {row['query_ms']:9.3f} {row[f'recall@{args.k}']:7.3f} "
+              f"{row[f'recall@{args.k}_reranked']:9.3f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())